@@ -0,0 +1,262 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+
+from dates import stored_date
+from search import normalize_text
+from table_filters import NUMBER_RE, to_cents
+
+# Agrupamentos por período: dia (2026-10-19), semana ISO (2026-W42) e mês (2026-10)
+PERIODS = ("dia", "semana", "mes")
+
+
+def period_keys(date):
+    year, week, _ = date.isocalendar()
+    return (date.isoformat(), f"{year}-W{week:02d}", date.strftime("%Y-%m"))
+
+
+def to_units(text):
+    match = NUMBER_RE.search(str(text or ""))
+    return float(match.group(0).replace(",", ".")) if match else 0.0
+
+
+def sale_entry(record):
+    """(data ISO ou None, produto normalizado, nome, unidades, centavos) de uma venda."""
+    date = stored_date(record.get("data"))
+    name = str(record.get("produto") or "").strip()
+    units = to_units(record.get("quantidade"))
+    cents = to_cents(str(record.get("total") or ""))
+    if cents is None:
+        # Sem total digitado: quantidade x valor unitário
+        cents = int(round(units * (to_cents(str(record.get("valor_unit") or "")) or 0)))
+    return (date.isoformat() if date else None, normalize_text(name), name, units, cents)
+
+
+class SalesAnalytics:
+    """Totais de vendas por período, produto e categoria, mantidos incrementalmente.
+
+    Cada venda é identificada por uma chave estável (a row_key da grade).
+    add/remove ajustam só os acumuladores tocados pela venda, e o índice de
+    datas ordenado responde consultas por intervalo sem varrer as vendas.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.sales = {}                           # chave -> entrada de sale_entry
+        self.date_index = []                      # [(data ISO, chave)] ordenado
+        self.periods = {p: {} for p in PERIODS}   # período -> {rótulo: [unidades, centavos, vendas]}
+        self.products = {}                        # produto normalizado -> [unidades, centavos, vendas]
+        self.names = {}                           # produto normalizado -> nome exibido
+        self.totals = [0.0, 0, 0]
+
+    def __len__(self):
+        return len(self.sales)
+
+    def add(self, key, record):
+        if key in self.sales:
+            self.remove(key)
+        entry = sale_entry(record)
+        self.sales[key] = entry
+        if entry[0]:
+            insort(self.date_index, (entry[0], key))
+        if entry[1]:
+            self.names[entry[1]] = entry[2]
+        self.accumulate(entry, 1)
+
+    update = add
+
+    def remove(self, key):
+        entry = self.sales.pop(key, None)
+        if entry is None:
+            return
+        if entry[0]:
+            i = bisect_left(self.date_index, (entry[0], key))
+            if i < len(self.date_index) and self.date_index[i] == (entry[0], key):
+                del self.date_index[i]
+        self.accumulate(entry, -1)
+
+    def accumulate(self, entry, sign):
+        date, product, _, units, cents = entry
+        buckets = []
+        if date:
+            for period, label in zip(PERIODS, period_keys(stored_date(date))):
+                buckets.append((self.periods[period], label))
+        if product:
+            buckets.append((self.products, product))
+        for groups, label in buckets:
+            bucket = groups.get(label)
+            if bucket is None:
+                bucket = groups[label] = [0.0, 0, 0]
+            bucket[0] += sign * units
+            bucket[1] += sign * cents
+            bucket[2] += sign
+            if not bucket[2]:
+                del groups[label]
+                if groups is self.products:
+                    self.names.pop(label, None)
+        self.totals[0] += sign * units
+        self.totals[1] += sign * cents
+        self.totals[2] += sign
+
+    # --- Consultas ---
+    def between(self, start=None, end=None):
+        """Chaves das vendas com data entre start e end (datetime.date, inclusive)."""
+        lo = bisect_left(self.date_index, (start.isoformat(),)) if start else 0
+        hi = bisect_right(self.date_index, (end.isoformat(), float("inf"))) if end else len(self.date_index)
+        return [key for _, key in self.date_index[lo:hi]]
+
+    def by_period(self, period="dia", start=None, end=None):
+        """[(rótulo, unidades, centavos, vendas)] em ordem cronológica."""
+        if start is None and end is None:
+            groups = self.periods[period]
+        else:
+            index = PERIODS.index(period)
+            groups = {}
+            for key in self.between(start, end):
+                date, _, _, units, cents = self.sales[key]
+                label = period_keys(stored_date(date))[index]
+                bucket = groups.setdefault(label, [0.0, 0, 0])
+                bucket[0] += units
+                bucket[1] += cents
+                bucket[2] += 1
+        return [(label,) + tuple(groups[label]) for label in sorted(groups)]
+
+    def top_products(self, limit=10, by="receita", start=None, end=None):
+        """[(nome, unidades, centavos)] dos produtos mais vendidos."""
+        if start is None and end is None:
+            products = self.products
+        else:
+            products = {}
+            for key in self.between(start, end):
+                _, product, _, units, cents = self.sales[key]
+                if product:
+                    bucket = products.setdefault(product, [0.0, 0, 0])
+                    bucket[0] += units
+                    bucket[1] += cents
+        column = 0 if by == "unidades" else 1
+        best = heapq.nlargest(limit, products.items(), key=lambda item: item[1][column])
+        return [(self.names.get(product, product), values[0], values[1]) for product, values in best]
+
+    def by_category(self, categories):
+        """[(categoria, centavos)] a partir de {produto normalizado: categoria}.
+
+        Soma os acumuladores por produto, então o custo é o número de produtos
+        distintos, não o de vendas; produtos sem categoria ficam em "Sem categoria".
+        """
+        totals = {}
+        for product, values in self.products.items():
+            category = categories.get(product) or "Sem categoria"
+            totals[category] = totals.get(category, 0) + values[1]
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def margins(self, catalog, limit=10):
+        """[(nome, margem em centavos)]: receita menos unidades x preço do cadastro.
+
+        Só entram produtos encontrados no catálogo; o total vem em margin_total().
+        """
+        margins = []
+        for product, (units, cents, _) in self.products.items():
+            entry = catalog.get(product)
+            if entry:
+                margins.append((self.names.get(product, product), cents - int(round(units * entry[2]))))
+        return heapq.nlargest(limit, margins, key=lambda item: item[1])
+
+    def margin_total(self, catalog):
+        total = 0
+        for product, (units, cents, _) in self.products.items():
+            entry = catalog.get(product)
+            if entry:
+                total += cents - int(round(units * entry[2]))
+        return total
+
+    def turnover(self, catalog, limit=10):
+        """(giro geral, [(nome, giro)]): unidades vendidas / estoque atual."""
+        sold = stock = 0.0
+        rates = []
+        for product, (units, _, _) in self.products.items():
+            entry = catalog.get(product)
+            if entry and entry[3] > 0:
+                sold += units
+                stock += entry[3]
+                rates.append((self.names.get(product, product), units / entry[3]))
+        overall = sold / stock if stock else 0.0
+        return overall, heapq.nlargest(limit, rates, key=lambda item: item[1])
+
+    def total(self):
+        """(unidades, centavos, vendas) de todas as vendas."""
+        return tuple(self.totals)
+
+
+def first(keys):
+    """Primeira chave de um conjunto ordenado (dict), ou None."""
+    return next(iter(keys), None) if keys else None
+
+
+class ProductCatalog:
+    """Categoria, preço e estoque de cada produto, pelo nome normalizado e pelo código.
+
+    Atualizado linha a linha (chave estável da grade de produtos), para que
+    margem, giro e baixa de estoque sejam calculados sem varrer a grade.
+    Com nomes ou códigos repetidos vale a primeira linha cadastrada.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.rows = {}       # chave da linha -> (produto, categoria, centavos, estoque, código)
+        # dict como conjunto ordenado: a primeira chave é a linha que representa o produto
+        self.products = {}   # produto normalizado -> {chave da linha: None}
+        self.codes = {}      # código -> {chave da linha: None}
+
+    def update(self, key, record):
+        product = normalize_text(record.get("mercadorias"))
+        code = str(record.get("codigo") or "").strip().upper()
+        old = self.rows.get(key)
+        if old and (old[0], old[4]) != (product, code):
+            self.remove(key)
+        if not product:
+            self.rows.pop(key, None)
+            return
+        self.rows[key] = (
+            product,
+            str(record.get("categoria") or "").strip(),
+            to_cents(str(record.get("preco") or "")) or 0,
+            to_units(record.get("estoque")),
+            code,
+        )
+        self.products.setdefault(product, {})[key] = None
+        if code:
+            self.codes.setdefault(code, {})[key] = None
+
+    def remove(self, key):
+        entry = self.rows.pop(key, None)
+        if not entry:
+            return
+        # Outra linha com o mesmo nome/código passa a representar o produto
+        for mapping, value in ((self.products, entry[0]), (self.codes, entry[4])):
+            keys = mapping.get(value)
+            if keys is None:
+                continue
+            keys.pop(key, None)
+            if not keys:
+                del mapping[value]
+
+    def get(self, product):
+        key = first(self.products.get(product))
+        return self.rows[key] if key is not None else None
+
+    def find(self, text):
+        """Chave da linha do produto pelo nome ou, se não houver, pelo código."""
+        key = first(self.products.get(normalize_text(text)))
+        if key is None:
+            key = self.find_code(text)
+        return key
+
+    def find_code(self, code):
+        """Chave da linha do produto com o código exato, ou None."""
+        return first(self.codes.get(str(code or "").strip().upper()))
+
+    def categories(self):
+        return {product: self.rows[first(keys)][1] for product, keys in self.products.items()}
@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import deque
+
+import speech_recognition as sr
+
+import tasks
+import voice_metrics
+
+# Silêncio que encerra uma fala (o padrão do sr é 0.8 s)
+PAUSE_THRESHOLD = 0.6
+PHRASE_TIME_LIMIT = 10
+# Intervalo em que a captura confere pedidos novos enquanto escuta
+LISTEN_TIMEOUT = 1
+CALIBRATION_SECONDS = 0.5
+# Recalibra o ruído ambiente (só enquanto ninguém está falando) a cada 5 minutos
+RECALIBRATE_INTERVAL = 300
+# Fecha o microfone depois de 10 minutos sem uso; o próximo pedido reabre
+IDLE_CLOSE = 600
+
+
+class CaptureRequest:
+    def __init__(self, timeout, phrase_time_limit, cancelled):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.phrase_time_limit = phrase_time_limit
+        self.cancelled = cancelled or (lambda: False)
+        self.event = threading.Event()
+        self.audio = None
+        self.error = None
+
+    def finish(self, audio=None, error=None):
+        self.audio = audio
+        self.error = error
+        self.event.set()
+
+
+class AudioCaptureService:
+    """Microfone e Recognizer de longa duração, abertos no primeiro uso.
+
+    Uma única tarefa (lane "captura" de tasks.py) mantém o dispositivo aberto
+    e o limiar de ruído calibrado (a calibração fica em cache e é refeita
+    periodicamente enquanto ninguém fala). capture() devolve a próxima fala para quem pediu (VoiceWorker) e
+    os ouvintes de add_listener() recebem todas as falas (modo contínuo), de
+    modo que clicar em "Falar Agora" já começa a escutar.
+    """
+
+    def __init__(self, recalibrate_interval=RECALIBRATE_INTERVAL, idle_close=IDLE_CLOSE):
+        self.recalibrate_interval = recalibrate_interval
+        self.idle_close = idle_close
+        self.recognizer = sr.Recognizer()
+        self.recognizer.pause_threshold = PAUSE_THRESHOLD
+        # Limiar fixo entre calibrações: o ruído do balcão não fica subindo o corte
+        self.recognizer.dynamic_energy_threshold = False
+        self.lock = threading.Lock()
+        self.requests = deque()
+        self.listeners = []   # [(on_audio, on_error)]
+        self.task = None
+        self.calibrated_at = None
+        self.calibrated_event = threading.Event()
+        self.last_used = time.monotonic()
+
+    # --- API ---
+    def warm_up(self):
+        """Abre o microfone e calibra em segundo plano, antes do primeiro pedido."""
+        with self.lock:
+            self.last_used = time.monotonic()
+            self.ensure_started()
+
+    def capture(self, timeout=5, phrase_time_limit=PHRASE_TIME_LIMIT, cancelled=None):
+        """Bloqueia até a próxima fala e devolve o AudioData.
+
+        Levanta sr.WaitTimeoutError se ninguém falar em 'timeout' segundos.
+        """
+        request = CaptureRequest(timeout, phrase_time_limit, cancelled)
+        with self.lock:
+            self.last_used = time.monotonic()
+            self.requests.append(request)
+            self.ensure_started()
+        request.event.wait()
+        if request.error:
+            raise request.error
+        return request.audio
+
+    def add_listener(self, on_audio, on_error=None):
+        with self.lock:
+            self.listeners.append((on_audio, on_error))
+            self.ensure_started()
+
+    def remove_listener(self, on_audio):
+        with self.lock:
+            self.listeners = [entry for entry in self.listeners if entry[0] != on_audio]
+            self.last_used = time.monotonic()
+
+    @property
+    def calibrated(self):
+        return self.calibrated_event.is_set()
+
+    # --- Thread de captura ---
+    def ensure_started(self):
+        # Chamado com o lock. Lane própria: o microfone aberto não ocupa um worker do pool geral
+        if self.task is None:
+            self.task = tasks.submit(self.run, priority=tasks.HIGH, key="captura", lane="captura")
+
+    def has_demand(self):
+        with self.lock:
+            while self.requests and self.requests[0].cancelled():
+                self.requests.popleft().finish(error=sr.WaitTimeoutError("Cancelado"))
+            return bool(self.requests or self.listeners)
+
+    def calibration_stale(self):
+        return (self.calibrated_at is None or
+                time.monotonic() - self.calibrated_at > self.recalibrate_interval)
+
+    def calibrate(self, source):
+        with voice_metrics.span("calibracao"):
+            self.recognizer.adjust_for_ambient_noise(source, duration=CALIBRATION_SECONDS)
+        self.calibrated_at = time.monotonic()
+        self.calibrated_event.set()
+
+    def run(self):
+        try:
+            opening = time.perf_counter()
+            with sr.Microphone() as source:
+                voice_metrics.record("microfone", time.perf_counter() - opening)
+                while True:
+                    if self.has_demand():
+                        if self.calibrated_at is None:
+                            self.calibrate(source)
+                        self.listen(source)
+                    elif time.monotonic() - self.last_used > self.idle_close:
+                        break
+                    elif self.calibration_stale():
+                        self.calibrate(source)
+                    else:
+                        # Ocioso: consome o buffer para a próxima fala não começar com áudio velho
+                        source.stream.read(source.CHUNK)
+        except Exception as e:
+            self.fail(e)
+        finally:
+            with self.lock:
+                self.task = None
+                # Um pedido chegou enquanto o microfone fechava: reabre
+                if self.requests or self.listeners:
+                    self.ensure_started()
+
+    def listen(self, source):
+        with self.lock:
+            request = self.requests[0] if self.requests else None
+        limit = request.phrase_time_limit if request else PHRASE_TIME_LIMIT
+        start = time.perf_counter()
+        try:
+            audio = self.recognizer.listen(source, timeout=LISTEN_TIMEOUT, phrase_time_limit=limit)
+        except sr.WaitTimeoutError:
+            self.expire()
+            return
+        # Só as escutas que trouxeram fala: as voltas vazias de LISTEN_TIMEOUT não contam
+        voice_metrics.record("escuta", time.perf_counter() - start)
+        with self.lock:
+            self.last_used = time.monotonic()
+            if self.requests:
+                self.requests.popleft().finish(audio)
+                return
+            listeners = list(self.listeners)
+        for on_audio, _ in listeners:
+            on_audio(audio)
+
+    def expire(self):
+        now = time.monotonic()
+        with self.lock:
+            for request in list(self.requests):
+                if request.deadline is not None and now >= request.deadline:
+                    self.requests.remove(request)
+                    request.finish(error=sr.WaitTimeoutError("Nenhuma fala detectada"))
+
+    def fail(self, error):
+        with self.lock:
+            requests, self.requests = list(self.requests), deque()
+            listeners, self.listeners = list(self.listeners), []
+        for request in requests:
+            request.finish(error=error)
+        for _, on_error in listeners:
+            if on_error:
+                on_error(error)
+
+
+service = None
+service_lock = threading.Lock()
+
+
+def get_capture_service():
+    """Serviço de captura compartilhado, criado no primeiro uso."""
+    global service
+    with service_lock:
+        if service is None:
+            service = AudioCaptureService()
+        return service
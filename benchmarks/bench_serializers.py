@@ -0,0 +1,93 @@
+"""Compara load/save do armazenamento local em cada formato.
+
+Uso: python benchmarks/bench_serializers.py [linhas]
+
+A referência ("legado") é o formato antigo: json stdlib com indent=4.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import serializers
+
+
+def make_catalogue(rows):
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "data": "2026-10-19",
+            "mercadorias": f"Produto {i} feijão carioca",
+            "categoria": "Grãos",
+            "descricao": "Pacote 1kg, safra nova",
+            "codigo": f"789{i:010d}",
+            "preco": f"{i % 100 + 0.99:.2f}",
+            "estoque": str(i % 500),
+            "estoque_meta": {"min": 5, "max": 200},
+            "quantidade": "0",
+        }
+        for i in range(rows)
+    ]
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(data, path):
+    results = []
+
+    def legacy_save():
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+
+    def legacy_load():
+        with open(path, "r", encoding="utf-8") as f:
+            json.load(f)
+
+    save = best_of(legacy_save)
+    load = best_of(legacy_load)
+    results.append(("legado (json indent=4)", save, load, os.path.getsize(path)))
+
+    for name in serializers.SERIALIZERS:
+        try:
+            serializers.dumps(data[:1], name)
+        except ValueError as e:
+            print(f"{name}: ignorado ({e})")
+            continue
+
+        def save_fmt():
+            with open(path, "wb") as f:
+                f.write(serializers.dumps(data, name))
+
+        save = best_of(save_fmt)
+        load = best_of(lambda: serializers.load_file(path))
+        results.append((name, save, load, os.path.getsize(path)))
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    data = make_catalogue(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = bench(data, os.path.join(tmp, "products.bin"))
+
+    base_save, base_load = results[0][1], results[0][2]
+    print(f"{rows} linhas (orjson: {'sim' if serializers.orjson else 'não'}, "
+          f"msgpack: {'sim' if serializers.msgpack else 'não'})")
+    print(f"{'formato':<24}{'save ms':>10}{'load ms':>10}{'KB':>10}{'save x':>9}{'load x':>9}")
+    for name, save, load, size in results:
+        print(f"{name:<24}{save * 1000:>10.1f}{load * 1000:>10.1f}{size / 1024:>10.0f}"
+              f"{base_save / save:>9.1f}{base_load / load:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compara o parser de voz compilado (voice_parser) com o parse_text antigo.
+
+Uso: python benchmarks/bench_voice_parser.py [repetições]
+
+Confere cada frase de voice_corpus.json contra os itens esperados e mede o
+tempo por frase. A referência ("legado") é o algoritmo antigo: ordena as
+palavras-chave e faz um text.find por palavra a cada chamada, só com a
+primeira ocorrência de cada campo e sem limites de palavra. A última linha
+mede parse_items, que repete as frases já vistas pelo cache.
+"""
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import voice_normalize
+import voice_parser
+
+CORPUS = os.path.join(HERE, "voice_corpus.json")
+
+
+def legacy_parse(text):
+    text = text.lower()
+    data = {}
+    sorted_keys = sorted(voice_parser.KEYWORDS.keys(), key=len, reverse=True)
+    found_indices = []
+    for k in sorted_keys:
+        idx = text.find(k)
+        if idx != -1:
+            found_indices.append((idx, k, voice_parser.KEYWORDS[k]))
+    found_indices.sort()
+    for i, (idx, k, field) in enumerate(found_indices):
+        start = idx + len(k)
+        end = found_indices[i + 1][0] if i + 1 < len(found_indices) else len(text)
+        value = text[start:end].strip()
+        for prep in ["de ", "da ", "do ", "é ", ": "]:
+            if value.startswith(prep):
+                value = value[len(prep):]
+        data[field] = value.strip()
+    return [data] if data else []
+
+
+def check(parse, corpus):
+    """Frases cujos itens não batem com o esperado.
+
+    Entradas com "normalized" conferem também os valores depois de
+    voice_normalize (preço em reais, milhar, quantidade).
+    """
+    failures = []
+    for entry in corpus:
+        items = parse(entry["text"])
+        if items != entry["items"] or ("normalized" in entry and [
+                voice_normalize.normalize_item(item) for item in items] != entry["normalized"]):
+            failures.append(entry["text"])
+    return failures
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    texts = [entry["text"] for entry in corpus] * rounds
+
+    def run(parse):
+        for text in texts:
+            parse(text)
+
+    results = []
+    for name, parse in (("legado (find por palavra)", legacy_parse),
+                        ("voice_parser (regex única)", voice_parser.parse_uncached),
+                        ("voice_parser (com cache)", voice_parser.parse_items)):
+        elapsed = best_of(lambda: run(parse))
+        results.append((name, elapsed, check(parse, corpus)))
+
+    print(f"{len(corpus)} frases x {rounds} repetições")
+    print(f"{'parser':<30}{'us/frase':>10}{'acertos':>10}{'x':>7}")
+    base = results[0][1]
+    for name, elapsed, failures in results:
+        print(f"{name:<30}{elapsed / len(texts) * 1e6:>10.1f}"
+              f"{len(corpus) - len(failures):>6}/{len(corpus):<3}{base / elapsed:>7.1f}")
+
+    failures = list(dict.fromkeys(results[1][2] + results[2][2]))
+    for text in failures:
+        print(f"FALHOU: {text!r} -> {voice_parser.parse_items(text)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Gera os WAVs de voice_replay/manifest.json com o espeak-ng (voz pt-br).
+
+Uso: python benchmarks/synthesize_replay.py [--pasta DIR] [--velocidade 150]
+                                            [--todos]
+
+Sem gravações reais, a fala sintetizada dá ao voice_replay.py um corpus
+fixo e reproduzível: o mesmo texto gera sempre o mesmo áudio. Os arquivos
+saem em 16 kHz, mono, 16 bits (o formato do microfone). Por padrão só os
+WAVs que faltam são gerados; --todos refaz o corpus inteiro (troca de voz
+ou de velocidade pede uma nova referência com voice_replay.py --salvar-base).
+
+Precisa da biblioteca libespeak-ng: a do sistema ou a do pacote
+espeakng-loader (pip install espeakng-loader).
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import speech_recognition as sr
+
+try:
+    import espeakng_loader
+except ImportError:
+    espeakng_loader = None
+
+import recognizers
+
+DEFAULT_DIR = os.path.join(HERE, "voice_replay")
+MANIFEST = "manifest.json"
+VOICE = "pt-br"
+
+# Constantes de speak_lib.h
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+ESPEAK_RATE = 1
+ESPEAK_CHARS_UTF8 = 1
+
+SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+
+
+class Espeak:
+    """Síntese em memória pela API C do espeak-ng (sem tocar no alto-falante)."""
+
+    def __init__(self, voice=VOICE, rate=150):
+        if espeakng_loader is not None:
+            library, data = espeakng_loader.get_library_path(), espeakng_loader.get_data_path()
+        else:
+            library, data = ctypes.util.find_library("espeak-ng"), None
+        if not library:
+            raise RuntimeError("libespeak-ng não encontrada; instale o espeak-ng ou 'pip install espeakng-loader'.")
+        self.lib = ctypes.CDLL(library)
+        self.lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        self.lib.espeak_Synth.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int, ctypes.c_uint,
+            ctypes.c_uint, ctypes.c_void_p, ctypes.c_void_p,
+        ]
+        self.sample_rate = self.lib.espeak_Initialize(
+            AUDIO_OUTPUT_SYNCHRONOUS, 0, data.encode() if data else None, 0
+        )
+        if self.sample_rate <= 0:
+            raise RuntimeError(f"Erro ao iniciar o espeak-ng (dados em {data or 'padrão'}).")
+        if self.lib.espeak_SetVoiceByName(voice.encode()) != 0:
+            raise RuntimeError(f"Voz '{voice}' não encontrada no espeak-ng.")
+        self.lib.espeak_SetParameter(ESPEAK_RATE, rate, 0)
+        self.chunks = []
+        # Referência guardada: o ctypes não pode coletar o callback enquanto a biblioteca o usa
+        self.callback = SYNTH_CALLBACK(self.collect)
+        self.lib.espeak_SetSynthCallback(self.callback)
+
+    def collect(self, wav, count, events):
+        if count > 0:
+            self.chunks.append(ctypes.string_at(wav, count * 2))
+        return 0
+
+    def synthesize(self, text):
+        """AudioData em 16 kHz mono com 'text' falado."""
+        self.chunks = []
+        data = text.encode("utf-8") + b"\0"
+        self.lib.espeak_Synth(data, len(data), 0, 0, 0, ESPEAK_CHARS_UTF8, None, None)
+        self.lib.espeak_Synchronize()
+        audio = sr.AudioData(b"".join(self.chunks), self.sample_rate, 2)
+        return sr.AudioData(audio.get_raw_data(convert_rate=recognizers.SAMPLE_RATE, convert_width=2),
+                            recognizers.SAMPLE_RATE, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os WAVs do manifesto com o espeak-ng.")
+    parser.add_argument("--pasta", default=DEFAULT_DIR, help="Pasta com manifest.json e os WAVs.")
+    parser.add_argument("--velocidade", type=int, default=150, help="Palavras por minuto.")
+    parser.add_argument("--todos", action="store_true", help="Refaz também os WAVs que já existem.")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.pasta, MANIFEST), "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    try:
+        engine = Espeak(rate=args.velocidade)
+    except (OSError, RuntimeError) as e:
+        print(f"Erro: {e}")
+        return 2
+
+    created = 0
+    for entry in entries:
+        path = os.path.join(args.pasta, entry["audio"])
+        if os.path.isfile(path) and not args.todos:
+            continue
+        audio = engine.synthesize(entry["text"])
+        with open(path, "wb") as f:
+            f.write(audio.get_wav_data())
+        created += 1
+        print(f"{entry['audio']}: {len(audio.frame_data) / (2 * audio.sample_rate):.1f} s")
+    print(f"{created} WAVs gerados em {args.pasta}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""Reproduz falas gravadas pelo caminho de voz, sem microfone.
+
+Uso: python benchmarks/voice_replay.py [--backend vosk] [--pasta DIR]
+                                       [--salvar-base] [--detalhes]
+                                       [--so-parser]
+
+Cada entrada de voice_replay/manifest.json traz o WAV (16 kHz, mono, PCM),
+o texto falado e os itens esperados, já normalizados como saem de
+VoiceWorker.parse_items(). Os WAVs versionados são sintetizados pelo
+espeak-ng (synthesize_replay.py). O WAV passa por VoiceWorker.recognize()
+com um reconhecedor local (sem cair para o Google) e a acurácia é medida
+por campo, junto com o erro de palavras e o fator de tempo real. O texto de
+referência também passa só pelo parser, de modo que um erro de
+reconhecimento não se confunde com um erro de interpretação.
+
+Sem o modelo ou sem algum WAV do manifesto o script sai com 2: um
+resultado só do parser não pode passar por medição completa. --so-parser
+mede só o parser, de propósito.
+
+Com --salvar-base os números viram a referência (voice_replay/baseline.json).
+Sem essa opção, uma queda de acurácia acima de --tolerancia ou um erro de
+palavras maior que o da referência além da mesma tolerância conta como
+regressão, e o script sai com 1. Tempo depende da máquina e da carga do
+momento: um parser ou reconhecimento mais de --lentidao vezes mais lento
+só gera um AVISO, sem mudar o código de saída.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import speech_recognition as sr
+
+import recognizers
+import voice_normalize
+import voice_parser
+from main import VoiceWorker
+
+DEFAULT_DIR = os.path.join(HERE, "voice_replay")
+MANIFEST = "manifest.json"
+BASELINE = "baseline.json"
+# Passadas do parser pelo corpus; vale a mediana (uma passada ruim não pesa)
+PARSER_REPEAT = 30
+
+
+def fold(value):
+    return " ".join(voice_normalize.fold(str(value or "").lower()).split())
+
+
+def compare(expected, got):
+    """(campos certos, campos avaliados, {campo: [certos, total]}).
+
+    Os itens são comparados pela posição; um campo esperado que falta, um
+    valor diferente ou um campo a mais (inclusive de um item a mais) conta
+    como erro.
+    """
+    correct = total = 0
+    fields = {}
+    for index in range(max(len(expected), len(got))):
+        want = expected[index] if index < len(expected) else {}
+        have = got[index] if index < len(got) else {}
+        for field in list(want) + [field for field in have if field not in want]:
+            ok = field in want and field in have and fold(want[field]) == fold(have[field])
+            stats = fields.setdefault(field, [0, 0])
+            stats[0] += ok
+            stats[1] += 1
+            correct += ok
+            total += 1
+    return correct, total, fields
+
+
+def word_errors(reference, hypothesis):
+    """(palavras erradas, palavras da referência) pela distância de edição."""
+    ref = fold(reference).split()
+    hyp = fold(hypothesis).split()
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i]
+        for j, other in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_audio(path):
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    return audio, len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+
+class Score:
+    def __init__(self):
+        self.correct = 0
+        self.total = 0
+        self.fields = {}
+        self.failures = []
+
+    def add(self, entry, got, text=None):
+        correct, total, fields = compare(entry["items"], got)
+        self.correct += correct
+        self.total += total
+        for field, (ok, count) in fields.items():
+            stats = self.fields.setdefault(field, [0, 0])
+            stats[0] += ok
+            stats[1] += count
+        if correct < total:
+            self.failures.append((entry, text, got))
+
+    @property
+    def accuracy(self):
+        return self.correct / self.total if self.total else 0.0
+
+
+def replay_parser(entries, worker):
+    """(acurácia de parse_items por tipo de fala, segundos da passada mediana)."""
+    scores = {}
+    for entry in entries:
+        scores.setdefault(entry["kind"], Score()).add(entry, worker.parse_items(entry["text"]), entry["text"])
+    timings = []
+    for _ in range(PARSER_REPEAT):
+        # Sem cache: cada passada interpreta as falas de verdade
+        voice_parser.parse_cached.cache_clear()
+        start = time.perf_counter()
+        for entry in entries:
+            worker.parse_items(entry["text"])
+        timings.append(time.perf_counter() - start)
+    return scores, statistics.median(timings)
+
+
+def missing_audio(entries, folder):
+    return [entry["audio"] for entry in entries if not os.path.isfile(os.path.join(folder, entry["audio"]))]
+
+
+def replay_audio(entries, folder, worker):
+    """Reconhece os WAVs do manifesto; devolve (pontuações, estatísticas)."""
+    voice_parser.parse_cached.cache_clear()
+    scores = {}
+    stats = {"falas": 0, "audio": 0.0, "processamento": 0.0, "palavras": 0, "erros": 0, "nao_entendidas": 0}
+    for entry in entries:
+        audio, seconds = load_audio(os.path.join(folder, entry["audio"]))
+        start = time.perf_counter()
+        try:
+            items, text, _, _ = worker.recognize(audio)
+        except sr.UnknownValueError:
+            items, text = [], ""
+            stats["nao_entendidas"] += 1
+        stats["processamento"] += time.perf_counter() - start
+        stats["audio"] += seconds
+        stats["falas"] += 1
+        errors, words = word_errors(entry["text"], text)
+        stats["erros"] += errors
+        stats["palavras"] += words
+        scores.setdefault(entry["kind"], Score()).add(entry, items, text)
+    return scores, stats
+
+
+def overall(scores):
+    correct = sum(score.correct for score in scores.values())
+    total = sum(score.total for score in scores.values())
+    return correct / total if total else 0.0
+
+
+def print_scores(title, scores, details):
+    print(title)
+    for kind, score in sorted(scores.items()):
+        print(f"  {kind:<10}{score.correct:>5}/{score.total:<5}{score.accuracy:>8.1%}")
+    fields = {}
+    for score in scores.values():
+        for field, (ok, count) in score.fields.items():
+            stats = fields.setdefault(field, [0, 0])
+            stats[0] += ok
+            stats[1] += count
+    print("  por campo: " + ", ".join(f"{field} {ok}/{count}" for field, (ok, count) in fields.items()))
+    if details:
+        for score in scores.values():
+            for entry, text, got in score.failures:
+                print(f"  FALHOU {entry['audio']}: {text!r}\n    esperado {entry['items']}\n    obtido   {got}")
+
+
+def find_regressions(results, baseline, tolerance):
+    """Quedas de acurácia: reprovam a medição."""
+    regressions = []
+    for key in ("parser", "audio"):
+        if key in results and key in baseline and results[key] < baseline[key] - tolerance:
+            regressions.append(f"acurácia {key}: {results[key]:.1%} (referência {baseline[key]:.1%})")
+    if "wer" in results and "wer" in baseline and results["wer"] > baseline["wer"] + tolerance:
+        regressions.append(f"erro de palavras: {results['wer']:.1%} (referência {baseline['wer']:.1%})")
+    return regressions
+
+
+def find_slowdowns(results, baseline, slowdown):
+    """Lentidões em relação à referência: só avisos, o tempo varia com a máquina."""
+    slowdowns = []
+    if "parser_us" in results and baseline.get("parser_us") and results["parser_us"] > baseline["parser_us"] * slowdown:
+        slowdowns.append(f"parser: {results['parser_us']:.0f} us/fala (referência {baseline['parser_us']:.0f})")
+    if "rtf" in results and baseline.get("rtf") and results["rtf"] > baseline["rtf"] * slowdown:
+        slowdowns.append(f"fator de tempo real: {results['rtf']:.3f} (referência {baseline['rtf']:.3f})")
+    return slowdowns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduz falas gravadas pelo caminho de voz.")
+    parser.add_argument("--backend", default="vosk", help="Reconhecedor local (vosk ou whisper).")
+    parser.add_argument("--pasta", default=DEFAULT_DIR, help="Pasta com manifest.json e os WAVs.")
+    parser.add_argument("--salvar-base", action="store_true", help="Grava os resultados como referência.")
+    parser.add_argument("--tolerancia", type=float, default=0.02, help="Queda de acurácia aceita (fração).")
+    parser.add_argument("--lentidao", type=float, default=1.25, help="Quantas vezes mais lento antes de avisar.")
+    parser.add_argument("--detalhes", action="store_true", help="Mostra as falas com campos errados.")
+    parser.add_argument("--so-parser", "--parser-only", action="store_true",
+                        help="Mede só o parser, sem exigir os WAVs nem o modelo.")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.pasta, MANIFEST), "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    engine = recognizers.get_backend(args.backend)
+    if not engine.offline:
+        parser.error(f"{engine.label} não é um reconhecedor local; use vosk ou whisper.")
+    worker = VoiceWorker(args.backend, fallback=False)
+    results = {}
+
+    scores, elapsed = replay_parser(entries, worker)
+    results["parser"] = overall(scores)
+    results["parser_us"] = round(elapsed / len(entries) * 1e6, 1)
+    print(f"{len(entries)} falas; parser em {results['parser_us']:.0f} us/fala")
+    print_scores("Parser (texto de referência):", scores, args.detalhes)
+
+    if not args.so_parser:
+        missing = missing_audio(entries, args.pasta)
+        if missing:
+            print(f"Erro: {len(missing)} WAVs do manifesto faltam em {args.pasta} "
+                  f"({', '.join(missing[:3])}...); gere com synthesize_replay.py ou use --so-parser.")
+            return 2
+        try:
+            start = time.perf_counter()
+            engine.load()
+        except recognizers.BackendUnavailable as e:
+            print(f"Erro: {e} Use --so-parser para medir só o parser.")
+            return 2
+        print(f"Modelo {engine.label} carregado em {time.perf_counter() - start:.1f} s")
+        scores, stats = replay_audio(entries, args.pasta, worker)
+        results["audio"] = overall(scores)
+        results["rtf"] = stats["processamento"] / stats["audio"] if stats["audio"] else 0.0
+        results["wer"] = stats["erros"] / stats["palavras"] if stats["palavras"] else 0.0
+        print(f"Áudio: {stats['falas']} falas, {stats['audio']:.1f} s gravados, "
+              f"{stats['processamento']:.1f} s de processamento "
+              f"(tempo real x{results['rtf']:.2f}, {stats['falas'] / stats['processamento']:.1f} falas/s)")
+        print(f"  erro de palavras {results['wer']:.1%}; não entendidas {stats['nao_entendidas']}")
+        print_scores(f"Reconhecimento + parser ({engine.label}):", scores, args.detalhes)
+
+    baseline_path = os.path.join(args.pasta, BASELINE)
+    baseline = {}
+    if os.path.isfile(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    if args.salvar_base:
+        if args.so_parser:
+            # Só o parser foi medido: a referência do áudio continua a anterior
+            results = {**baseline, **results}
+        else:
+            results["backend"] = args.backend
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Referência gravada em {baseline_path}")
+        return 0
+    if not baseline:
+        print(f"Sem referência em {baseline_path}; grave com --salvar-base.")
+        return 2
+    if baseline.get("backend") != args.backend:
+        # Outro reconhecedor: só a parte do parser é comparável
+        baseline = {key: baseline[key] for key in ("parser", "parser_us") if key in baseline}
+    for slowdown in find_slowdowns(results, baseline, args.lentidao):
+        print(f"AVISO: {slowdown}")
+    regressions = find_regressions(results, baseline, args.tolerancia)
+    for regression in regressions:
+        print(f"REGRESSÃO: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
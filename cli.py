@@ -0,0 +1,282 @@
+"""Búlgaree sem interface gráfica: sincronização, importação, exportação e manutenção.
+
+Não importa PyQt5, para rodar em tarefas agendadas (ex.: backup noturno).
+
+Exemplos:
+    python cli.py export produtos produtos.xlsx
+    python cli.py import produtos fornecedor.csv --email eu@exemplo.com
+    python cli.py sync --email eu@exemplo.com      (senha em BULGAREE_PASSWORD)
+    python cli.py sync                             (usa a sessão salva pelo app)
+    python cli.py backup && python cli.py check
+    python cli.py codigo 7891000100103
+"""
+import argparse
+import getpass
+import os
+import sys
+
+import serializers
+from database import DatabaseManager
+from serializers import iter_file
+from storage import atomic_write
+from exporter import TABLES
+
+# Exit codes
+OK = 0
+FAILED = 1
+
+
+def login(db, args):
+    """Faz login se um email foi informado; sem email usa a sessão salva pelo app.
+
+    Retorna False em caso de falha.
+    """
+    if not args.email:
+        if not db.has_session():
+            return True
+        success, msg = db.restore_session()
+        print(msg)
+        return success
+    password = os.environ.get("BULGAREE_PASSWORD") or getpass.getpass("Senha: ")
+    success, msg = db.login(args.email, password)
+    print(msg)
+    return success
+
+
+def cmd_sync(db, args):
+    if not args.email and not db.has_session():
+        print("Informe --email para sincronizar.")
+        return FAILED
+    if not login(db, args):
+        return FAILED
+
+    status = OK
+    for table_name in args.tables or TABLES:
+        filename = TABLES[table_name][0]
+        if args.pull:
+            data = db.load_from_supabase(table_name)
+            if data is None:
+                print(f"{table_name}: erro ao baixar da nuvem.")
+                status = FAILED
+                continue
+            db.save_local(data, filename)
+            print(f"{table_name}: {len(data)} registros baixados.")
+        else:
+            data = db.load_local(filename)
+            success, msg = db.sync_to_supabase(data, table_name)
+            print(f"{table_name}: {msg}")
+            if not success:
+                status = FAILED
+    return status
+
+
+def cmd_import(db, args):
+    import importer
+
+    try:
+        records, errors = importer.read_file(args.file, args.table)
+    except Exception as e:
+        print(f"Erro ao importar: {e}")
+        return FAILED
+
+    for line, err in errors:
+        print(f"Linha {line}: {err}")
+
+    filename = TABLES[args.table][0]
+    data = db.load_local(filename)
+    data.extend(records)
+    if not db.save_local(data, filename):
+        return FAILED
+    print(f"{len(records)} registros importados, {len(errors)} linhas ignoradas.")
+
+    if args.email and records:
+        if not login(db, args):
+            return FAILED
+        success, msg = db.sync_to_supabase(records, args.table)
+        print(msg)
+        if not success:
+            return FAILED
+    return OK
+
+
+def cmd_export(db, args):
+    import exporter
+
+    def progress(percent):
+        if not args.quiet:
+            print(f"\r{percent}%", end="", flush=True)
+
+    try:
+        total = exporter.export_table(args.table, args.file, progress=progress)
+    except Exception as e:
+        print(f"\nErro ao exportar: {e}")
+        return FAILED
+    print(f"\n{total} registros exportados para {args.file}")
+    return OK
+
+
+def cmd_compact(db, args):
+    status = OK
+    for table_name in args.tables or TABLES:
+        filename = TABLES[table_name][0]
+        if not os.path.exists(filename):
+            continue
+        before = os.path.getsize(filename)
+        try:
+            data = serializers.load_file(filename)
+        except Exception as e:
+            print(f"{table_name}: {e}")
+            status = FAILED
+            continue
+        fmt = args.format or db.format_for(filename)
+        atomic_write(filename, serializers.dumps(data, fmt))
+        after = os.path.getsize(filename)
+        print(f"{table_name}: {before} -> {after} bytes ({fmt})")
+    return status
+
+
+def cmd_backup(db, args):
+    for table_name in args.tables or TABLES:
+        filename = TABLES[table_name][0]
+        path = db.backup_local(filename)
+        if path:
+            print(f"{table_name}: {os.path.getsize(filename)} -> {os.path.getsize(path)} bytes em {path}")
+        else:
+            print(f"{table_name}: {filename} não existe.")
+    return OK
+
+
+def cmd_restore(db, args):
+    filename = TABLES[args.table][0]
+    if args.list:
+        for path in db.backups.list_backups(filename):
+            print(path)
+        return OK
+    restored = db.restore_backup(filename, args.file)
+    if not restored:
+        print(f"{args.table}: nenhum backup válido encontrado.")
+        return FAILED
+    print(f"{args.table}: restaurado de {restored}")
+    return OK
+
+
+def cmd_check(db, args):
+    """Verifica se os arquivos locais são legíveis e sem IDs duplicados."""
+    status = OK
+    for table_name in args.tables or TABLES:
+        filename, keys = TABLES[table_name]
+        if not os.path.exists(filename):
+            print(f"{table_name}: {filename} não existe.")
+            continue
+        count = 0
+        problems = []
+        ids = set()
+        try:
+            for record in iter_file(filename):
+                count += 1
+                if not isinstance(record, dict):
+                    problems.append(f"registro {count} não é um objeto")
+                    continue
+                record_id = record.get("id")
+                if record_id:
+                    if record_id in ids:
+                        problems.append(f"id duplicado: {record_id}")
+                    ids.add(record_id)
+                missing = [k for k in keys if k not in record]
+                if missing:
+                    problems.append(f"registro {count} sem campos: {', '.join(missing)}")
+        except ValueError as e:
+            problems.append(str(e))
+
+        print(f"{table_name}: {count} registros, {len(problems)} problemas")
+        for problem in problems[:20]:
+            print(f"  - {problem}")
+        if problems:
+            status = FAILED
+    return status
+
+
+def cmd_code(db, args):
+    """Produto pelo código, pelo índice local (sem carregar products.json)."""
+    product = db.lookup_code(args.codigo)
+    if not product:
+        print(f"Produto com código {args.codigo} não encontrado.")
+        return FAILED
+    print(f"{product['codigo']}: {product['mercadorias']} - R$ {product['preco']:.2f}, estoque {product['estoque']}")
+    return OK
+
+
+def table_arg(value):
+    # nargs="*" com choices rejeita a lista vazia no argparse; valida aqui
+    if value not in TABLES:
+        raise argparse.ArgumentTypeError(f"tabela inválida: '{value}' (use {', '.join(TABLES)})")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bulgaree", description="Búlgaree em linha de comando.")
+    parser.add_argument("--dir", help="Pasta com os dados locais (products.json, sales.json).")
+    parser.add_argument("--email", help="Email da conta (senha em BULGAREE_PASSWORD ou perguntada).")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Não mostrar progresso.")
+    # -q também depois do comando ("export produtos out.csv -q"); SUPPRESS para
+    # não apagar o -q dado antes do comando
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-q", "--quiet", action="store_true", default=argparse.SUPPRESS,
+                        help="Não mostrar progresso.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    tables = list(TABLES)
+
+    p = sub.add_parser("sync", parents=[common], help="Envia os dados locais para a nuvem (ou baixa com --pull).")
+    p.add_argument("--pull", action="store_true", help="Baixa da nuvem e substitui o local.")
+    p.add_argument("tables", nargs="*", type=table_arg, metavar="{produtos,vendas}")
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("import", parents=[common], help="Importa uma planilha CSV/XLSX.")
+    p.add_argument("table", choices=tables)
+    p.add_argument("file")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", parents=[common], help="Exporta para CSV, XLSX ou Parquet.")
+    p.add_argument("table", choices=tables)
+    p.add_argument("file")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("compact", parents=[common], help="Regrava os arquivos locais no formato compacto.")
+    p.add_argument("--format", choices=list(serializers.SERIALIZERS),
+                   help="Converte para este formato (padrão: o do config).")
+    p.add_argument("tables", nargs="*", type=table_arg, metavar="{produtos,vendas}")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("backup", parents=[common], help="Cria backups comprimidos dos arquivos locais.")
+    p.add_argument("tables", nargs="*", type=table_arg, metavar="{produtos,vendas}")
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("restore", parents=[common], help="Restaura o arquivo local do último backup válido.")
+    p.add_argument("table", choices=tables)
+    p.add_argument("file", nargs="?", help="Backup específico (padrão: o mais recente válido).")
+    p.add_argument("--list", action="store_true", help="Apenas lista os backups existentes.")
+    p.set_defaults(func=cmd_restore)
+
+    p = sub.add_parser("check", parents=[common], help="Verifica a integridade dos arquivos locais.")
+    p.add_argument("tables", nargs="*", type=table_arg, metavar="{produtos,vendas}")
+    p.set_defaults(func=cmd_check)
+
+    p = sub.add_parser("codigo", parents=[common], help="Mostra o produto com o código (leitor de código de barras).")
+    p.add_argument("codigo")
+    p.set_defaults(func=cmd_code)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.dir:
+        os.chdir(args.dir)
+    # Sem conexão no início: comandos locais não pagam o import do supabase
+    db = DatabaseManager(connect=False)
+    return args.func(db, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+from PyQt5.QtWidgets import QWidget, QFrame, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QComboBox
+from PyQt5.QtGui import QPainter, QColor, QFont
+from PyQt5.QtCore import Qt, QRectF
+
+PERIOD_CHOICES = [("Por dia", "dia"), ("Por semana", "semana"), ("Por mês", "mes")]
+PERIOD_BARS = 12
+
+
+def money(cents):
+    return f"R$ {cents / 100:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+class BarChart(QWidget):
+    """Gráfico de barras desenhado com QPainter a partir de uma série já calculada.
+
+    set_series() só guarda os pontos; o paintEvent não consulta dados, então
+    redesenhar (trocar de painel, redimensionar) não custa nada além da pintura.
+    """
+
+    def __init__(self, title, color="#FF4500", formatter=str, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.color = QColor(color)
+        self.formatter = formatter
+        self.series = []
+        self.setMinimumHeight(160)
+
+    def set_series(self, series):
+        """series: [(rótulo, valor)]"""
+        if series != self.series:
+            self.series = list(series)
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = QRectF(self.rect()).adjusted(8, 8, -8, -8)
+
+        font = QFont("Segoe UI", 10, QFont.Bold)
+        painter.setFont(font)
+        painter.setPen(QColor("#000080"))
+        painter.drawText(rect, Qt.AlignTop | Qt.AlignLeft, self.title)
+        rect.adjust(0, 22, 0, 0)
+
+        painter.setFont(QFont("Segoe UI", 8))
+        if not self.series:
+            painter.setPen(QColor("#666666"))
+            painter.drawText(rect, Qt.AlignCenter, "Sem dados")
+            return
+
+        top = max(max(value for _, value in self.series), 0) or 1
+        label_height = 16
+        chart_height = rect.height() - 2 * label_height
+        width = rect.width() / len(self.series)
+        for i, (label, value) in enumerate(self.series):
+            x = rect.left() + i * width
+            height = max(value, 0) / top * chart_height
+            bar = QRectF(x + width * 0.15, rect.top() + label_height + chart_height - height, width * 0.7, height)
+            painter.fillRect(bar, self.color)
+            painter.setPen(QColor("#000000"))
+            painter.drawText(QRectF(x, bar.top() - label_height, width, label_height),
+                             Qt.AlignCenter, self.formatter(value))
+            painter.drawText(QRectF(x, rect.bottom() - label_height, width, label_height),
+                             Qt.AlignCenter, str(label)[:14])
+
+
+class DashboardPanel(QFrame):
+    """Painel de indicadores alimentado pelos agregados de SalesAnalytics.
+
+    mark_dirty() é chamado a cada venda/produto alterado; as séries só são
+    recalculadas (a partir dos agregados, sem varrer as grades) quando o painel
+    está visível ou ao ser aberto, e os gráficos desenham as séries em cache.
+    """
+
+    def __init__(self, analytics, catalog, parent=None):
+        super().__init__(parent)
+        self.analytics = analytics
+        self.catalog = catalog
+        self.dirty = True
+        self.setStyleSheet("background-color: #F5F5DC; border-radius: 15px; border: none;")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(15, 15, 15, 15)
+        layout.setSpacing(10)
+
+        header = QHBoxLayout()
+        title = QLabel("Dashboard")
+        title.setStyleSheet("font-family: Segoe UI; font-size: 16px; font-weight: bold; color: #000080;")
+        header.addWidget(title)
+        header.addStretch()
+        self.period_combo = QComboBox()
+        for text, _ in PERIOD_CHOICES:
+            self.period_combo.addItem(text)
+        self.period_combo.setStyleSheet("background-color: white; color: black;")
+        self.period_combo.currentIndexChanged.connect(self.refresh)
+        header.addWidget(self.period_combo)
+        layout.addLayout(header)
+
+        cards = QHBoxLayout()
+        self.kpis = {}
+        for key, text in (("receita", "Receita"), ("vendas", "Vendas"),
+                          ("margem", "Margem"), ("giro", "Giro de estoque")):
+            label = QLabel()
+            label.setAlignment(Qt.AlignCenter)
+            label.setStyleSheet("background-color: white; color: black; border-radius: 8px; padding: 8px; font-family: Segoe UI;")
+            label.setProperty("caption", text)
+            label.setFixedHeight(60)
+            cards.addWidget(label)
+            self.kpis[key] = label
+        layout.addLayout(cards)
+
+        grid = QGridLayout()
+        self.revenue_chart = BarChart("Receita por período", "#FF4500", lambda v: f"{v / 100:.0f}")
+        self.units_chart = BarChart("Unidades por produto", "#4682B4", lambda v: f"{v:g}")
+        self.category_chart = BarChart("Receita por categoria", "#2E8B57", lambda v: f"{v / 100:.0f}")
+        self.margin_chart = BarChart("Margem por produto", "#8A2BE2", lambda v: f"{v / 100:.0f}")
+        grid.addWidget(self.revenue_chart, 0, 0)
+        grid.addWidget(self.units_chart, 0, 1)
+        grid.addWidget(self.category_chart, 1, 0)
+        grid.addWidget(self.margin_chart, 1, 1)
+        layout.addLayout(grid, 1)
+
+    def mark_dirty(self):
+        self.dirty = True
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event):
+        if self.dirty:
+            self.refresh()
+        super().showEvent(event)
+
+    def set_kpi(self, key, value):
+        label = self.kpis[key]
+        label.setText(f"<small>{label.property('caption')}</small><br><b>{value}</b>")
+
+    def refresh(self):
+        analytics, catalog = self.analytics, self.catalog
+        _, revenue, count = analytics.total()
+        turnover, _ = analytics.turnover(catalog)
+        self.set_kpi("receita", money(revenue))
+        self.set_kpi("vendas", str(count))
+        self.set_kpi("margem", money(analytics.margin_total(catalog)))
+        self.set_kpi("giro", f"{turnover:.2f}x")
+
+        period = PERIOD_CHOICES[max(self.period_combo.currentIndex(), 0)][1]
+        periods = analytics.by_period(period)[-PERIOD_BARS:]
+        self.revenue_chart.set_series([(label[5:] if period == "dia" else label, cents)
+                                       for label, _, cents, _ in periods])
+        self.units_chart.set_series([(name, units) for name, units, _ in
+                                     analytics.top_products(8, by="unidades")])
+        self.category_chart.set_series(analytics.by_category(catalog.categories())[:8])
+        self.margin_chart.set_series(analytics.margins(catalog, 8))
+        self.dirty = False
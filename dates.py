@@ -0,0 +1,92 @@
+import datetime
+import re
+
+# Datas relativas faladas ou digitadas
+RELATIVE_DAYS = {
+    "hoje": 0,
+    "ontem": -1,
+    "anteontem": -2,
+    "amanha": 1,
+    "amanhã": 1,
+    "depois de amanha": 2,
+    "depois de amanhã": 2,
+}
+
+# Meses por extenso ("19 de outubro", "dia 5 de março de 2026")
+MONTHS = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4,
+    "maio": 5, "junho": 6, "julho": 7, "agosto": 8, "setembro": 9,
+    "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+MONTH_NAME_RE = re.compile(r"^(?:dia\s+)?(\d{1,2})\s+de\s+([a-zç]+)(?:\s+de\s+(\d{4}))?$")
+
+DATE_PATTERNS = (
+    # 2026-10-19
+    (re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})"), ("y", "m", "d")),
+    # 19/10/2026, 19-10-2026, 19.10.2026, 19/10/26
+    (re.compile(r"^(\d{1,2})[/.\-](\d{1,2})[/.\-](\d{2,4})$"), ("d", "m", "y")),
+    # 19/10 (ano corrente)
+    (re.compile(r"^(\d{1,2})[/.\-](\d{1,2})$"), ("d", "m")),
+)
+
+
+def parse_date(text, today=None):
+    """Converte texto de data em datetime.date, ou None se não reconhecer."""
+    text = str(text or "").strip().lower()
+    if not text:
+        return None
+    today = today or datetime.date.today()
+
+    if text in RELATIVE_DAYS:
+        return today + datetime.timedelta(days=RELATIVE_DAYS[text])
+
+    for pattern, fields in DATE_PATTERNS:
+        match = pattern.match(text)
+        if not match:
+            continue
+        parts = dict(zip(fields, (int(g) for g in match.groups())))
+        year = parts.get("y", today.year)
+        if year < 100:
+            year += 2000
+        try:
+            return datetime.date(year, parts["m"], parts["d"])
+        except ValueError:
+            return None
+
+    match = MONTH_NAME_RE.match(text)
+    if match and match.group(2) in MONTHS:
+        try:
+            return datetime.date(int(match.group(3) or today.year), MONTHS[match.group(2)], int(match.group(1)))
+        except ValueError:
+            return None
+    return None
+
+
+def normalize_date(text, today=None):
+    """Data em ISO (AAAA-MM-DD) quando reconhecida; senão o texto original."""
+    date = parse_date(text, today)
+    if date is None:
+        return str(text or "").strip()
+    return date.isoformat()
+
+
+def is_stored_date(text):
+    """True se o texto já está no formato gravado (ISO) ou vazio."""
+    text = str(text or "").strip()
+    return not text or bool(ISO_DATE_RE.match(text))
+
+
+def stored_date(text):
+    """datetime.date de uma data gravada (ISO), ou None.
+
+    Para totais e ordenação: "hoje" ou "19/10" que ficaram na planilha não
+    viram data, porque mudariam de dia conforme a data em que são lidos.
+    """
+    text = str(text or "").strip()
+    if not text or not ISO_DATE_RE.match(text):
+        return None
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return None
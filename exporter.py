@@ -0,0 +1,115 @@
+import csv
+import os
+import sys
+
+from database import PRODUCT_KEYS, SALES_KEYS
+from serializers import iter_file
+
+# Arquivo local e colunas de cada tabela
+TABLES = {
+    "produtos": ("products.json", PRODUCT_KEYS),
+    "vendas": ("sales.json", SALES_KEYS),
+}
+
+FORMATS = ("csv", "xlsx", "parquet")
+BATCH_SIZE = 5000
+
+
+def detect_format(path):
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato não suportado: {fmt or path}. Use CSV, XLSX ou Parquet.")
+    return fmt
+
+
+def row_values(record, keys):
+    return [record.get(key, "") for key in keys]
+
+
+def write_csv(records, path, keys):
+    count = 0
+    # utf-8-sig e ';' para abrir direto no Excel em português
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(keys)
+        for record in records:
+            writer.writerow(row_values(record, keys))
+            count += 1
+    return count
+
+
+def write_xlsx(records, path, keys):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ValueError("Para exportar XLSX instale o pacote 'openpyxl'.")
+    # write_only grava as linhas em fluxo, sem manter a planilha na memória
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(keys)
+    count = 0
+    for record in records:
+        sheet.append([str(v) for v in row_values(record, keys)])
+        count += 1
+    workbook.save(path)
+    return count
+
+
+def write_parquet(records, path, keys, batch_size=BATCH_SIZE):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Para exportar Parquet instale o pacote 'pyarrow'.")
+    schema = pa.schema([(key, pa.string()) for key in keys])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        columns = {key: [] for key in keys}
+        for record in records:
+            for key in keys:
+                columns[key].append(str(record.get(key, "")))
+            count += 1
+            if count % batch_size == 0:
+                writer.write_table(pa.table(columns, schema=schema))
+                columns = {key: [] for key in keys}
+        if columns[keys[0]]:
+            writer.write_table(pa.table(columns, schema=schema))
+    return count
+
+
+WRITERS = {
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+    "parquet": write_parquet,
+}
+
+
+def export_table(table_name, path, progress=None, source=None):
+    """Exporta uma tabela direto do armazenamento local para CSV, XLSX ou Parquet.
+
+    'progress' recebe a porcentagem (0-100) lida do arquivo local.
+    Retorna o número de registros exportados.
+    """
+    if table_name not in TABLES:
+        raise ValueError(f"Tabela desconhecida: {table_name}")
+    filename, keys = TABLES[table_name]
+    fmt = detect_format(path)
+
+    on_progress = None
+    if progress:
+        on_progress = lambda fraction: progress(int(fraction * 100))
+    records = iter_file(source or filename, on_progress)
+    return WRITERS[fmt](records, path, keys)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python exporter.py <produtos|vendas> <saida.csv|.xlsx|.parquet>")
+        sys.exit(2)
+    try:
+        total = export_table(sys.argv[1], sys.argv[2],
+                             progress=lambda p: print(f"\r{p}%", end="", flush=True))
+        print(f"\n{total} registros exportados para {sys.argv[2]}")
+    except Exception as e:
+        print(f"\nErro ao exportar: {e}")
+        sys.exit(1)
@@ -0,0 +1,217 @@
+import csv
+import os
+import re
+import unicodedata
+
+from database import PRODUCT_KEYS, SALES_KEYS
+from dates import normalize_date
+
+# Cabeçalhos aceitos (já normalizados: minúsculas, sem acento) para cada campo
+PRODUCT_ALIASES = {
+    "data": "data",
+    "mercadoria": "mercadorias",
+    "mercadorias": "mercadorias",
+    "produto": "mercadorias",
+    "nome": "mercadorias",
+    "categoria": "categoria",
+    "descricao": "descricao",
+    "codigo": "codigo",
+    "cod": "codigo",
+    "ean": "codigo",
+    "codigo de barras": "codigo",
+    "preco": "preco",
+    "valor": "preco",
+    "preco unitario": "preco",
+    "estoque": "estoque",
+    "quantidade": "quantidade",
+    "qtd": "quantidade",
+    "qtde": "quantidade",
+}
+
+SALES_ALIASES = {
+    "data": "data",
+    "produto": "produto",
+    "mercadoria": "produto",
+    "mercadorias": "produto",
+    "quantidade": "quantidade",
+    "qtd": "quantidade",
+    "qtde": "quantidade",
+    "valor unit": "valor_unit",
+    "valor unit.": "valor_unit",
+    "valor unitario": "valor_unit",
+    "valor_unit": "valor_unit",
+    "preco": "valor_unit",
+    "total": "total",
+    "valor total": "total",
+}
+
+BATCH_SIZE = 1000
+
+# Um único ponto seguido de exatamente três dígitos ("1.000", "12.500") é milhar, como no Excel pt-BR
+THOUSANDS_RE = re.compile(r"^-?[1-9]\d{0,2}\.\d{3}$")
+
+
+def normalize_header(text):
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def parse_number(value):
+    """Converte '1.234,56', '1234.56', '1.000', 'R$ 10' ou 10 em float. Vazio vira 0."""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r"[^0-9,.\-]", "", str(value))
+    if not text or text in "-.,":
+        if str(value).strip():
+            raise ValueError(f"número inválido: '{value}'")
+        return 0.0
+    if "," in text and "." in text:
+        # O último separador é o decimal
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        text = text.replace(",", ".")
+    elif text.count(".") > 1 or THOUSANDS_RE.match(text):
+        text = text.replace(".", "")
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"número inválido: '{value}'")
+
+
+def detect_encoding(path):
+    with open(path, "rb") as f:
+        sample = f.read(65536)
+    try:
+        sample.decode("utf-8")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # Amostra cortada no meio de um caractere multibyte ainda é UTF-8
+        if e.start >= len(sample) - 3:
+            return "utf-8-sig"
+        return "latin-1"
+
+
+def iter_csv_rows(path):
+    encoding = detect_encoding(path)
+    with open(path, "r", encoding=encoding, newline="") as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.reader(f, dialect):
+            yield row
+
+
+def iter_xlsx_rows(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Para importar XLSX instale o pacote 'openpyxl'.")
+    # read_only lê a planilha em fluxo, sem carregar tudo na memória
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if v is None else v for v in row]
+    finally:
+        workbook.close()
+
+
+def iter_rows(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        return iter_xlsx_rows(path)
+    if ext in (".csv", ".txt", ".tsv"):
+        return iter_csv_rows(path)
+    raise ValueError(f"Formato não suportado: {ext}")
+
+
+def map_columns(header, aliases):
+    """Retorna {índice da coluna: campo} para os cabeçalhos reconhecidos."""
+    mapping = {}
+    for index, name in enumerate(header):
+        field = aliases.get(normalize_header(name))
+        if field and field not in mapping.values():
+            mapping[index] = field
+    return mapping
+
+
+def convert_product(record):
+    record["data"] = normalize_date(record["data"])
+    record["preco"] = f"{parse_number(record['preco']):.2f}"
+    for key in ("estoque", "quantidade"):
+        if str(record[key]).strip():
+            record[key] = str(int(parse_number(record[key])))
+    return record
+
+
+def convert_sale(record):
+    record["data"] = normalize_date(record["data"])
+    qty = int(parse_number(record["quantidade"]))
+    unit = parse_number(record["valor_unit"])
+    total = parse_number(record["total"]) if str(record["total"]).strip() else qty * unit
+    record["quantidade"] = str(qty)
+    record["valor_unit"] = f"{unit:.2f}"
+    record["total"] = f"{total:.2f}"
+    return record
+
+
+def iter_batches(path, table_name="produtos", batch_size=BATCH_SIZE):
+    """Lê CSV/XLSX em fluxo e gera lotes (registros, erros).
+
+    Os registros usam as mesmas chaves de get_table_data/get_sales_data.
+    Erros são tuplas (linha, mensagem); linhas inválidas são descartadas.
+    """
+    if table_name == "vendas":
+        keys, aliases, convert, name_key = SALES_KEYS, SALES_ALIASES, convert_sale, "produto"
+    else:
+        keys, aliases, convert, name_key = PRODUCT_KEYS, PRODUCT_ALIASES, convert_product, "mercadorias"
+
+    rows = iter_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    mapping = map_columns(header, aliases)
+    if name_key not in mapping.values():
+        raise ValueError(f"Coluna obrigatória não encontrada: {name_key}")
+
+    records, errors = [], []
+    for line, row in enumerate(rows, start=2):
+        if not any(str(v).strip() for v in row):
+            continue
+        record = dict.fromkeys(keys, "")
+        for index, field in mapping.items():
+            if index < len(row):
+                value = row[index]
+                if hasattr(value, "strftime"):
+                    value = value.strftime("%Y-%m-%d")
+                record[field] = value if isinstance(value, (int, float)) else str(value).strip()
+        if not str(record[name_key]).strip():
+            errors.append((line, f"{name_key} vazio"))
+            continue
+        try:
+            records.append({k: str(v) for k, v in convert(record).items()})
+        except ValueError as e:
+            errors.append((line, str(e)))
+
+        if len(records) >= batch_size:
+            yield records, errors
+            records, errors = [], []
+
+    if records or errors:
+        yield records, errors
+
+
+def read_file(path, table_name="produtos"):
+    """Importa o arquivo inteiro. Retorna (registros, erros)."""
+    records, errors = [], []
+    for batch, batch_errors in iter_batches(path, table_name):
+        records.extend(batch)
+        errors.extend(batch_errors)
+    return records, errors
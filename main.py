@@ -6,15 +6,38 @@ import json
 import os
 import subprocess
 import tempfile
+import itertools
+import time
+from contextlib import nullcontext
 import speech_recognition as sr
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
     QSizeGrip, QComboBox, QFrame, QTableWidget, QTableWidgetItem,
-    QMenu, QAction, QDialog, QSpinBox, QMessageBox, QLineEdit, QInputDialog, QStackedWidget
+    QMenu, QAction, QDialog, QSpinBox, QMessageBox, QLineEdit, QInputDialog, QStackedWidget,
+    QFileDialog, QProgressDialog, QDateEdit
+)
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, QUrl, QSettings, QDate, QTimer
+from PyQt5.QtGui import QDesktopServices, QColor
+from PyQt5 import sip
+from database import DatabaseManager, PRODUCT_KEYS, SALES_KEYS
+from realtime_sync import same_values, normalize_value
+import importer
+import exporter
+import tasks
+import recognizers
+import voice_parser
+import voice_normalize
+import voice_metrics
+from voice_session import ContinuousVoiceSession
+from audio_capture import get_capture_service
+from search import SearchIndex, PhoneticIndex, normalize_text
+from analytics import SalesAnalytics, ProductCatalog, to_units
+from dashboard import DashboardPanel
+from stock import StockAlertEngine
+from dates import is_stored_date, normalize_date
+from table_filters import (
+    RowFilter, sort_key, DATE, TEXT, PRODUCT_COLUMN_KINDS, SALES_COLUMN_KINDS
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QUrl, QSettings
-from PyQt5.QtGui import QDesktopServices
-from database import DatabaseManager
 
 # Tratamento de erros para evitar fechamento silencioso
 def excepthook(exc_type, exc_value, exc_tb):
@@ -24,107 +47,104 @@ def excepthook(exc_type, exc_value, exc_tb):
 
 sys.excepthook = excepthook
 
-class VoiceWorker(QThread):
-    finished = pyqtSignal(dict, str)
-    error = pyqtSignal(str)
-    listening = pyqtSignal()
-
-    def run(self):
-        recognizer = sr.Recognizer()
+# Chave estável de cada linha (guardada no item da coluna 0), usada pelos índices
+ROW_KEY_ROLE = Qt.UserRole + 2
+row_keys = itertools.count(1)
+
+def row_key(table, row):
+    item = table.item(row, 0)
+    if item is None:
+        return None
+    key = item.data(ROW_KEY_ROLE)
+    if key is None:
+        key = next(row_keys)
+        # Não é uma edição do usuário: não dispara itemChanged (save/sync)
+        blocked = table.blockSignals(True)
+        item.setData(ROW_KEY_ROLE, key)
+        table.blockSignals(blocked)
+    return key
+
+class VoiceWorker:
+    """Escuta uma fala e a converte em campos; roda na lane "voz" do pool (tasks.py).
+
+    run() devolve (itens, texto, reconhecedor usado, segundos de reconhecimento)
+    ou levanta RuntimeError com a mensagem para o usuário. O reconhecedor vem
+    de recognizers.py (Google online ou um modelo local); recognize() faz o
+    mesmo com um áudio já gravado (benchmarks/voice_replay.py).
+
+    O último áudio e a transcrição ficam guardados: se o reconhecimento falhou
+    (sem conexão, modelo indisponível), run() reenvia o mesmo áudio sem pedir
+    a fala de novo, e reparse() reinterpreta o texto sem chamar o reconhecedor.
+    """
+
+    def __init__(self, backend=recognizers.DEFAULT_BACKEND, fallback=True):
+        self.backend = backend
+        self.fallback = fallback
+        self.audio = None
+        self.text = None
+
+    def run(self, task=None):
         try:
-            with sr.Microphone() as source:
-                self.listening.emit()
-                # Ajuste rápido de ruído
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                # Escuta
-                audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                
-                # Reconhece (Google Web Speech API)
-                text = recognizer.recognize_google(audio, language='pt-BR')
+            if self.audio is None:
+                # Microfone já aberto e calibrado pelo serviço de captura (audio_capture.py)
+                self.audio = get_capture_service().capture(
+                    timeout=5, phrase_time_limit=10,
+                    cancelled=(lambda: task.cancelled) if task else None,
+                )
                 
-                # Processa
-                parsed = self.parse_text(text)
-                self.finished.emit(parsed, text)
+            return self.recognize(self.audio)
                 
         except sr.WaitTimeoutError:
-            self.error.emit("Nenhuma fala detectada. Tente novamente.")
+            raise RuntimeError("Nenhuma fala detectada. Tente novamente.")
         except sr.UnknownValueError:
-            self.error.emit("Não entendi o que foi dito.")
+            # Reenviar o mesmo áudio daria o mesmo resultado: a próxima tentativa escuta de novo
+            self.audio = None
+            raise RuntimeError("Não entendi o que foi dito.")
         except sr.RequestError:
-            self.error.emit("Erro de conexão ou configuração de voz.")
+            raise RuntimeError("Erro de conexão ou configuração de voz.")
+        except recognizers.BackendUnavailable as e:
+            raise RuntimeError(str(e))
         except Exception as e:
-            self.error.emit(f"Erro: {str(e)}")
+            raise RuntimeError(f"Erro: {str(e)}")
+
+    def recognize(self, audio):
+        """(itens, texto, backend, segundos) de um AudioData; erros do sr passam direto."""
+        # Reconhece com o backend escolhido (cai para outro se estiver indisponível)
+        text, backend, latency = recognizers.recognize(audio, self.backend, self.fallback)
+        self.text = text
+        return self.parse_items(text), text, backend, latency
+
+    def reparse(self):
+        """Como run(), mas com a última transcrição: nenhum áudio vai ao reconhecedor."""
+        return self.parse_items(self.text), self.text, None, None
 
     def parse_text(self, text):
-        text = text.lower()
-        data = {}
-        
-        # Mapeamento de palavras-chave para campos
-        keywords = {
-            "data": "Data",
-            "mercadoria": "Mercadorias",
-            "mercadorias": "Mercadorias",
-            "produto": "Produto",
-            "produtos": "Produto",
-            "categoria": "Categoria",
-            "descrição": "Descrição",
-            "descricao": "Descrição",
-            "código": "Código",
-            "codigo": "Código",
-            "preço": "Preço",
-            "preco": "Preço",
-            "valor": "Preço",
-            "valor unitário": "Valor Unit.",
-            "valor unitario": "Valor Unit.",
-            "unitário": "Valor Unit.",
-            "unitario": "Valor Unit.",
-            "total": "Total",
-            "estoque": "Estoque",
-            "quantidade": "Quantidade",
-            "quantas": "Quantidade",
-            "caixa": "Caixa",
-            "caixas": "Caixa",
-            "unidade": "Unidade",
-            "unidades": "Unidade"
-        }
-        
-        # Ordenar keywords por tamanho decrescente para evitar matches parciais errados
-        sorted_keys = sorted(keywords.keys(), key=len, reverse=True)
-        
-        found_indices = []
-        for k in sorted_keys:
-            # Encontrar todas as ocorrências (aqui simplificado para a primeira por campo)
-            idx = text.find(k)
-            if idx != -1:
-                # Verifica se não é parte de outra palavra (opcional, mas bom)
-                found_indices.append((idx, k, keywords[k]))
-        
-        found_indices.sort()
-        
-        for i, (idx, k, field) in enumerate(found_indices):
-            start = idx + len(k)
-            # O fim é o início da próxima keyword ou o fim da string
-            if i + 1 < len(found_indices):
-                end = found_indices[i+1][0]
-            else:
-                end = len(text)
-            
-            value = text[start:end].strip()
-            
-            # Limpeza de preposições comuns
-            for prep in ["de ", "da ", "do ", "é ", ": "]:
-                if value.startswith(prep):
-                    value = value[len(prep):]
-            
-            data[field] = value.strip()
-            
-        return data
+        # Regex única compilada em voice_parser; o formulário mostra o primeiro item
+        with voice_metrics.span("interpretacao"):
+            return voice_normalize.normalize_item(voice_parser.parse(text))
+
+    def parse_items(self, text):
+        # Números por extenso, reais e datas faladas já convertidos (voice_normalize)
+        with voice_metrics.span("interpretacao"):
+            return [voice_normalize.normalize_item(item) for item in voice_parser.parse_items(text)]
+
+# Campo equivalente quando a fala usa a palavra do outro formulário ("valor" numa venda)
+FIELD_ALIASES = {"Valor Unit.": "Preço", "Produto": "Mercadorias", "Mercadorias": "Produto"}
 
 class VoiceInputDialog(QDialog):
-    def __init__(self, parent=None, fields=None, title_text="Adicionar Produtos com Voz"):
+    def __init__(self, parent=None, fields=None, title_text="Adicionar Produtos com Voz", on_items=None, resolve=None):
         super().__init__(parent)
         self.setWindowTitle(title_text)
-        self.setFixedSize(400, 550)
+        self.setFixedSize(400, 600 if on_items else 550)
+        # on_items([dados]) recebe os itens de cada fala no modo contínuo
+        self.on_items = on_items
+        self.resolve = resolve
+        self.session = None
+        self.worker = None
+        self.added = 0
+        self.extra_items = []
+        # Abre e calibra o microfone enquanto o usuário lê o diálogo
+        get_capture_service().warm_up()
         self.setStyleSheet("""
             QDialog { background-color: #2E2E2E; color: white; border: 1px solid #00FFFF; border-radius: 10px; }
             QLabel { color: #E0E0E0; font-family: Segoe UI; font-size: 14px; }
@@ -151,6 +171,18 @@ class VoiceInputDialog(QDialog):
         self.btn_speak = QPushButton("🎤 Falar Agora")
         self.btn_speak.clicked.connect(self.start_listening)
         layout.addWidget(self.btn_speak)
+
+        self.btn_reparse = QPushButton("↻ Reinterpretar Última Fala")
+        self.btn_reparse.setToolTip("Preenche o formulário de novo com o último texto entendido, sem falar outra vez")
+        self.btn_reparse.clicked.connect(self.reparse_last)
+        self.btn_reparse.hide()
+        layout.addWidget(self.btn_reparse)
+        
+        if on_items:
+            self.btn_continuous = QPushButton("🔁 Modo Contínuo")
+            self.btn_continuous.setToolTip("Mantém o microfone aberto e adiciona cada item falado direto na tabela")
+            self.btn_continuous.clicked.connect(self.toggle_continuous)
+            layout.addWidget(self.btn_continuous)
         
         # Form Container
         form_widget = QWidget()
@@ -201,31 +233,116 @@ class VoiceInputDialog(QDialog):
         btn_box.addWidget(self.btn_cancel)
         layout.addLayout(btn_box)
         
+    def voice_backend(self):
+        return QSettings("BulgareeSoft", "Bulgaree").value("voice_backend", recognizers.DEFAULT_BACKEND)
+
     def start_listening(self):
         self.btn_speak.setEnabled(False)
         self.btn_speak.setText("Ouvindo...")
         self.status_label.setText("Escutando... Fale os campos agora.")
         self.status_label.setStyleSheet("color: #00FF00; font-weight: bold;")
+        self.btn_reparse.setEnabled(False)
+
+        # Falha de reconhecimento com o áudio guardado: reenvia sem pedir outra fala
+        if self.worker is None or self.worker.audio is None or self.worker.text is not None:
+            self.worker = VoiceWorker(self.voice_backend())
+        else:
+            self.worker.backend = self.voice_backend()
+            self.status_label.setText("Reenviando a última fala...")
+        self.task = tasks.submit(
+            self.worker.run, priority=tasks.HIGH, with_task=True, lane="voz",
+            on_result=lambda result: self.on_recognition_finished(*result),
+            on_error=self.on_recognition_error,
+        )
+
+    def done(self, result):
+        # Fechar o diálogo descarta o reconhecimento em andamento
+        if getattr(self, "task", None):
+            self.task.cancel()
+        if self.session:
+            self.session.stop()
+        super().done(result)
+
+    # --- Modo contínuo ---
+    def toggle_continuous(self):
+        if self.session and self.session.running:
+            self.session.stop()
+            return
+        self.btn_speak.setEnabled(False)
+        self.btn_continuous.setText("⏹ Parar Modo Contínuo")
+        self.session = ContinuousVoiceSession(
+            self.voice_backend(), self.on_continuous_text,
+            on_error=self.on_continuous_error, on_state=self.on_continuous_state,
+        )
+        self.session.start()
+
+    def on_continuous_state(self, state):
+        if state == "calibrando":
+            self.status_label.setText("Calibrando o microfone...")
+            self.status_label.setStyleSheet("color: #AAAAAA;")
+        elif state == "ouvindo":
+            self.status_label.setText(f"Modo contínuo: fale um item por vez.\n{self.added} itens adicionados.")
+            self.status_label.setStyleSheet("color: #00FF00; font-weight: bold;")
+        else:
+            self.btn_speak.setEnabled(True)
+            self.btn_continuous.setText("🔁 Modo Contínuo")
+            if self.added:
+                self.status_label.setText(f"Modo contínuo encerrado: {self.added} itens adicionados.")
+                self.status_label.setStyleSheet("color: #E0E0E0;")
+
+    def on_continuous_text(self, text, backend, latency):
+        # Uma fala pode trazer vários itens ("produto arroz ... próximo produto feijão ...")
+        items = [self.data_from_parsed(parsed) for parsed in VoiceWorker().parse_items(text)]
+        items = [data for data in items if any(value for field, value in data.items() if field != "Tipo")]
+        if not items:
+            self.status_label.setText(f"Ignorado (nenhum campo reconhecido): '{text}'")
+            return
+        # Todos os itens da fala entram como um único lote
+        self.on_items(items)
+        self.added += len(items)
+        self.status_label.setText(f"{self.added} itens adicionados.\nÚltimo: '{text}' ({latency * 1000:.0f} ms)")
+        self.status_label.setStyleSheet("color: #00FF00; font-weight: bold;")
+
+    def on_continuous_error(self, msg):
+        self.status_label.setText(msg)
+        self.status_label.setStyleSheet("color: #FF4500;")
+
+    def data_from_parsed(self, parsed):
+        """Campos do formulário (como get_data) a partir do resultado de parse_text."""
+        data = {field: parsed.get(field) or parsed.get(FIELD_ALIASES.get(field), "")
+                for field in self.fields_list}
+        data["Tipo"] = "Caixa" if "Caixa" in parsed else "Unidade"
+        # Nome falado trocado pelo produto cadastrado, com preço e código do catálogo
+        if not self.resolve:
+            return data
+        with voice_metrics.span("catalogo"):
+            return self.resolve(data)
         
-        self.worker = VoiceWorker()
-        self.worker.finished.connect(self.on_recognition_finished)
-        self.worker.error.connect(self.on_recognition_error)
-        self.worker.start()
-        
-    def on_recognition_finished(self, data, text):
-        self.status_label.setText(f"Entendido: '{text}'")
+    def on_recognition_finished(self, items, text, backend=None, latency=None):
+        status = f"Entendido: '{text}'"
+        if backend:
+            status += f"\n({recognizers.get_backend(backend).label}, {latency * 1000:.0f} ms)"
+        # O formulário mostra o primeiro item; os demais entram junto ao confirmar
+        self.extra_items = [self.data_from_parsed(parsed) for parsed in items[1:]]
+        if self.extra_items:
+            extra = len(self.extra_items)
+            status += f"\n+{extra} {'item será adicionado' if extra == 1 else 'itens serão adicionados'} junto."
+        self.status_label.setText(status)
         self.status_label.setStyleSheet("color: #E0E0E0;")
         self.btn_speak.setEnabled(True)
         self.btn_speak.setText("🎤 Falar Novamente")
+        self.btn_reparse.setEnabled(True)
+        self.btn_reparse.show()
         
+        data = items[0] if items else {}
         # Check for Type in data keys (Caixa/Unidade)
         if "Caixa" in data:
             self.combo_type.setCurrentText("Caixa")
         elif "Unidade" in data:
             self.combo_type.setCurrentText("Unidade")
         
-        for field, value in data.items():
-            if field in self.inputs:
+        for field, value in self.data_from_parsed(data).items():
+            if field in self.inputs and (value or field in data or FIELD_ALIASES.get(field) in data):
                 self.inputs[field].setText(value)
                 
     def on_recognition_error(self, msg):
@@ -233,79 +350,112 @@ class VoiceInputDialog(QDialog):
         self.status_label.setStyleSheet("color: #FF4500;")
         self.btn_speak.setEnabled(True)
         self.btn_speak.setText("🎤 Tentar Novamente")
+        self.btn_reparse.setEnabled(self.worker is not None and self.worker.text is not None)
+
+    def reparse_last(self):
+        self.on_recognition_finished(*self.worker.reparse())
         
     def get_data(self):
         data = {k: v.text() for k, v in self.inputs.items()}
         data["Tipo"] = self.combo_type.currentText()
         return data
 
+    def get_items(self):
+        """Item do formulário (com as edições do usuário) e os demais itens da fala."""
+        return [self.get_data()] + self.extra_items
 
-CURRENT_VERSION = "1.1.3"
-VERSION_URL = "https://raw.githubusercontent.com/joelson202/B-lgaree/main/version.json"
 
-class UpdateChecker(QThread):
-    update_available = pyqtSignal(str)
+class GridItem(QTableWidgetItem):
+    """Item das grades com chave de ordenação tipada (datas, centavos, números).
 
-    def run(self):
-        import time
-        import random
-        last_notified = None
+    A chave é calculada uma vez e descartada (invalidate_sort_key) quando o item
+    muda, de modo que a ordenação compara valores prontos em vez de texto.
+    """
 
-        while True:
-            try:
-                # Prevent caching
-                url = f"{VERSION_URL}?t={random.random()}"
-                response = requests.get(url, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    remote_version = data.get("version")
-                    download_url = data.get("url")
-                    
-                    if remote_version and remote_version != CURRENT_VERSION:
-                        # Simple check: if versions differ, assume update
-                        if remote_version > CURRENT_VERSION:
-                            # Notify only if not already notified for this version in this session
-                            if remote_version != last_notified:
-                                self.update_available.emit(download_url)
-                                last_notified = remote_version
-            except Exception:
-                pass
-            
-            # Verifica a cada 60 segundos
-            time.sleep(60)
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.sort_key = None
 
-class UpdateDownloader(QThread):
-    progress = pyqtSignal(int)
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
+    def typed_key(self, kind):
+        if self.sort_key is None:
+            self.sort_key = sort_key(kind, self.text())
+        return self.sort_key
 
-    def __init__(self, url):
-        super().__init__()
-        self.url = url
+    def clone(self):
+        return GridItem(self)
 
-    def run(self):
-        try:
-            response = requests.get(self.url, stream=True, timeout=30)
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            if response.status_code == 200:
-                temp_dir = tempfile.gettempdir()
-                installer_path = os.path.join(temp_dir, "Instalador_Bulgaree_Update.exe")
-                
-                with open(installer_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=65536):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if total_size > 0:
-                                self.progress.emit(int((downloaded / total_size) * 100))
-                                
-                self.finished.emit(installer_path)
-            else:
-                self.error.emit(f"Erro ao baixar: {response.status_code}")
-        except Exception as e:
-            self.error.emit(str(e))
+    def __lt__(self, other):
+        # As chaves só existem depois de sort_table; sem elas (ordenação do próprio Qt) vale o texto
+        if self.sort_key is None or not isinstance(other, GridItem) or other.sort_key is None:
+            return self.text() < other.text()
+        return self.sort_key < other.sort_key
+
+
+def cell_key(table, row, column, kind):
+    item = table.item(row, column)
+    if item is None:
+        return (2, "")
+    if not isinstance(item, GridItem):
+        # Item criado fora das grades (ex.: por outra versão); substitui mantendo os dados
+        blocked = table.blockSignals(True)
+        item = GridItem(table.takeItem(row, column))
+        table.setItem(row, column, item)
+        table.blockSignals(blocked)
+    return item.typed_key(kind)
+
+
+def invalidate_sort_key(item):
+    if isinstance(item, GridItem):
+        item.sort_key = None
+
+
+class RealtimeBridge(QObject):
+    # Eventos do Realtime chegam em outra thread; o sinal os entrega na thread da GUI
+    change_received = pyqtSignal(str, str, dict, dict)
+
+    def dispatch(self, table, event, new, old):
+        self.change_received.emit(table, event, new, old)
+
+
+CURRENT_VERSION = "1.1.3"
+VERSION_URL = "https://raw.githubusercontent.com/joelson202/B-lgaree/main/version.json"
+
+def check_latest_version():
+    """(versão, url) da versão publicada, ou None se não houver mais nova."""
+    import random
+    # Prevent caching
+    url = f"{VERSION_URL}?t={random.random()}"
+    response = requests.get(url, timeout=5)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    remote_version = data.get("version")
+    # Simple check: if versions differ, assume update
+    if remote_version and remote_version != CURRENT_VERSION and remote_version > CURRENT_VERSION:
+        return remote_version, data.get("url")
+    return None
+
+def download_update(task, url):
+    """Baixa o instalador informando o progresso (0-100) pela tarefa."""
+    response = requests.get(url, stream=True, timeout=30)
+    total_size = int(response.headers.get('content-length', 0))
+    downloaded = 0
+
+    if response.status_code != 200:
+        raise RuntimeError(f"Erro ao baixar: {response.status_code}")
+
+    temp_dir = tempfile.gettempdir()
+    installer_path = os.path.join(temp_dir, "Instalador_Bulgaree_Update.exe")
+
+    with open(installer_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=65536):
+            task.check()
+            if chunk:
+                f.write(chunk)
+                downloaded += len(chunk)
+                if total_size > 0:
+                    task.progress(int((downloaded / total_size) * 100))
+    return installer_path
 
 class CustomTitleBar(QWidget):
     def __init__(self, parent=None):
@@ -428,6 +578,84 @@ class CustomTitleBar(QWidget):
     def mouseReleaseEvent(self, event):
         self.old_pos = None
 
+class VoiceDiagnosticsDialog(QDialog):
+    """Tempos por etapa da entrada por voz (voice_metrics), com exportação."""
+
+    COLUMNS = ["Etapa", "N", "Média", "p50", "p95", "Máx"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnóstico de Voz")
+        self.resize(760, 420)
+        self.setStyleSheet("""
+            QDialog { background-color: #2E2E2E; }
+            QLabel { color: white; font-family: Segoe UI; }
+            QTableWidget { background-color: #1E1E1E; color: white; gridline-color: #444; }
+            QHeaderView::section { background-color: #3E3E3E; color: white; border: none; padding: 4px; }
+            QPushButton {
+                background-color: #00CED1; color: white; border: none;
+                padding: 6px 12px; border-radius: 4px; font-weight: bold;
+            }
+            QPushButton:hover { background-color: #00BFFF; }
+        """)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Tempos em ms. As faixas contam quantas vezes cada etapa caiu no intervalo."))
+
+        self.table = QTableWidget(0, len(self.COLUMNS) + len(voice_metrics.BUCKETS) + 1)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS + voice_metrics.bucket_labels())
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        self.cache_label = QLabel()
+        layout.addWidget(self.cache_label)
+
+        btn_layout = QHBoxLayout()
+        btn_refresh = QPushButton("Atualizar")
+        btn_refresh.clicked.connect(self.refresh)
+        btn_export = QPushButton("Exportar...")
+        btn_export.clicked.connect(self.export)
+        btn_clear = QPushButton("Zerar")
+        btn_clear.clicked.connect(self.clear)
+        btn_close = QPushButton("Fechar")
+        btn_close.clicked.connect(self.accept)
+        for btn in (btn_refresh, btn_export, btn_clear, btn_close):
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+
+        self.refresh()
+
+    def refresh(self):
+        rows = voice_metrics.summary()
+        self.table.setRowCount(len(rows))
+        for row, (_, label, count, mean, p50, p95, peak, counts) in enumerate(rows):
+            values = [label, str(count)] + [f"{value:.1f}" for value in (mean, p50, p95, peak)]
+            values += [str(n) if n else "" for n in counts]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+        self.table.resizeColumnsToContents()
+        info = voice_parser.parse_cached.cache_info()
+        self.cache_label.setText(f"Cache de interpretação: {info.hits} acertos, {info.misses} falhas.")
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar diagnóstico", "diagnostico_voz.csv", "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            total = voice_metrics.export_csv(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Exportar", f"Erro ao exportar: {e}")
+            return
+        QMessageBox.information(self, "Exportar", f"{total} etapas exportadas para:\n{path}")
+
+    def clear(self):
+        voice_metrics.clear()
+        self.refresh()
+
 class StockLimitDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -496,8 +724,19 @@ class StockLimitDialog(QDialog):
         btn_layout.addWidget(btn_cancel)
         layout.addLayout(btn_layout)
 
+SPINNER_FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+AUTH_TIMEOUT_MS = 20000
+PREFETCH_TIMEOUT_MS = 15000
+PREFETCH_TABLES = ("produtos", "vendas")
+# Nova tentativa de retomar a sessão salva quando o servidor não respondeu
+SESSION_RETRY_MS = 30000
+# Espera depois da última alteração antes de gravar o arquivo local
+SAVE_DELAY_MS = 300
+# Recálculo do saldo depois de uma rajada de eventos do Realtime
+REFRESH_DELAY_MS = 50
+
 class LoginWindow(QDialog):
-    def __init__(self):
+    def __init__(self, db_manager=None):
         super().__init__()
         self.setWindowTitle("Búlgaree - Login")
         self.setFixedSize(400, 500)
@@ -505,7 +744,7 @@ class LoginWindow(QDialog):
         self.setWindowFlags(Qt.FramelessWindowHint)
         
         # Database
-        self.db = DatabaseManager()
+        self.db = db_manager if db_manager else DatabaseManager()
         self.settings = QSettings("BulgareeSoft", "Bulgaree")
         
         layout = QVBoxLayout(self)
@@ -591,6 +830,33 @@ class LoginWindow(QDialog):
             }
         """)
         layout.addWidget(btn_register)
+        self.action_buttons = [btn_login, btn_register]
+
+        # Andamento do login (spinner) e cancelamento
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setStyleSheet("color: #00CED1; font-size: 13px;")
+        self.status_label.hide()
+        layout.addWidget(self.status_label)
+
+        self.btn_cancel = QPushButton("Cancelar")
+        self.btn_cancel.setCursor(Qt.PointingHandCursor)
+        self.btn_cancel.clicked.connect(self.cancel_busy)
+        self.btn_cancel.setStyleSheet("background-color: transparent; color: #FF4500; border: 1px solid #FF4500; border-radius: 5px; padding: 6px;")
+        self.btn_cancel.hide()
+        layout.addWidget(self.btn_cancel)
+
+        self.spinner_timer = QTimer(self)
+        self.spinner_timer.timeout.connect(self.update_spinner)
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.timeout.connect(self.on_timeout)
+        self.phase = None
+        self.pending_tasks = []
+        self.prefetched = {}
+        # Cada login recebe um número; cancelar invalida o número em andamento
+        self.login_attempt = 0
+        self.stale_session = False
         
         # Close button (since frameless)
         btn_close = QPushButton("Sair")
@@ -602,19 +868,127 @@ class LoginWindow(QDialog):
         if self.email_input.text():
             self.pass_input.setFocus()
         
+    # --- Estado "ocupado": login/cadastro rodam no pool de tarefas ---
+    def start_busy(self, phase, text, timeout_ms, cancel_text="Cancelar"):
+        self.phase = phase
+        self.status_text = text
+        self.spinner_frame = 0
+        for widget in self.action_buttons + [self.email_input, self.pass_input]:
+            widget.setEnabled(False)
+        self.btn_cancel.setText(cancel_text)
+        self.btn_cancel.show()
+        self.status_label.show()
+        self.update_spinner()
+        self.spinner_timer.start(100)
+        self.timeout_timer.start(timeout_ms)
+
+    def stop_busy(self):
+        self.phase = None
+        self.spinner_timer.stop()
+        self.timeout_timer.stop()
+        self.status_label.hide()
+        self.btn_cancel.hide()
+        for widget in self.action_buttons + [self.email_input, self.pass_input]:
+            widget.setEnabled(True)
+
+    def update_spinner(self):
+        self.status_label.setText(f"{SPINNER_FRAMES[self.spinner_frame % len(SPINNER_FRAMES)]} {self.status_text}")
+        self.spinner_frame += 1
+
+    def cancel_tasks(self):
+        for task in self.pending_tasks:
+            task.cancel()
+        self.pending_tasks = []
+        # O login em si não é cancelado (db.login grava a sessão ao terminar):
+        # a resposta chega mesmo assim e on_login_finished desfaz a sessão
+        self.login_attempt += 1
+
+    def cancel_busy(self):
+        if self.phase == "prefetch":
+            # Pular: abre a janela principal, que busca o que faltar
+            self.finish_login()
+            return
+        self.cancel_tasks()
+        self.stop_busy()
+
+    def on_timeout(self):
+        if self.phase == "prefetch":
+            self.finish_login()
+            return
+        self.cancel_tasks()
+        self.stop_busy()
+        QMessageBox.warning(self, "Aviso", "O servidor demorou para responder. Verifique sua conexão e tente novamente.")
+
+    def done(self, result):
+        self.cancel_tasks()
+        super().done(result)
+
     def handle_login(self):
         email = self.email_input.text()
         password = self.pass_input.text()
         if not email or not password:
             QMessageBox.warning(self, "Aviso", "Preencha email e senha.")
             return
-            
-        success, msg = self.db.login(email, password)
-        if success:
-            self.settings.setValue("email", email)
-            self.accept()
-        else:
+
+        self.start_busy("login", "Entrando...", AUTH_TIMEOUT_MS)
+        self.login_attempt += 1
+        attempt = self.login_attempt
+        tasks.submit(
+            self.db.login, email, password, priority=tasks.HIGH,
+            on_result=lambda result: self.on_login_finished(result, email, attempt),
+        )
+
+    def on_login_finished(self, result, email, attempt):
+        success, msg = result
+        if attempt != self.login_attempt:
+            self.on_stale_login(success)
+            return
+        if not success:
+            self.stop_busy()
+            if self.stale_session:
+                self.drop_stale_session()
             QMessageBox.critical(self, "Erro", msg)
+            return
+        # A sessão nova substitui a de um login cancelado
+        self.stale_session = False
+        self.settings.setValue("email", email)
+        self.start_prefetch()
+
+    def on_stale_login(self, success):
+        """Login cancelado (ou expirado) que o servidor aceitou depois: a sessão
+        gravada por db.login não pode continuar valendo."""
+        if not success or self.result() == QDialog.Accepted:
+            return
+        if self.phase == "login":
+            # Outra tentativa em andamento: se ela entrar, a sessão dela vale
+            self.stale_session = True
+        elif self.phase != "prefetch":
+            self.drop_stale_session()
+
+    def drop_stale_session(self):
+        self.stale_session = False
+        tasks.submit(self.db.logout, priority=tasks.HIGH)
+
+    def start_prefetch(self):
+        # Com o token em mãos, produtos e vendas já começam a vir em paralelo
+        self.stop_busy()
+        self.start_busy("prefetch", "Carregando seus dados...", PREFETCH_TIMEOUT_MS, "Pular")
+        self.prefetched = {}
+        self.pending_tasks = [
+            tasks.submit(self.db.load_from_supabase, table, priority=tasks.HIGH,
+                         on_result=lambda data, t=table: self.on_prefetched(t, data))
+            for table in PREFETCH_TABLES
+        ]
+
+    def on_prefetched(self, table, data):
+        self.prefetched[table] = data
+        if all(t in self.prefetched for t in PREFETCH_TABLES):
+            self.finish_login()
+
+    def finish_login(self):
+        self.cancel_tasks()
+        self.stop_busy()
+        self.accept()
 
     def handle_register(self):
         email = self.email_input.text()
@@ -622,17 +996,27 @@ class LoginWindow(QDialog):
         if not email or not password:
             QMessageBox.warning(self, "Aviso", "Preencha email e senha para cadastrar.")
             return
-            
-        success, msg = self.db.register(email, password)
+
+        self.start_busy("register", "Criando conta...", AUTH_TIMEOUT_MS)
+        self.pending_tasks = [tasks.submit(
+            self.db.register, email, password, priority=tasks.HIGH,
+            on_result=self.on_register_finished,
+        )]
+
+    def on_register_finished(self, result):
+        self.stop_busy()
+        success, msg = result
         if success:
             QMessageBox.information(self, "Sucesso", msg)
         else:
             QMessageBox.critical(self, "Erro", msg)
 
 class MainWindow(QWidget):
-    def __init__(self, db_manager=None):
+    def __init__(self, db_manager=None, prefetched=None, restore_session=False):
         super().__init__()
         self.db = db_manager if db_manager else DatabaseManager()
+        # Dados da nuvem já buscados pelo LoginWindow ({tabela: registros})
+        self.prefetched = dict(prefetched or {})
         self.loading_data = False
         self.setWindowFlags(Qt.FramelessWindowHint)
         self.resize(800, 500)
@@ -685,6 +1069,12 @@ class MainWindow(QWidget):
         self.btn_vendas.clicked.connect(self.show_vendas)
         self.menu_layout.addWidget(self.btn_vendas)
 
+        self.btn_dashboard = QPushButton("Dashboard")
+        self.btn_dashboard.setCursor(Qt.PointingHandCursor)
+        self.btn_dashboard.setStyleSheet(self.btn_produtos.styleSheet())
+        self.btn_dashboard.clicked.connect(self.show_dashboard)
+        self.menu_layout.addWidget(self.btn_dashboard)
+
         self.menu_layout.addStretch()
         self.menu_container.setFixedWidth(150)
         self.main_horizontal_layout.addWidget(self.menu_container)
@@ -733,11 +1123,38 @@ class MainWindow(QWidget):
         label_planilha.setStyleSheet("font-family: Segoe UI; font-size: 16px; font-weight: bold; color: #000080;")
         produtos_layout.addWidget(label_planilha)
 
+        # Busca de produtos e totais de vendas, mantidos incrementalmente
+        self.product_search = SearchIndex()
+        self.product_matcher = PhoneticIndex()
+        self.product_catalog = ProductCatalog()
+        self.sales_analytics = SalesAnalytics()
+        self.stock_alerts = StockAlertEngine()
+        self.sale_stock = {}      # chave da venda -> (chave do produto, unidades baixadas)
+        self.product_rows = {}    # chave do produto -> última linha conhecida
+        # ID do Supabase -> item da coluna 0 (item.row() acompanha ordenação e remoções)
+        self.row_ids = {"produtos": {}, "vendas": {}}
+        # Linhas ainda sem ID agrupadas pelos valores; refeito só após edições locais
+        self.unsynced_rows = {}
+        self.timers = {}          # nome -> QTimer de debounce (recálculos e saves em rajada)
+        self.save_tasks = {}      # tabela -> último save enviado ao pool (esperado ao fechar)
+        self.stock_changed = False
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Buscar produto (nome, categoria, descrição ou código)...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setStyleSheet("background-color: white; color: black; padding: 6px; border: 1px solid #999; border-radius: 4px;")
+        self.search_input.textChanged.connect(self.apply_product_filter)
+        produtos_layout.addWidget(self.search_input)
+        produtos_layout.addLayout(self.build_filter_bar("produtos"))
+
         # Tabela Produtos
         self.finance_table = QTableWidget()
         self.finance_table.setColumnCount(8)
         self.finance_table.setHorizontalHeaderLabels(["Data", "Mercadorias", "Categoria", "Descrição", "Código", "Preço", "Estoque", "Quantidade"])
         self.finance_table.horizontalHeader().setStretchLastSection(True)
+        self.finance_table.setItemPrototype(GridItem())
+        self.finance_table.itemChanged.connect(invalidate_sort_key)
+        self.finance_table.horizontalHeader().sectionClicked.connect(
+            lambda col: self.sort_table(self.finance_table, col))
         self.finance_table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.finance_table.customContextMenuRequested.connect(self.open_context_menu)
         produtos_layout.addWidget(self.finance_table)
@@ -757,11 +1174,24 @@ class MainWindow(QWidget):
         self.saldo_label = QLabel("Saldo Total: R$ 0,00")
         self.saldo_label.setStyleSheet("font-weight: bold; color: green;")
         buttons_layout.addWidget(self.saldo_label)
+
+        self.stock_alert_buttons = [self.create_stock_alert_button()]
+        buttons_layout.addWidget(self.stock_alert_buttons[0])
         
         self.btn_voice = QPushButton(" 🎤 Adicionar Produtos com Voz")
         self.btn_voice.setStyleSheet("background-color: #9370DB; color: white; font-weight: bold; padding: 6px 12px; border-radius: 4px;")
         self.btn_voice.clicked.connect(self.open_voice_dialog)
         buttons_layout.addWidget(self.btn_voice)
+
+        self.btn_import = QPushButton("Importar")
+        self.btn_import.setStyleSheet("background-color: #4682B4; color: white; font-weight: bold;")
+        self.btn_import.clicked.connect(lambda: self.import_file("produtos"))
+        buttons_layout.addWidget(self.btn_import)
+
+        self.btn_export = QPushButton("Exportar")
+        self.btn_export.setStyleSheet("background-color: #4682B4; color: white; font-weight: bold;")
+        self.btn_export.clicked.connect(lambda: self.export_file("produtos"))
+        buttons_layout.addWidget(self.btn_export)
         
         produtos_layout.addLayout(buttons_layout)
 
@@ -779,6 +1209,11 @@ class MainWindow(QWidget):
         self.sales_table.setColumnCount(5)
         self.sales_table.setHorizontalHeaderLabels(["Data", "Produto", "Quantidade", "Valor Unit.", "Total"])
         self.sales_table.horizontalHeader().setStretchLastSection(True)
+        self.sales_table.setItemPrototype(GridItem())
+        self.sales_table.itemChanged.connect(invalidate_sort_key)
+        self.sales_table.horizontalHeader().sectionClicked.connect(
+            lambda col: self.sort_table(self.sales_table, col))
+        vendas_layout.addLayout(self.build_filter_bar("vendas"))
         vendas_layout.addWidget(self.sales_table)
 
         # Botões Vendas
@@ -798,12 +1233,37 @@ class MainWindow(QWidget):
         self.btn_voice_sales.clicked.connect(self.open_sales_voice_dialog)
         vendas_buttons_layout.addWidget(self.btn_voice_sales)
 
+        self.btn_import_sales = QPushButton("Importar")
+        self.btn_import_sales.setStyleSheet("background-color: #4682B4; color: white; font-weight: bold;")
+        self.btn_import_sales.clicked.connect(lambda: self.import_file("vendas"))
+        vendas_buttons_layout.addWidget(self.btn_import_sales)
+
+        self.btn_export_sales = QPushButton("Exportar")
+        self.btn_export_sales.setStyleSheet("background-color: #4682B4; color: white; font-weight: bold;")
+        self.btn_export_sales.clicked.connect(lambda: self.export_file("vendas"))
+        vendas_buttons_layout.addWidget(self.btn_export_sales)
+
+        # Leitor de código de barras: digita o código e envia Enter
+        self.scan_input = QLineEdit()
+        self.scan_input.setPlaceholderText("Código de barras...")
+        self.scan_input.setFixedWidth(160)
+        self.scan_input.setStyleSheet("background-color: white; color: black; padding: 4px; border: 1px solid #999; border-radius: 4px;")
+        self.scan_input.returnPressed.connect(self.add_sale_by_code)
+        vendas_buttons_layout.addWidget(self.scan_input)
+
         self.sales_total_label = QLabel("Total Vendas: R$ 0,00")
         self.sales_total_label.setStyleSheet("font-weight: bold; color: blue;")
         vendas_buttons_layout.addWidget(self.sales_total_label)
+
+        self.stock_alert_buttons.append(self.create_stock_alert_button())
+        vendas_buttons_layout.addWidget(self.stock_alert_buttons[-1])
         
         vendas_layout.addLayout(vendas_buttons_layout)
 
+        # --- Painel Dashboard (agregados de vendas e estoque) ---
+        self.dashboard_panel = DashboardPanel(self.sales_analytics, self.product_catalog)
+        self.stack.addWidget(self.dashboard_panel)
+
         # Painel de Configurações
         self.settings_panel = QWidget(self)
         self.settings_panel.setStyleSheet("""
@@ -811,7 +1271,7 @@ class MainWindow(QWidget):
             border-radius: 10px;
             border: 1px solid #555;
         """)
-        self.settings_panel.setFixedSize(220, 400)
+        self.settings_panel.setFixedSize(220, 440)
         self.settings_panel.hide()
 
         panel_layout = QVBoxLayout(self.settings_panel)
@@ -836,6 +1296,23 @@ class MainWindow(QWidget):
         panel_layout.addWidget(lang_label)
         panel_layout.addWidget(self.lang_combo)
 
+        voice_label = QLabel("Reconhecimento de voz:")
+        voice_label.setStyleSheet("color: white; font-family: Segoe UI;")
+        self.voice_combo = QComboBox()
+        for name, backend in recognizers.BACKENDS.items():
+            self.voice_combo.addItem(backend.label, name)
+        self.voice_combo.setStyleSheet("background-color: #3E3E3E; color: white;")
+        saved_backend = QSettings("BulgareeSoft", "Bulgaree").value("voice_backend", recognizers.DEFAULT_BACKEND)
+        self.voice_combo.setCurrentIndex(max(self.voice_combo.findData(saved_backend), 0))
+        self.voice_combo.currentIndexChanged.connect(self.change_voice_backend)
+        panel_layout.addWidget(voice_label)
+        panel_layout.addWidget(self.voice_combo)
+
+        self.btn_voice_diagnostics = QPushButton("Diagnóstico de Voz")
+        self.btn_voice_diagnostics.setStyleSheet("background-color: #3E3E3E; color: white; padding: 4px;")
+        self.btn_voice_diagnostics.clicked.connect(self.open_voice_diagnostics)
+        panel_layout.addWidget(self.btn_voice_diagnostics)
+
         # SizeGrip
         self.sizegrip = QSizeGrip(self.content)
         self.sizegrip.setStyleSheet("width: 20px; height: 20px; background-color: transparent; border: none;")
@@ -876,9 +1353,20 @@ class MainWindow(QWidget):
 
         # Connect Item Changed
         self.finance_table.itemChanged.connect(self.on_item_changed)
+        self.sales_table.itemChanged.connect(self.on_sale_changed)
 
-        # Load Data
+        # Load Data (armazenamento local, na hora)
         self.load_data()
+        self.load_sales_data()
+
+        # Alterações feitas em outros dispositivos
+        self.realtime_bridge = RealtimeBridge(self)
+        self.realtime_bridge.change_received.connect(self.apply_remote_change)
+        if self.db.user:
+            self.connect_cloud()
+        elif restore_session:
+            # Sessão salva: a janela já abriu com o cache local; a nuvem entra quando o token for validado
+            tasks.submit(self.db.restore_session, priority=tasks.HIGH, on_result=self.on_session_restored)
 
     # --- Persistência e Dados ---
     def get_table_data(self):
@@ -909,61 +1397,59 @@ class MainWindow(QWidget):
         return data
 
     def load_data(self):
-        self.loading_data = True
-        try:
-            # Carregar localmente para verificação
-            local_data = self.db.load_local()
-            
-            # Tentar carregar da nuvem se estiver logado
-            cloud_data = None
-            if self.db.user:
-                 cloud_data = self.db.load_from_supabase()
-
-            # Decisão de qual fonte de dados usar
-            if cloud_data is not None and len(cloud_data) > 0:
-                # Nuvem tem dados, usa a nuvem (Server Wins)
-                data = cloud_data
-                # Atualiza backup local
-                self.db.save_local(data)
-            elif local_data:
-                # Nuvem vazia ou erro (offline), mas temos dados locais
-                data = local_data
-                # Se a nuvem estava acessível mas vazia (primeiro login?), sincroniza dados locais para lá
-                if cloud_data is not None and len(cloud_data) == 0:
-                     threading.Thread(target=self.manual_sync, daemon=True).start()
+        # Dados da nuvem já buscados no login dispensam mostrar o cache local antes
+        if not self.prefetched.get("produtos"):
+            self.populate_products(self.db.load_local())
+
+    def connect_cloud(self):
+        """Traz produtos e vendas da nuvem (pelo pool) e assina as alterações em tempo real."""
+        for table_name in PREFETCH_TABLES:
+            if table_name in self.prefetched:
+                # Já buscado durante o login
+                self.on_cloud_loaded(table_name, self.prefetched.pop(table_name))
             else:
-                # Tudo vazio
-                data = []
+                tasks.submit(self.db.load_from_supabase, table_name,
+                             on_result=lambda cloud_data, t=table_name: self.on_cloud_loaded(t, cloud_data))
 
+        success, msg = self.db.subscribe_changes(self.realtime_bridge.dispatch)
+        if not success:
+            print(f"Realtime: {msg}")
+
+    def on_session_restored(self, result):
+        success, msg = result
+        if success:
+            self.connect_cloud()
+            return
+        print(f"Sessão: {msg}")
+        if success is None:
+            # Sem conexão: segue com os dados locais e tenta de novo mais tarde
+            QTimer.singleShot(SESSION_RETRY_MS, self.retry_session)
+            return
+        # Sessão expirada: pede a senha sem fechar a janela (os dados locais continuam abertos)
+        login = LoginWindow(self.db)
+        if login.exec_() == QDialog.Accepted:
+            self.prefetched = dict(login.prefetched)
+            self.connect_cloud()
+
+    def retry_session(self):
+        tasks.submit(self.db.restore_session, priority=tasks.LOW, key="restore-session",
+                     on_result=self.on_session_restored)
+
+    def populate_products(self, data):
+        self.loading_data = True
+        try:
             self.finance_table.setRowCount(0)
-            
-            keys = ["data", "mercadorias", "categoria", "descricao", "codigo", "preco", "estoque", "quantidade"]
+            self.mark_rows_changed("produtos")
             
             for row_data in data:
                 row = self.finance_table.rowCount()
                 self.finance_table.insertRow(row)
-                
-                # Recuperar ID se existir (do Supabase)
-                prod_id = row_data.get('id')
-
-                for col, key in enumerate(keys):
-                    val = row_data.get(key, "")
-                    item = QTableWidgetItem(str(val))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    
-                    # Salvar ID na primeira coluna (oculto)
-                    if col == 0 and prod_id:
-                        item.setData(Qt.UserRole + 1, prod_id)
-
-                    self.finance_table.setItem(row, col, item)
-                    
-                    # Restaurar metadados de estoque
-                    if key == "estoque" and "estoque_meta" in row_data:
-                        meta = row_data["estoque_meta"]
-                        item.setData(Qt.UserRole, meta)
-                        if isinstance(meta, dict):
-                            self.update_stock_label(row, meta.get('min', 0), meta.get('max', 0))
+                self.fill_product_row(row, row_data)
 
+            self.rebuild_product_search()
+            # Os produtos ganharam chaves novas: a baixa de cada venda passa a apontar para elas
+            self.rebuild_sales_analytics()
+            self.refresh_category_filters()
             self.update_saldo()
         except Exception as e:
             print(f"Erro ao carregar dados: {e}")
@@ -971,19 +1457,674 @@ class MainWindow(QWidget):
         finally:
             self.loading_data = False
 
+    def on_cloud_loaded(self, table_name, cloud_data):
+        if cloud_data is None:
+            # Offline ou erro: segue com os dados locais
+            return
+        if cloud_data:
+            # Nuvem tem dados, usa a nuvem (Server Wins) e atualiza o backup local
+            self.save_table(table_name, cloud_data)
+            if table_name == "vendas":
+                self.populate_sales(cloud_data)
+            else:
+                self.populate_products(cloud_data)
+        elif (self.sales_table if table_name == "vendas" else self.finance_table).rowCount():
+            # Nuvem acessível mas vazia (primeiro login?): sincroniza os dados locais
+            if table_name == "vendas":
+                self.manual_sync_sales()
+            else:
+                self.manual_sync()
+
+    def fill_product_row(self, row, row_data):
+        # Recuperar ID se existir (do Supabase)
+        prod_id = row_data.get('id')
+
+        for col, key in enumerate(PRODUCT_KEYS):
+            val = row_data.get(key, "")
+            item = self.finance_table.item(row, col)
+            if item is None:
+                item = GridItem(str(val))
+                item.setTextAlignment(Qt.AlignCenter)
+                self.finance_table.setItem(row, col, item)
+            elif item.text() != str(val):
+                item.setText(str(val))
+            if key == "data":
+                self.flag_stored_date(item)
+
+            # Salvar ID na primeira coluna (oculto)
+            if col == 0 and prod_id:
+                item.setData(Qt.UserRole + 1, prod_id)
+                self.row_ids["produtos"][prod_id] = item
+
+            # Restaurar metadados de estoque
+            if key == "estoque" and "estoque_meta" in row_data:
+                meta = row_data["estoque_meta"]
+                item.setData(Qt.UserRole, meta)
+                if isinstance(meta, dict):
+                    self.update_stock_label(row, meta.get('min', 0), meta.get('max', 0))
+
+    def fill_sale_row(self, row, row_data):
+        sale_id = row_data.get('id')
+
+        for col, key in enumerate(SALES_KEYS):
+            val = row_data.get(key, "")
+            item = self.sales_table.item(row, col)
+            if item is None:
+                item = GridItem(str(val))
+                item.setTextAlignment(Qt.AlignCenter)
+                self.sales_table.setItem(row, col, item)
+            elif item.text() != str(val):
+                item.setText(str(val))
+            if key == "data":
+                self.flag_stored_date(item)
+
+            if col == 0 and sale_id:
+                item.setData(Qt.UserRole + 1, sale_id)
+                self.row_ids["vendas"][sale_id] = item
+
+    # --- Realtime (alterações de outros dispositivos) ---
+    def find_row_by_id(self, table_name, record_id):
+        item = self.row_ids[table_name].get(record_id)
+        if item is None:
+            return None
+        if sip.isdeleted(item) or item.tableWidget() is None or item.data(Qt.UserRole + 1) != record_id:
+            # Linha removida ou recarregada
+            del self.row_ids[table_name][record_id]
+            return None
+        return item.row()
+
+    def mark_rows_changed(self, table_name):
+        # Linhas criadas ou editadas aqui: o mapa das linhas sem ID é refeito no próximo eco
+        self.unsynced_rows.pop(table_name, None)
+
+    def row_signature(self, table, row, keys):
+        return tuple(normalize_value(table.item(row, c).text() if table.item(row, c) else "")
+                     for c in range(len(keys)))
+
+    def find_unsynced_row(self, table_name, table, keys, record):
+        # Linhas criadas localmente ainda não têm ID; o INSERT que volta do
+        # servidor é o eco do nosso próprio upsert e apenas atribui o ID.
+        pending = self.unsynced_rows.get(table_name)
+        if pending is None:
+            pending = {}
+            for row in range(table.rowCount()):
+                item = table.item(row, 0)
+                if item is None or item.data(Qt.UserRole + 1):
+                    continue
+                pending.setdefault(self.row_signature(table, row, keys), []).append(item)
+            self.unsynced_rows[table_name] = pending
+        items = pending.get(tuple(normalize_value(record.get(k, "")) for k in keys))
+        while items:
+            item = items.pop(0)
+            if not sip.isdeleted(item) and item.tableWidget() is table and not item.data(Qt.UserRole + 1):
+                return item.row()
+        return None
+
+    def row_matches(self, table, row, keys, record):
+        """True se o registro remoto não muda nada na linha (eco do nosso upsert)."""
+        current = {key: table.item(row, c).text() if table.item(row, c) else "" for c, key in enumerate(keys)}
+        if not same_values(current, record, keys):
+            return False
+        if table is self.finance_table and "estoque_meta" in record:
+            item = table.item(row, 6)
+            return (item.data(Qt.UserRole) if item else None) == record["estoque_meta"]
+        return True
+
+    def apply_remote_change(self, table_name, event, new, old):
+        if table_name == "produtos":
+            table, keys, fill = self.finance_table, PRODUCT_KEYS, self.fill_product_row
+        elif table_name == "vendas":
+            table, keys, fill = self.sales_table, SALES_KEYS, self.fill_sale_row
+        else:
+            return
+
+        record_id = new.get('id') or old.get('id')
+        if not record_id:
+            return
+
+        self.loading_data = True
+        try:
+            row = self.find_row_by_id(table_name, record_id)
+            if event == "DELETE":
+                if row is None:
+                    return
+                if table is self.finance_table:
+                    self.unindex_product_row(row)
+                else:
+                    self.unindex_sale_row(row, apply_stock=False)
+                del self.row_ids[table_name][record_id]
+                table.removeRow(row)
+            else:
+                if row is not None and self.row_matches(table, row, keys, new):
+                    # Nada mudou: sem reindexar nem salvar
+                    return
+                if row is None:
+                    row = self.find_unsynced_row(table_name, table, keys, new)
+                if row is None:
+                    row = table.rowCount()
+                    table.insertRow(row)
+                fill(row, new)
+                if table is self.finance_table:
+                    self.index_product_row(row)
+                else:
+                    self.index_sale_row(row, apply_stock=False)
+        finally:
+            self.loading_data = False
+
+        # Uma rajada de eventos (eco de uma edição em lote) vira um único recálculo e um único save
+        self.debounce(f"totals:{table_name}", self.update_saldo if table_name == "produtos"
+                      else self.update_sales_total, REFRESH_DELAY_MS)
+        self.schedule_save(table_name)
+
+    def debounce(self, name, callback, delay_ms):
+        """Chama callback uma vez, delay_ms depois do último pedido com o mesmo nome."""
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(callback)
+            self.timers[name] = timer
+        timer.start(delay_ms)
+
+    def schedule_save(self, table_name):
+        """Grava a tabela no disco pelo pool, uma vez por rajada de alterações."""
+        self.debounce(f"save:{table_name}", lambda: self.save_table(table_name), SAVE_DELAY_MS)
+
+    def save_table(self, table_name, data=None, metrics=None):
+        """Grava a tabela no disco pelo pool (serialização, arquivo e backup fora da GUI).
+
+        Sem 'data', os dados são lidos da grade aqui, na thread da GUI. A chave
+        por tabela mantém no máximo uma gravação rodando e uma na fila (a mais
+        recente), então saves seguidos se fundem. Com metrics (voice_metrics),
+        a gravação entra nos tempos por etapa.
+        """
+        if table_name == "vendas":
+            filename, on_result = "sales.json", None
+            data = self.get_sales_data() if data is None else data
+        else:
+            filename, on_result = "products.json", self.on_products_saved
+            data = self.get_table_data() if data is None else data
+        span = metrics.span if metrics else (lambda stage: nullcontext())
+
+        def write():
+            with span("salvar"):
+                return self.db.save_local(data, filename)
+
+        task = tasks.submit(write, priority=tasks.NORMAL, key=f"save:{table_name}", on_result=on_result)
+        self.save_tasks[table_name] = task
+        return task
+
+    def on_products_saved(self, saved):
+        if saved:
+            self.refresh_product_index()
+
+    def flush_saves(self, timeout=5):
+        """Grava já as tabelas com save pendente e espera terminar (ao fechar a janela)."""
+        for table_name in ("produtos", "vendas"):
+            timer = self.timers.get(f"save:{table_name}")
+            if timer and timer.isActive():
+                timer.stop()
+                self.save_table(table_name)
+        pending = [task for task in self.save_tasks.values() if not task.cancelled]
+        deadline = time.monotonic() + timeout
+        while any(not task.done for task in pending) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    # --- Importação em lote (CSV/XLSX) ---
+    def import_file(self, table_name):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Importar Planilha", "", "Planilhas (*.csv *.xlsx *.xlsm *.txt *.tsv)"
+        )
+        if not path:
+            return
+
+        # Leitura e conversão da planilha no pool; a grade só recebe o resultado
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        tasks.submit(
+            importer.read_file, path, table_name, priority=tasks.NORMAL, key=f"import:{table_name}",
+            on_result=lambda result: self.on_file_imported(table_name, *result),
+            on_error=self.on_import_error,
+        )
+
+    def on_import_error(self, msg):
+        QApplication.restoreOverrideCursor()
+        QMessageBox.critical(self, "Erro", f"Erro ao importar: {msg}")
+
+    def on_file_imported(self, table_name, records, errors):
+        QApplication.restoreOverrideCursor()
+        if records:
+            self.insert_records(table_name, records)
+
+        msg = f"{len(records)} registros importados."
+        if errors:
+            details = "\n".join(f"Linha {line}: {err}" for line, err in errors[:10])
+            msg += f"\n{len(errors)} linhas ignoradas:\n{details}"
+        QMessageBox.information(self, "Importação", msg)
+
+    def insert_records(self, table_name, records, on_row=None, metrics=None):
+        """Insere vários registros na grade de uma vez, com um único recálculo, save e sync.
+
+        on_row(linha, índice do registro) ajusta cada linha recém-preenchida
+        antes da indexação (ex.: o total calculado pela voz). Com metrics
+        (voice_metrics), a inserção e o save entram nos tempos por etapa.
+        """
+        if table_name == "vendas":
+            table, fill = self.sales_table, self.fill_sale_row
+        else:
+            table, fill = self.finance_table, self.fill_product_row
+        span = metrics.span if metrics else (lambda stage: nullcontext())
+
+        with span("insercao"):
+            self.fill_records(table, fill, records, on_row)
+        self.save_table(table_name, metrics=metrics)
+
+        # Um único upsert com todos os registros novos
+        tasks.submit(self.db.sync_to_supabase, records, table_name,
+                     priority=tasks.LOW, on_result=self.on_sync_finished)
+
+    def fill_records(self, table, fill, records, on_row):
+        # Preenche e indexa as linhas novas e recalcula totais e filtros (sem salvar)
+        self.mark_rows_changed("vendas" if table is self.sales_table else "produtos")
+        self.loading_data = True
+        table.setUpdatesEnabled(False)
+        try:
+            start = table.rowCount()
+            table.setRowCount(start + len(records))
+            for offset, record in enumerate(records):
+                fill(start + offset, record)
+                if on_row:
+                    on_row(start + offset, offset)
+                if table is self.finance_table:
+                    self.index_product_row(start + offset)
+                else:
+                    self.index_sale_row(start + offset)
+        finally:
+            table.setUpdatesEnabled(True)
+            self.loading_data = False
+
+        if table is self.sales_table:
+            self.update_sales_total()
+        else:
+            self.refresh_category_filters()
+            self.apply_product_filter()
+            self.update_saldo()
+
+    # --- Exportação (direto do armazenamento local) ---
+    def export_file(self, table_name):
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Exportar", table_name,
+            "CSV (*.csv);;Excel (*.xlsx);;Parquet (*.parquet)"
+        )
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += "." + selected.split("*.")[-1].rstrip(")")
+
+        self.export_progress = QProgressDialog("Exportando...", None, 0, 100, self)
+        self.export_progress.setWindowTitle("Exportar")
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(300)
+
+        tasks.submit(
+            lambda task: exporter.export_table(table_name, path, progress=task.progress),
+            with_task=True,
+            on_progress=self.export_progress.setValue,
+            on_result=lambda total: self.on_export_finished(total, path),
+            on_error=self.on_export_error,
+        )
+
+    def on_export_finished(self, total, path):
+        self.export_progress.setValue(100)
+        QMessageBox.information(self, "Exportar", f"{total} registros exportados para:\n{path}")
+
+    def on_export_error(self, msg):
+        self.export_progress.cancel()
+        QMessageBox.critical(self, "Erro", f"Erro ao exportar: {msg}")
+
+    def closeEvent(self, event):
+        self.db.unsubscribe_changes()
+        self.flush_saves()
+        super().closeEvent(event)
+
     def save_data(self):
         if self.loading_data:
             return
 
         data = self.get_table_data()
-        self.db.save_local(data)
-        
-        # Tenta sincronizar silenciosamente com a nuvem
-        # Usando thread separada para não travar a UI
-        import threading
-        threading.Thread(target=self.manual_sync, daemon=True).start()
+        self.save_table("produtos", data)
+
+        # Tenta sincronizar silenciosamente com a nuvem, no pool de tarefas
+        self.sync_in_background(data, "produtos")
+
+    def refresh_product_index(self):
+        # O índice por código (leitor de código de barras) é refeito no pool, não no save
+        tasks.submit(self.db.get_product_index, priority=tasks.LOW, key="product-index")
+
+    # --- Busca de produtos ---
+    def index_product_row(self, row):
+        # A chave da linha a identifica mesmo após inserções e remoções
+        doc = row_key(self.finance_table, row)
+        if doc is None:
+            return
+        record = {}
+        for col, key in enumerate(PRODUCT_KEYS[:7]):
+            item = self.finance_table.item(row, col)
+            record[key] = item.text() if item else ""
+        self.product_search.update(doc, " ".join(record[key] for key in PRODUCT_KEYS[1:5]))
+        self.product_matcher.update(doc, record["mercadorias"])
+        self.product_catalog.update(doc, record)
+        meta = self.finance_table.item(row, 6).data(Qt.UserRole) if self.finance_table.item(row, 6) else None
+        self.stock_alerts.update(doc, record["mercadorias"], record["estoque"], meta)
+        self.product_rows[doc] = row
+
+    def unindex_product_row(self, row):
+        doc = row_key(self.finance_table, row)
+        self.product_search.remove(doc)
+        self.product_matcher.remove(doc)
+        self.product_catalog.remove(doc)
+        self.stock_alerts.remove(doc)
+        self.product_rows.pop(doc, None)
+
+    def rebuild_product_search(self):
+        self.product_search.clear()
+        self.product_matcher.clear()
+        self.product_catalog.clear()
+        self.stock_alerts.clear()
+        self.product_rows.clear()
+        for row in range(self.finance_table.rowCount()):
+            self.index_product_row(row)
+        self.apply_product_filter()
+
+    # --- Totais de vendas ---
+    def index_sale_row(self, row, apply_stock=True):
+        """Atualiza os totais da venda e a baixa de estoque do produto vendido.
+
+        apply_stock=False só registra a venda (dados carregados ou vindos de
+        outro dispositivo, cujo estoque já reflete a venda).
+        """
+        key = row_key(self.sales_table, row)
+        if key is None:
+            return
+        record = {}
+        for col, name in enumerate(SALES_KEYS):
+            item = self.sales_table.item(row, col)
+            record[name] = item.text() if item else ""
+        self.sales_analytics.update(key, record)
+
+        product = self.product_catalog.find(record["produto"])
+        applied = (product, to_units(record["quantidade"])) if product is not None else None
+        previous = self.sale_stock.pop(key, None)
+        if applied:
+            self.sale_stock[key] = applied
+        if apply_stock and applied != previous:
+            # Edição da venda: devolve a baixa anterior e aplica a nova
+            if previous:
+                self.adjust_stock(previous[0], previous[1])
+            if applied:
+                self.adjust_stock(applied[0], -applied[1])
+
+    def unindex_sale_row(self, row, apply_stock=True):
+        key = row_key(self.sales_table, row)
+        self.sales_analytics.remove(key)
+        previous = self.sale_stock.pop(key, None)
+        if apply_stock and previous:
+            self.adjust_stock(previous[0], previous[1])
+
+    def rebuild_sales_analytics(self):
+        self.sales_analytics.clear()
+        self.sale_stock.clear()
+        for row in range(self.sales_table.rowCount()):
+            self.index_sale_row(row, apply_stock=False)
+
+    # --- Estoque ---
+    def find_product_row(self, key):
+        row = self.product_rows.get(key)
+        if row is not None and row < self.finance_table.rowCount() and row_key(self.finance_table, row) == key:
+            return row
+        # A grade foi reordenada ou teve linhas removidas: refaz o mapa
+        self.product_rows = {row_key(self.finance_table, r): r for r in range(self.finance_table.rowCount())}
+        return self.product_rows.get(key)
+
+    def adjust_stock(self, product_key, delta):
+        if not delta:
+            return
+        row = self.find_product_row(product_key)
+        item = self.finance_table.item(row, 6) if row is not None else None
+        # Produto sem estoque informado não é controlado
+        if item is None or not item.text().strip():
+            return
+        value = to_units(item.text()) + delta
+        was_loading = self.loading_data
+        self.loading_data = True
+        try:
+            item.setText(str(int(value)) if value == int(value) else f"{value:g}")
+        finally:
+            self.loading_data = was_loading
+        self.index_product_row(row)
+        if not self.stock_changed:
+            # Várias vendas no mesmo ciclo (lote, ditado) geram um único save dos produtos
+            self.stock_changed = True
+            QTimer.singleShot(0, self.flush_stock_changes)
+
+    def flush_stock_changes(self):
+        if not self.stock_changed:
+            return
+        self.stock_changed = False
+        self.save_data()
+        self.update_saldo()
+
+    def create_stock_alert_button(self):
+        button = QPushButton()
+        button.setStyleSheet("background-color: #FFD700; color: black; font-weight: bold; padding: 4px 8px; border-radius: 4px;")
+        button.setCursor(Qt.PointingHandCursor)
+        button.clicked.connect(self.show_low_stock)
+        button.hide()
+        return button
+
+    def refresh_stock_alerts(self):
+        entered, left = self.stock_alerts.evaluate()
+        if not entered and not left:
+            return
+        for key, low in [(k, True) for k in entered] + [(k, False) for k in left]:
+            row = self.find_product_row(key)
+            item = self.finance_table.item(row, 6) if row is not None else None
+            if item is None:
+                continue
+            blocked = self.finance_table.blockSignals(True)
+            item.setBackground(QColor("#FFB6B6") if low else QColor(0, 0, 0, 0))
+            self.finance_table.blockSignals(blocked)
+
+        count = len(self.stock_alerts.low)
+        for button in self.stock_alert_buttons:
+            button.setText(f"⚠ Estoque baixo ({count})")
+            button.setVisible(count > 0)
+
+    def show_low_stock(self):
+        items = self.stock_alerts.low_stock()
+        if not items:
+            return
+        lines = [f"{name or '(sem nome)'}: {estoque:g} (mínimo {minimum})" for name, estoque, minimum in items[:30]]
+        if len(items) > 30:
+            lines.append(f"... e mais {len(items) - 30}")
+        QMessageBox.warning(self, "Estoque Baixo", "\n".join(lines))
+
+    def normalize_date_item(self, item):
+        # Datas digitadas ("hoje", "19/10") são gravadas em ISO para permitir relatórios por período
+        text = normalize_date(item.text())
+        if text != item.text():
+            blocked = item.tableWidget().blockSignals(True)
+            item.setText(text)
+            item.tableWidget().blockSignals(blocked)
+            invalidate_sort_key(item)
+        self.flag_stored_date(item)
+
+    def flag_stored_date(self, item):
+        # Datas carregadas ficam como foram gravadas: "hoje" de um arquivo antigo não vira a data de
+        # hoje; só fica marcada para o usuário corrigir
+        if is_stored_date(item.text()):
+            item.setToolTip("")
+        else:
+            item.setToolTip("Data gravada fora do formato AAAA-MM-DD; edite a célula para corrigir")
+
+    def apply_product_filter(self):
+        matches = self.product_search.search(self.search_input.text())
+        row_filter = self.row_filters["produtos"]
+        active = row_filter.active()
+        table = self.finance_table
+        # Sem repintar a cada linha escondida: o filtro inteiro vira um único repaint
+        table.setUpdatesEnabled(False)
+        try:
+            for row in range(table.rowCount()):
+                hidden = matches is not None and row_key(table, row) not in matches
+                if not hidden and active:
+                    hidden = not row_filter.matches(
+                        cell_key(table, row, 0, DATE), cell_key(table, row, 2, TEXT)[1]
+                    )
+                if table.isRowHidden(row) != hidden:
+                    table.setRowHidden(row, hidden)
+        finally:
+            table.setUpdatesEnabled(True)
+
+    def apply_sales_filter(self):
+        row_filter = self.row_filters["vendas"]
+        active = row_filter.active()
+        table = self.sales_table
+        categories = self.product_categories() if row_filter.category else {}
+        table.setUpdatesEnabled(False)
+        try:
+            for row in range(table.rowCount()):
+                hidden = False
+                if active:
+                    product = cell_key(table, row, 1, TEXT)[1]
+                    hidden = not row_filter.matches(
+                        cell_key(table, row, 0, DATE), categories.get(product, ""), product
+                    )
+                if table.isRowHidden(row) != hidden:
+                    table.setRowHidden(row, hidden)
+        finally:
+            table.setUpdatesEnabled(True)
+
+    def product_categories(self):
+        """Nome do produto (normalizado) -> categoria (normalizada)."""
+        categories = {}
+        for row in range(self.finance_table.rowCount()):
+            name, category = self.finance_table.item(row, 1), self.finance_table.item(row, 2)
+            if name and category and category.text().strip():
+                categories[normalize_text(name.text())] = normalize_text(category.text())
+        return categories
+
+    # --- Ordenação e filtros das grades ---
+    def build_filter_bar(self, table_name):
+        self.row_filters = getattr(self, "row_filters", {})
+        self.row_filters[table_name] = RowFilter()
+        widgets = {}
+
+        layout = QHBoxLayout()
+        label = QLabel("Período:")
+        label.setStyleSheet("color: black;")
+        layout.addWidget(label)
+        for name in ("from", "to"):
+            edit = QDateEdit()
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("dd/MM/yyyy")
+            # A data mínima significa "sem limite"
+            edit.setMinimumDate(QDate(2000, 1, 1))
+            edit.setSpecialValueText("—")
+            edit.setDate(edit.minimumDate())
+            edit.setStyleSheet("background-color: white; color: black;")
+            edit.dateChanged.connect(lambda _, t=table_name: self.on_filter_changed(t))
+            layout.addWidget(edit)
+            widgets[name] = edit
+
+        category = QComboBox()
+        category.addItem("Todas as categorias")
+        category.setStyleSheet("background-color: white; color: black;")
+        category.currentIndexChanged.connect(lambda _, t=table_name: self.on_filter_changed(t))
+        layout.addWidget(category)
+        widgets["category"] = category
+
+        if table_name == "vendas":
+            product = QLineEdit()
+            product.setPlaceholderText("Produto...")
+            product.setClearButtonEnabled(True)
+            product.setStyleSheet("background-color: white; color: black; padding: 4px;")
+            product.textChanged.connect(lambda _, t=table_name: self.on_filter_changed(t))
+            layout.addWidget(product)
+            widgets["product"] = product
+
+        layout.addStretch()
+        self.filter_widgets = getattr(self, "filter_widgets", {})
+        self.filter_widgets[table_name] = widgets
+        return layout
+
+    def on_filter_changed(self, table_name):
+        widgets = self.filter_widgets[table_name]
+        row_filter = self.row_filters[table_name]
+        dates = []
+        for name in ("from", "to"):
+            edit = widgets[name]
+            dates.append(None if edit.date() == edit.minimumDate() else edit.date().toPyDate())
+        row_filter.date_from, row_filter.date_to = dates
+        combo = widgets["category"]
+        row_filter.set_category(combo.currentText() if combo.currentIndex() > 0 else "")
+        if "product" in widgets:
+            row_filter.set_product(widgets["product"].text())
+
+        if table_name == "vendas":
+            self.apply_sales_filter()
+        else:
+            self.apply_product_filter()
+
+    def refresh_category_filters(self):
+        categories = sorted({
+            self.finance_table.item(row, 2).text().strip()
+            for row in range(self.finance_table.rowCount())
+            if self.finance_table.item(row, 2) and self.finance_table.item(row, 2).text().strip()
+        }, key=normalize_text)
+        for widgets in self.filter_widgets.values():
+            combo = widgets["category"]
+            current = combo.currentText()
+            if [combo.itemText(i) for i in range(1, combo.count())] == categories:
+                continue
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("Todas as categorias")
+            combo.addItems(categories)
+            index = combo.findText(current)
+            combo.setCurrentIndex(index if index > 0 else 0)
+            combo.blockSignals(False)
+
+    def sort_table(self, table, column):
+        kinds = PRODUCT_COLUMN_KINDS if table is self.finance_table else SALES_COLUMN_KINDS
+        header = table.horizontalHeader()
+        order = Qt.AscendingOrder
+        if header.isSortIndicatorShown() and header.sortIndicatorSection() == column \
+                and header.sortIndicatorOrder() == Qt.AscendingOrder:
+            order = Qt.DescendingOrder
+
+        self.loading_data = True
+        table.setUpdatesEnabled(False)
+        try:
+            # Chaves calculadas só para células cujo texto mudou desde a última ordenação
+            for row in range(table.rowCount()):
+                cell_key(table, row, column, kinds[column])
+            table.sortItems(column, order)
+        finally:
+            table.setUpdatesEnabled(True)
+            self.loading_data = False
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(column, order)
 
     def on_item_changed(self, item):
+        if not self.loading_data:
+            self.mark_rows_changed("produtos")
+        if item.column() == 0 and not self.loading_data:
+            self.normalize_date_item(item)
+        if item.column() <= 6 and not self.loading_data:
+            # Colunas 1-4 alimentam a busca; preço e estoque, margem e giro do dashboard
+            self.index_product_row(item.row())
+            if item.column() == 2:
+                self.refresh_category_filters()
         if not self.loading_data:
             self.save_data()
             self.update_saldo()
@@ -996,8 +2137,19 @@ class MainWindow(QWidget):
 
     def manual_sync(self):
         # Agora chamado automaticamente ou invisivelmente
-        data = self.get_table_data()
-        success, msg = self.db.sync_to_supabase(data)
+        self.sync_in_background(self.get_table_data(), "produtos")
+
+    def sync_in_background(self, data, table_name):
+        # Os dados são lidos da grade aqui, na thread da GUI; só o upsert vai para o pool.
+        # A chave por tabela mantém no máximo um envio rodando e um (o mais recente) na fila.
+        tasks.submit(
+            self.db.sync_to_supabase, data, table_name,
+            priority=tasks.LOW, key=f"sync:{table_name}",
+            on_result=self.on_sync_finished,
+        )
+
+    def on_sync_finished(self, result):
+        success, msg = result
         # Removido feedback visual intrusivo para operação automática
         if not success:
              print(f"Sync error: {msg}")
@@ -1018,9 +2170,25 @@ class MainWindow(QWidget):
         self.finance_table.setCellWidget(row, 6, label)
 
     def check_updates(self):
-        self.update_checker = UpdateChecker()
-        self.update_checker.update_available.connect(self.show_update_notification)
-        self.update_checker.start()
+        # Verifica a cada 60 segundos; cada verificação é uma tarefa curta no pool
+        self.last_notified = None
+        self.update_timer = QTimer(self)
+        self.update_timer.timeout.connect(self.request_update_check)
+        self.update_timer.start(60000)
+        self.request_update_check()
+
+    def request_update_check(self):
+        tasks.submit(check_latest_version, priority=tasks.LOW, key="update-check",
+                     on_result=self.on_update_checked, on_error=lambda msg: None)
+
+    def on_update_checked(self, result):
+        if not result:
+            return
+        remote_version, download_url = result
+        # Notify only if not already notified for this version in this session
+        if remote_version != self.last_notified:
+            self.last_notified = remote_version
+            self.show_update_notification(download_url)
 
     def show_update_notification(self, url):
         self.update_url = url
@@ -1040,11 +2208,12 @@ class MainWindow(QWidget):
         self.notification_bubble.setText("Baixando atualização... 0%")
         self.notification_bubble.setEnabled(False)
         
-        self.downloader = UpdateDownloader(self.update_url)
-        self.downloader.finished.connect(self.install_update)
-        self.downloader.error.connect(self.update_error)
-        self.downloader.progress.connect(self.update_download_progress)
-        self.downloader.start()
+        self.download_task = tasks.submit(
+            download_update, self.update_url, with_task=True, priority=tasks.NORMAL,
+            on_progress=self.update_download_progress,
+            on_result=self.install_update,
+            on_error=self.update_error,
+        )
 
     def update_download_progress(self, percentage):
         self.notification_bubble.setText(f"Baixando atualização... {percentage}%")
@@ -1069,120 +2238,101 @@ class MainWindow(QWidget):
     # --- Funções de controle financeiro ---
     def open_voice_dialog(self):
         fields = ["Data", "Mercadorias", "Categoria", "Descrição", "Código", "Preço", "Quantidade"]
-        dialog = VoiceInputDialog(self, fields=fields, title_text="Adicionar Produtos com Voz")
+        dialog = VoiceInputDialog(self, fields=fields, title_text="Adicionar Produtos com Voz",
+                                  on_items=self.add_voice_products)
         if dialog.exec_() == QDialog.Accepted:
-            data = dialog.get_data()
-            row_pos = self.finance_table.rowCount()
-            self.finance_table.insertRow(row_pos)
-            
-            # Extract basic fields
-            product = data.get("Mercadorias", "")
-            
-            self.finance_table.setItem(row_pos, 0, QTableWidgetItem(data.get("Data", "")))
-            self.finance_table.setItem(row_pos, 1, QTableWidgetItem(product))
-            self.finance_table.setItem(row_pos, 2, QTableWidgetItem(data.get("Categoria", "")))
-            self.finance_table.setItem(row_pos, 3, QTableWidgetItem(data.get("Descrição", "")))
-            self.finance_table.setItem(row_pos, 4, QTableWidgetItem(data.get("Código", "")))
-            
-            # Price Processing
-            preco_str = data.get("Preço", "0.00")
-            match_price = re.search(r'(\d+(?:[.,]\d{1,2})?)', preco_str)
-            price_val = 0.0
-            if match_price:
-                price_clean = match_price.group(1).replace(",", ".")
-                price_val = float(price_clean)
-            else:
-                price_clean = "0.00"
-                
-            # Quantity Processing
-            qty_str = data.get("Quantidade", "0")
-            match_qty = re.search(r'(\d+)', qty_str)
-            qty_val = 0
-            if match_qty:
-                qty_val = int(match_qty.group(1))
-            
-            # Type Processing
-            type_val = data.get("Tipo", "Unidade")
-            
-            # Calculate Total (If qty is 0/empty, assume 1 for total calculation but keep 0 in display if desired? 
-            # Or just calc based on qty. If 0, total is 0. But usually user implies 1 if not specified.)
-            # Let's assume if 0, use 1 for price check, but user explicitly asked for quantity logic.
-            # If user doesn't say quantity, qty_val is 0. Total 0? That would be weird for "Arroz 10 reais".
-            # Let's use 1 if qty_val is 0.
-            calc_qty = qty_val if qty_val > 0 else 1
-            total_val = price_val * calc_qty
-            
-            # Set Price Item with UserRole for Total
-            item_price = QTableWidgetItem(f"{price_val:.2f}")
-            item_price.setData(Qt.UserRole, total_val)
-            self.finance_table.setItem(row_pos, 5, item_price)
-            
-            # Stock (Default 0)
-            self.finance_table.setItem(row_pos, 6, QTableWidgetItem("0"))
-            
-            # Quantity Column Message
-            msg = ""
-            if qty_val > 0:
-                if type_val == "Caixa":
-                    msg = f"{qty_val} caixas de {product}, cada caixa custa {price_val:.2f}, e o valor final somado das {qty_val} caixas é {total_val:.2f}"
-                else:
-                    # Unidade
-                    msg = f"{qty_val} {product}, Cada unidade custa {price_val:.2f}, valor final somado das {qty_val} {product} é {total_val:.2f}"
-            else:
-                msg = "0"
-            
-            item_qty = QTableWidgetItem(msg)
-            item_qty.setToolTip(f"Valor Final Total: R$ {total_val:.2f}")
-            self.finance_table.setItem(row_pos, 7, item_qty)
-            
-            self.update_saldo()
-            self.save_data()
+            self.add_voice_products(dialog.get_items())
+
+    def resolve_voice_item(self, data):
+        """Venda falada: troca o nome ("arros") pelo produto cadastrado que soa igual
+        ("Arroz") e preenche o valor unitário vazio a partir do catálogo.
+
+        Só o diálogo de vendas usa: no de produtos o nome falado é um produto novo
+        e não pode virar um já cadastrado."""
+        name = data.get("Produto")
+        doc = self.product_matcher.match(name) if name else None
+        if doc is None:
+            return data
+        data = dict(data)
+        data["Produto"] = self.product_matcher.names[doc]
+        entry = self.product_catalog.rows.get(doc)
+        cents = entry[2] if entry else 0
+        if cents and "Valor Unit." in data and not data["Valor Unit."]:
+            data["Valor Unit."] = f"{cents / 100:.2f}"
+        return data
 
-    def open_sales_voice_dialog(self):
-        fields = ["Data", "Produto", "Quantidade", "Valor Unit.", "Total"]
-        dialog = VoiceInputDialog(self, fields=fields, title_text="Adicionar Vendas com Voz")
-        if dialog.exec_() == QDialog.Accepted:
-            data = dialog.get_data()
-            row_pos = self.sales_table.rowCount()
-            self.sales_table.insertRow(row_pos)
-            
-            # Extract basic fields
-            date = data.get("Data", "")
-            product = data.get("Produto", "")
-            
-            # Quantity
-            qty_str = data.get("Quantidade", "0")
-            match_qty = re.search(r'(\d+)', qty_str)
-            qty_val = int(match_qty.group(1)) if match_qty else 0
-            
-            # Unit Value
-            unit_str = data.get("Valor Unit.", "0.00")
-            match_price = re.search(r'(\d+(?:[.,]\d{1,2})?)', unit_str)
-            unit_val = float(match_price.group(1).replace(",", ".")) if match_price else 0.00
-            
-            # Total
-            total_val = unit_val * qty_val
-            
-            self.sales_table.setItem(row_pos, 0, QTableWidgetItem(date))
-            self.sales_table.setItem(row_pos, 1, QTableWidgetItem(product))
-            self.sales_table.setItem(row_pos, 2, QTableWidgetItem(str(qty_val)))
-            self.sales_table.setItem(row_pos, 3, QTableWidgetItem(f"{unit_val:.2f}"))
-            self.sales_table.setItem(row_pos, 4, QTableWidgetItem(f"{total_val:.2f}"))
+    def add_voice_products(self, items):
+        """Insere os itens ditados como um lote: um recálculo, um save e um sync."""
+        built = [self.voice_product_record(data) for data in items]
+
+        def finish_row(row, index):
+            _, total_val, _ = built[index]
+            # Total calculado pela voz (preço x quantidade), usado no saldo
+            self.finance_table.item(row, 5).setData(Qt.UserRole, total_val)
+            self.finance_table.item(row, 7).setToolTip(f"Valor Final Total: R$ {total_val:.2f}")
+
+        self.insert_records("produtos", [record for record, _, _ in built], on_row=finish_row,
+                            metrics=voice_metrics.metrics)
+
+    def voice_product_record(self, data):
+        """(registro, total, mensagem da coluna Quantidade) de um item ditado."""
+        product = data.get("Mercadorias", "")
+        
+        # Price Processing
+        preco_str = data.get("Preço", "0.00")
+        match_price = re.search(r'(\d+(?:[.,]\d{1,2})?)', preco_str)
+        price_val = 0.0
+        if match_price:
+            price_val = float(match_price.group(1).replace(",", "."))
             
-            self.update_sales_total()
-            self.save_sales_data()
+        # Quantity Processing
+        qty_str = data.get("Quantidade", "0")
+        match_qty = re.search(r'(\d+)', qty_str)
+        qty_val = 0
+        if match_qty:
+            qty_val = int(match_qty.group(1))
+        
+        # Type Processing
+        type_val = data.get("Tipo", "Unidade")
+        
+        # Sem quantidade falada ("Arroz 10 reais"), o total considera 1
+        calc_qty = qty_val if qty_val > 0 else 1
+        total_val = price_val * calc_qty
+        
+        # Quantity Column Message
+        msg = ""
+        if qty_val > 0:
+            if type_val == "Caixa":
+                msg = f"{qty_val} caixas de {product}, cada caixa custa {price_val:.2f}, e o valor final somado das {qty_val} caixas é {total_val:.2f}"
+            else:
+                # Unidade
+                msg = f"{qty_val} {product}, Cada unidade custa {price_val:.2f}, valor final somado das {qty_val} {product} é {total_val:.2f}"
+        else:
+            msg = "0"
+        
+        record = {
+            "data": normalize_date(data.get("Data", "")),
+            "mercadorias": product,
+            "categoria": data.get("Categoria", ""),
+            "descricao": data.get("Descrição", ""),
+            "codigo": data.get("Código", ""),
+            "preco": f"{price_val:.2f}",
+            "estoque": "0",
+            "quantidade": msg,
+        }
+        return record, total_val, msg
 
     def add_row(self):
         row_pos = self.finance_table.rowCount()
         self.finance_table.insertRow(row_pos)
-        self.finance_table.setItem(row_pos, 0, QTableWidgetItem(""))
-        self.finance_table.setItem(row_pos, 1, QTableWidgetItem(""))
-        self.finance_table.setItem(row_pos, 2, QTableWidgetItem(""))
-        self.finance_table.setItem(row_pos, 3, QTableWidgetItem(""))
-        self.finance_table.setItem(row_pos, 4, QTableWidgetItem(""))
-        self.finance_table.setItem(row_pos, 5, QTableWidgetItem("0.00"))
-        self.finance_table.setItem(row_pos, 6, QTableWidgetItem(""))
-        self.finance_table.setItem(row_pos, 7, QTableWidgetItem("0"))
+        self.finance_table.setItem(row_pos, 0, GridItem(""))
+        self.finance_table.setItem(row_pos, 1, GridItem(""))
+        self.finance_table.setItem(row_pos, 2, GridItem(""))
+        self.finance_table.setItem(row_pos, 3, GridItem(""))
+        self.finance_table.setItem(row_pos, 4, GridItem(""))
+        self.finance_table.setItem(row_pos, 5, GridItem("0.00"))
+        self.finance_table.setItem(row_pos, 6, GridItem(""))
+        self.finance_table.setItem(row_pos, 7, GridItem("0"))
         self.update_saldo()
         self.save_data()
 
@@ -1219,6 +2369,7 @@ class MainWindow(QWidget):
                 # Índice é val - 1
                 idx = val - 1
                 if 0 <= idx < rows:
+                    self.unindex_product_row(idx)
                     self.finance_table.removeRow(idx)
                     self.update_saldo()
                     self.save_data()
@@ -1250,6 +2401,8 @@ class MainWindow(QWidget):
                         continue
         self.saldo_label.setText(f"Saldo Total: R$ {total:.2f}")
         self.saldo_label.setStyleSheet(f"font-weight: bold; color: {'green' if total>=0 else 'red'};")
+        self.refresh_stock_alerts()
+        self.dashboard_panel.mark_dirty()
 
     # --- Navigation ---
     def show_produtos(self):
@@ -1264,6 +2417,12 @@ class MainWindow(QWidget):
         else:
             self.stack.setCurrentWidget(self.vendas_panel)
 
+    def show_dashboard(self):
+        if self.stack.currentWidget() == self.dashboard_panel:
+            self.stack.setCurrentWidget(self.empty_panel)
+        else:
+            self.stack.setCurrentWidget(self.dashboard_panel)
+
     # --- Sales Logic ---
     def get_sales_data(self):
         data = []
@@ -1288,113 +2447,134 @@ class MainWindow(QWidget):
         return data
 
     def load_sales_data(self):
-        try:
-            local_data = self.db.load_local("sales.json")
-            cloud_data = None
-            if self.db.user:
-                 cloud_data = self.db.load_from_supabase("vendas")
-
-            if cloud_data is not None and len(cloud_data) > 0:
-                data = cloud_data
-                self.db.save_local(data, "sales.json")
-            elif local_data:
-                data = local_data
-                if cloud_data is not None and len(cloud_data) == 0:
-                     threading.Thread(target=self.manual_sync_sales, daemon=True).start()
-            else:
-                data = []
+        if not self.prefetched.get("vendas"):
+            self.populate_sales(self.db.load_local("sales.json"))
 
+    def populate_sales(self, data):
+        self.loading_data = True
+        try:
             self.sales_table.setRowCount(0)
-            keys = ["data", "produto", "quantidade", "valor_unit", "total"]
+            self.mark_rows_changed("vendas")
             
             for row_data in data:
                 row = self.sales_table.rowCount()
                 self.sales_table.insertRow(row)
-                
-                sale_id = row_data.get('id')
-
-                for col, key in enumerate(keys):
-                    val = row_data.get(key, "")
-                    item = QTableWidgetItem(str(val))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    
-                    if col == 0 and sale_id:
-                        item.setData(Qt.UserRole + 1, sale_id)
-
-                    self.sales_table.setItem(row, col, item)
+                self.fill_sale_row(row, row_data)
             
+            self.rebuild_sales_analytics()
             self.update_sales_total()
         except Exception as e:
             print(f"Erro ao carregar vendas: {e}")
+        finally:
+            self.loading_data = False
 
     def save_sales_data(self):
         data = self.get_sales_data()
-        self.db.save_local(data, "sales.json")
-        threading.Thread(target=self.manual_sync_sales, daemon=True).start()
+        self.save_table("vendas", data)
+        self.sync_in_background(data, "vendas")
 
     def manual_sync_sales(self):
-        data = self.get_sales_data()
-        self.db.sync_to_supabase(data, "vendas")
+        self.sync_in_background(self.get_sales_data(), "vendas")
 
     def on_sale_changed(self, item):
+        if self.loading_data:
+            return
+        self.mark_rows_changed("vendas")
+        if item.column() == 0:
+            self.normalize_date_item(item)
+        self.index_sale_row(item.row())
         self.update_sales_total()
         self.save_sales_data()
 
     def open_sales_voice_dialog(self):
         fields = ["Data", "Produto", "Quantidade", "Valor Unit.", "Total"]
-        dialog = VoiceInputDialog(self, fields=fields, title_text="Adicionar Vendas com Voz")
+        dialog = VoiceInputDialog(self, fields=fields, title_text="Adicionar Vendas com Voz",
+                                  on_items=self.add_voice_sales, resolve=self.resolve_voice_item)
         if dialog.exec_() == QDialog.Accepted:
-            data = dialog.get_data()
-            row = self.sales_table.rowCount()
-            self.sales_table.insertRow(row)
-            
-            # Helper to safely get float
-            def get_float(val_str):
-                try:
-                    match = re.search(r'(\d+(?:[.,]\d{1,2})?)', val_str)
-                    if match:
-                        return float(match.group(1).replace(",", "."))
-                    return 0.0
-                except:
-                    return 0.0
-
-            # Data
-            self.sales_table.setItem(row, 0, QTableWidgetItem(data.get("Data", "")))
-            # Produto
-            self.sales_table.setItem(row, 1, QTableWidgetItem(data.get("Produto", "")))
-            
-            # Quantidade
-            qty_str = data.get("Quantidade", "0")
+            self.add_voice_sales(dialog.get_items())
+
+    def add_voice_sales(self, items):
+        """Insere as vendas ditadas como um lote: um recálculo, um save e um sync."""
+        self.insert_records("vendas", [self.voice_sale_record(data) for data in items],
+                            metrics=voice_metrics.metrics)
+
+    def voice_sale_record(self, data):
+        # Helper to safely get float
+        def get_float(val_str):
             try:
-                match_qty = re.search(r'(\d+)', qty_str)
-                qty = int(match_qty.group(1)) if match_qty else 0
+                match = re.search(r'(\d+(?:[.,]\d{1,2})?)', val_str)
+                if match:
+                    return float(match.group(1).replace(",", "."))
+                return 0.0
             except:
-                qty = 0
-            self.sales_table.setItem(row, 2, QTableWidgetItem(str(qty)))
-            
-            # Valor Unit.
-            val_unit_str = data.get("Valor Unit.", "0.00")
-            val_unit = get_float(val_unit_str)
-            self.sales_table.setItem(row, 3, QTableWidgetItem(f"{val_unit:.2f}"))
-            
-            # Total
-            total_str = data.get("Total", "")
-            if total_str:
-                total = get_float(total_str)
-            else:
-                total = qty * val_unit
-            
-            self.sales_table.setItem(row, 4, QTableWidgetItem(f"{total:.2f}"))
-            
-            self.update_sales_total()
-            self.save_sales_data()
+                return 0.0
+
+        # Quantidade
+        qty_str = data.get("Quantidade", "0")
+        try:
+            match_qty = re.search(r'(\d+)', qty_str)
+            qty = int(match_qty.group(1)) if match_qty else 0
+        except:
+            qty = 0
+        
+        # Valor Unit.
+        val_unit = get_float(data.get("Valor Unit.", "0.00"))
+        
+        # Total
+        total_str = data.get("Total", "")
+        if total_str:
+            total = get_float(total_str)
+        else:
+            total = qty * val_unit
+        
+        return {
+            "data": normalize_date(data.get("Data", "")),
+            "produto": data.get("Produto", ""),
+            "quantidade": str(qty),
+            "valor_unit": f"{val_unit:.2f}",
+            "total": f"{total:.2f}",
+        }
+
+    def add_sale_by_code(self):
+        codigo = self.scan_input.text().strip()
+        if not codigo:
+            return
+        # Catálogo em memória: já reflete a grade, mesmo com a gravação ainda pendente
+        key = self.product_catalog.find_code(codigo)
+        row = self.find_product_row(key) if key is not None else None
+        if row is None:
+            self.scan_input.selectAll()
+            QMessageBox.warning(self, "Aviso", f"Produto com código {codigo} não encontrado.")
+            return
+        price = self.product_catalog.rows[key][2] / 100
+
+        self.loading_data = True
+        self.mark_rows_changed("vendas")
+        try:
+            row = self.sales_table.rowCount()
+            self.sales_table.insertRow(row)
+            self.fill_sale_row(row, {
+                "data": normalize_date("hoje"),
+                "produto": self.finance_table.item(row, 1).text(),
+                "quantidade": "1",
+                "valor_unit": f"{price:.2f}",
+                "total": f"{price:.2f}",
+            })
+            self.index_sale_row(row)
+        finally:
+            self.loading_data = False
+
+        self.scan_input.clear()
+        self.update_sales_total()
+        self.save_sales_data()
 
     def add_sale_row(self):
         row = self.sales_table.rowCount()
         self.sales_table.insertRow(row)
         # Add empty items
         for i in range(5):
-            self.sales_table.setItem(row, i, QTableWidgetItem(""))
+            self.sales_table.setItem(row, i, GridItem(""))
+        self.index_sale_row(row)
         self.save_sales_data()
 
     def remove_sale_row(self):
@@ -1421,21 +2601,16 @@ class MainWindow(QWidget):
         if dialog.exec_():
             idx = dialog.intValue() - 1
             if 0 <= idx < rows:
+                self.unindex_sale_row(idx)
                 self.sales_table.removeRow(idx)
                 self.update_sales_total()
                 self.save_sales_data()
 
     def update_sales_total(self):
-        total = 0.0
-        for row in range(self.sales_table.rowCount()):
-            item = self.sales_table.item(row, 4) # Total column
-            if item:
-                try:
-                    val = float(item.text().replace(",", "."))
-                    total += val
-                except:
-                    pass
+        # Total mantido pelo SalesAnalytics: não varre a grade a cada venda
+        total = self.sales_analytics.total()[1] / 100
         self.sales_total_label.setText(f"Total Vendas: R$ {total:.2f}")
+        self.dashboard_panel.mark_dirty()
 
     # --- Funções de UI ---
     def toggle_settings_panel(self):
@@ -1458,6 +2633,21 @@ class MainWindow(QWidget):
         lang = self.lang_combo.currentText()
         self.title_bar.title.setText("Búlgaree" if lang == "Português" else "Búlgaree (EN)")
 
+    def change_voice_backend(self):
+        name = self.voice_combo.currentData()
+        QSettings("BulgareeSoft", "Bulgaree").setValue("voice_backend", name)
+        engine = recognizers.get_backend(name)
+        if not engine.available():
+            QMessageBox.warning(self, "Reconhecimento de voz",
+                                f"{engine.label} não está instalado; será usado outro reconhecedor disponível.")
+        elif engine.offline:
+            # Carrega o modelo local já agora, para a primeira fala não pagar o custo
+            tasks.submit(engine.load, priority=tasks.LOW, key="voice_model",
+                         on_error=lambda msg: print(f"Erro ao carregar o modelo de voz: {msg}"))
+
+    def open_voice_diagnostics(self):
+        VoiceDiagnosticsDialog(self).exec_()
+
     def resizeEvent(self, event):
         if hasattr(self, 'sizegrip'):
             rect = self.rect()
@@ -1525,11 +2715,18 @@ if __name__ == "__main__":
     try:
         app = QApplication(sys.argv)
         
+        # Sessão salva: abre direto do cache local e valida o token em segundo plano
+        db = DatabaseManager(connect=False)
+        if db.has_session():
+            window = MainWindow(db_manager=db, restore_session=True)
+            window.show()
+            sys.exit(app.exec_())
+
         # Login
         login = LoginWindow()
         if login.exec_() == QDialog.Accepted:
             # Se login com sucesso, abre a janela principal passando o DB autenticado
-            window = MainWindow(db_manager=login.db)
+            window = MainWindow(db_manager=login.db, prefetched=login.prefetched)
             window.show()
             sys.exit(app.exec_())
         else:
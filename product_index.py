@@ -0,0 +1,156 @@
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from storage import atomic_write
+
+# Layout do arquivo (little-endian):
+#   cabeçalho: magic, nº de registros, nº de slots do hash, tamanho do registro
+#   registros de tamanho fixo, ordenados por código
+#   tabela hash (endereçamento aberto): índice do registro + 1, 0 = vazio
+MAGIC = b"BLGIDX01"
+HEADER = struct.Struct("<8sIII")
+CODE_WIDTH = 32
+NAME_WIDTH = 64
+RECORD = struct.Struct(f"<{CODE_WIDTH}sIqi{NAME_WIDTH}s")
+SLOT = struct.Struct("<I")
+
+
+def encode_code(codigo):
+    return str(codigo or "").strip().upper().encode("utf-8")[:CODE_WIDTH]
+
+
+def to_cents(value):
+    try:
+        return int(round(float(str(value).replace(",", ".")) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_int(value):
+    try:
+        return int(float(str(value).replace(",", ".")))
+    except (TypeError, ValueError):
+        return 0
+
+
+def slot_of(code, mask):
+    return zlib.crc32(code) & mask
+
+
+def build(records, path):
+    """Gera o índice código -> linha a partir da lista de produtos."""
+    entries = []
+    for row, record in enumerate(records):
+        code = encode_code(record.get("codigo"))
+        if not code:
+            continue
+        name = str(record.get("mercadorias", "")).encode("utf-8")[:NAME_WIDTH]
+        entries.append((code, row, to_cents(record.get("preco")), to_int(record.get("estoque")), name))
+    entries.sort(key=lambda e: (e[0], e[1]))
+
+    slots = 8
+    while slots < len(entries) * 2:
+        slots *= 2
+    mask = slots - 1
+    table = array("I", bytes(SLOT.size * slots))
+    for i, entry in enumerate(entries):
+        h = slot_of(entry[0], mask)
+        while table[h]:
+            # Código repetido: o hash aponta para a primeira linha
+            if entries[table[h] - 1][0] == entry[0]:
+                break
+            h = (h + 1) & mask
+        else:
+            table[h] = i + 1
+
+    if sys.byteorder == "big":
+        table.byteswap()
+
+    parts = [HEADER.pack(MAGIC, len(entries), slots, RECORD.size)]
+    parts.extend(RECORD.pack(*entry) for entry in entries)
+    parts.append(table.tobytes())
+    atomic_write(path, b"".join(parts))
+
+
+class ProductIndex:
+    """Índice de produtos por código, mapeado em memória (somente leitura).
+
+    lookup() faz busca exata pelo hash e prefix() busca binária nos
+    registros ordenados; nenhum dos dois carrega o catálogo na memória.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.count, self.slots, record_size = HEADER.unpack_from(self.mm, 0)
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f"{path} não é um índice de produtos válido.")
+        except Exception:
+            self.close()
+            raise
+        self.mtime = os.path.getmtime(path)
+        self.records_start = HEADER.size
+        self.table_start = self.records_start + self.count * RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if getattr(self, "mm", None) is not None:
+            self.mm.close()
+            self.mm = None
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def code_at(self, i):
+        start = self.records_start + i * RECORD.size
+        return self.mm[start:start + CODE_WIDTH].rstrip(b"\0")
+
+    def record(self, i):
+        code, row, cents, estoque, name = RECORD.unpack_from(self.mm, self.records_start + i * RECORD.size)
+        return {
+            "codigo": code.rstrip(b"\0").decode("utf-8", "ignore"),
+            "row": row,
+            "preco": cents / 100,
+            "estoque": estoque,
+            "mercadorias": name.rstrip(b"\0").decode("utf-8", "ignore"),
+        }
+
+    def lookup(self, codigo):
+        """Produto com o código exato, ou None."""
+        code = encode_code(codigo)
+        if not code or not self.count:
+            return None
+        mask = self.slots - 1
+        h = slot_of(code, mask)
+        for _ in range(self.slots):
+            (value,) = SLOT.unpack_from(self.mm, self.table_start + h * SLOT.size)
+            if not value:
+                return None
+            if self.code_at(value - 1) == code:
+                return self.record(value - 1)
+            h = (h + 1) & mask
+        return None
+
+    def prefix(self, prefix, limit=20):
+        """Produtos cujo código começa com 'prefix', em ordem de código."""
+        code = encode_code(prefix)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.code_at(mid) < code:
+                lo = mid + 1
+            else:
+                hi = mid
+        results = []
+        while lo < self.count and len(results) < limit and self.code_at(lo).startswith(code):
+            results.append(self.record(lo))
+            lo += 1
+        return results
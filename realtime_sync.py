@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import traceback
+from decimal import Decimal, InvalidOperation
+
+# Eventos de alteração publicados pelo Supabase Realtime (postgres_changes)
+EVENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+def normalize_payload(payload):
+    """Converte o payload do Realtime (formatos antigo e novo) em (evento, new, old)."""
+    data = payload.get("data", payload) if isinstance(payload, dict) else {}
+    event = data.get("type") or data.get("eventType") or ""
+    # O cliente entrega um Enum de str; usa o valor ("INSERT", ...)
+    event = getattr(event, "value", event)
+    new = data.get("record") or data.get("new") or {}
+    old = data.get("old_record") or data.get("old") or {}
+    return str(event).upper(), dict(new), dict(old)
+
+
+def normalize_value(value):
+    """Valor comparável: números pelo valor ("10.5" == "10,50"), texto sem espaços nas pontas."""
+    text = str(value if value is not None else "").strip()
+    try:
+        number = Decimal(text.replace(",", "."))
+    except InvalidOperation:
+        return text
+    return number if number.is_finite() else text
+
+
+def same_values(current, new, keys):
+    """True se o registro 'new' não muda nenhum dos campos 'keys' de 'current'.
+
+    Usado para descartar o eco dos nossos próprios upserts: o servidor devolve
+    um UPDATE por linha enviada, quase sempre com os mesmos valores.
+    """
+    return all(normalize_value(current.get(key)) == normalize_value(new.get(key)) for key in keys)
+
+
+class RealtimeSubscriber:
+    """Assina alterações das tabelas do usuário no Supabase Realtime.
+
+    O cliente síncrono do supabase-py não suporta Realtime, então um cliente
+    assíncrono roda em um loop asyncio próprio numa thread daemon (fora do
+    pool de tarefas: o loop vive enquanto a assinatura durar, e este módulo
+    não depende do PyQt5, para o cli.py). O callback recebe (tabela, evento,
+    new, old) nessa thread.
+    """
+
+    def __init__(self, url, key, access_token, user_id, tables=("produtos", "vendas")):
+        self.url = url
+        self.key = key
+        self.access_token = access_token
+        self.user_id = user_id
+        self.tables = tuple(tables)
+        self.loop = None
+        self.thread = None
+        self.client = None
+        self.channels = []
+        # stop() pode vir antes do loop começar: a thread confere ao iniciar
+        self.stopped = threading.Event()
+        self.wakeup = None
+
+    def start(self, callback):
+        self.stopped.clear()
+        self.loop = asyncio.new_event_loop()
+        self.wakeup = asyncio.Event()
+        self.thread = threading.Thread(target=self._run, args=(callback,), daemon=True)
+        self.thread.start()
+
+    def _run(self, callback):
+        asyncio.set_event_loop(self.loop)
+        try:
+            if not self.stopped.is_set():
+                self.loop.run_until_complete(self._subscribe(callback))
+                self.loop.run_until_complete(self._wait_stop())
+        except Exception as e:
+            print(f"Erro no Realtime: {e}")
+            traceback.print_exc()
+        finally:
+            self._shutdown()
+
+    async def _wait_stop(self):
+        if not self.stopped.is_set():
+            await self.wakeup.wait()
+
+    async def _subscribe(self, callback):
+        from supabase import acreate_client
+
+        self.client = await acreate_client(self.url, self.key)
+        if self.access_token:
+            await self.client.realtime.set_auth(self.access_token)
+
+        for table in self.tables:
+            if self.stopped.is_set():
+                return
+
+            def on_change(payload, table=table):
+                event, new, old = normalize_payload(payload)
+                if event in EVENTS:
+                    callback(table, event, new, old)
+
+            channel = self.client.channel(f"bulgaree-{table}-{self.user_id}")
+            channel.on_postgres_changes(
+                "*", schema="public", table=table,
+                filter=f"user_id=eq.{self.user_id}", callback=on_change
+            )
+            await channel.subscribe()
+            self.channels.append(channel)
+
+    async def _close(self):
+        for channel in self.channels:
+            try:
+                await channel.unsubscribe()
+            except Exception:
+                pass
+        self.channels = []
+        if self.client:
+            try:
+                await self.client.realtime.close()
+            except Exception:
+                pass
+            self.client = None
+
+    def _shutdown(self):
+        """Fecha o cliente e o loop na própria thread do loop."""
+        try:
+            self.loop.run_until_complete(self._close())
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        except Exception as e:
+            print(f"Erro ao fechar o Realtime: {e}")
+        finally:
+            self.loop.close()
+
+    def stop(self, timeout=3):
+        self.stopped.set()
+        if not self.loop:
+            return
+        try:
+            # Acorda _wait_stop; antes do loop rodar, a chamada fica na fila
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            # Loop já fechado
+            pass
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+
+class LocalRealtimeHub:
+    """Substituto local do Realtime para testes e uso offline.
+
+    Tem a mesma interface de RealtimeSubscriber (start/stop) e entrega os
+    eventos publicados com publish() no mesmo formato de payload do servidor.
+    """
+
+    def __init__(self, tables=("produtos", "vendas")):
+        self.tables = tuple(tables)
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def start(self, callback):
+        with self.lock:
+            self.callbacks.append(callback)
+
+    def stop(self):
+        with self.lock:
+            self.callbacks = []
+
+    def publish(self, table, event, new=None, old=None):
+        if table not in self.tables:
+            return
+        payload = {"data": {"type": event, "table": table, "record": new or {}, "old_record": old or {}}}
+        event, new, old = normalize_payload(payload)
+        with self.lock:
+            callbacks = list(self.callbacks)
+        for callback in callbacks:
+            callback(table, event, new, old)
@@ -0,0 +1,172 @@
+"""Backends de reconhecimento de fala, escolhidos em tempo de execução.
+
+Todos recebem um speech_recognition.AudioData e devolvem o texto, levantando
+sr.UnknownValueError quando nada foi entendido e sr.RequestError quando o
+serviço não responde. Os modelos locais são carregados uma única vez.
+"""
+import json
+import os
+import threading
+import time
+
+import speech_recognition as sr
+
+import voice_metrics
+
+LANGUAGE = "pt-BR"
+SAMPLE_RATE = 16000
+VOSK_MODEL_PATH = os.environ.get("BULGAREE_VOSK_MODEL", os.path.join("modelos", "vosk-model-small-pt-0.3"))
+WHISPER_MODEL = os.environ.get("BULGAREE_WHISPER_MODEL", "small")
+DEFAULT_BACKEND = "google"
+
+
+class BackendUnavailable(RuntimeError):
+    """Backend sem o pacote ou o modelo instalado."""
+
+
+class GoogleBackend:
+    name = "google"
+    label = "Google (online)"
+    offline = False
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def available(self):
+        return True
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio, language=LANGUAGE)
+
+
+class VoskBackend:
+    name = "vosk"
+    label = "Vosk (offline)"
+    offline = True
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        self.model_path = model_path
+        self.model = None
+        self.lock = threading.Lock()
+
+    def available(self):
+        try:
+            import vosk  # noqa: F401
+        except ImportError:
+            return False
+        return os.path.isdir(self.model_path)
+
+    def load(self):
+        with self.lock:
+            if self.model is None:
+                try:
+                    import vosk
+                except ImportError:
+                    raise BackendUnavailable("Para reconhecer offline instale o pacote 'vosk'.")
+                if not os.path.isdir(self.model_path):
+                    raise BackendUnavailable(f"Modelo Vosk não encontrado em {self.model_path}.")
+                vosk.SetLogLevel(-1)
+                self.model = vosk.Model(self.model_path)
+        return self.model
+
+    def recognize(self, audio):
+        model = self.load()
+        import vosk
+        recognizer = vosk.KaldiRecognizer(model, SAMPLE_RATE)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class WhisperBackend:
+    name = "whisper"
+    label = "Whisper (offline)"
+    offline = True
+
+    def __init__(self, model_name=WHISPER_MODEL):
+        self.model_name = model_name
+        self.model = None
+        self.lock = threading.Lock()
+
+    def available(self):
+        try:
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def load(self):
+        with self.lock:
+            if self.model is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError:
+                    raise BackendUnavailable("Para usar o Whisper instale o pacote 'faster-whisper'.")
+                # int8 na CPU: sem GPU e com pouca memória
+                self.model = WhisperModel(self.model_name, device="cpu", compute_type="int8")
+        return self.model
+
+    def recognize(self, audio):
+        model = self.load()
+        import numpy as np
+        raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = model.transcribe(samples, language=LANGUAGE.split("-")[0], beam_size=1)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "whisper": WhisperBackend,
+}
+
+instances = {}
+instances_lock = threading.Lock()
+
+
+def get_backend(name):
+    """Instância compartilhada do backend (o modelo local fica carregado)."""
+    if name not in BACKENDS:
+        raise ValueError(f"Reconhecedor desconhecido: {name}")
+    with instances_lock:
+        if name not in instances:
+            instances[name] = BACKENDS[name]()
+        return instances[name]
+
+
+def recognize(audio, backend=DEFAULT_BACKEND, fallback=True):
+    """Reconhece 'audio' e devolve (texto, backend usado, segundos).
+
+    Com fallback, um backend indisponível ou sem conexão cede a vez aos
+    demais (offline primeiro quando o problema é a rede).
+    """
+    order = [backend]
+    if fallback:
+        order += [name for name in BACKENDS if name != backend and get_backend(name).offline]
+        if DEFAULT_BACKEND not in order:
+            order.append(DEFAULT_BACKEND)
+
+    last_error = None
+    for name in order:
+        engine = get_backend(name)
+        if name != backend and not engine.available():
+            continue
+        start = time.perf_counter()
+        try:
+            text = engine.recognize(audio)
+        except (BackendUnavailable, sr.RequestError) as e:
+            last_error = e
+            continue
+        elapsed = time.perf_counter() - start
+        voice_metrics.record("reconhecimento", elapsed)
+        return text, name, elapsed
+    if isinstance(last_error, BackendUnavailable):
+        raise last_error
+    raise sr.RequestError(str(last_error) if last_error else "Nenhum reconhecedor disponível.")
+
@@ -0,0 +1,295 @@
+import re
+import unicodedata
+from bisect import bisect_left
+
+# Plurais e terminações comuns do português reduzidas a uma forma única
+# ("feijões" -> "feijao", "caixas" -> "caixa", "pães" -> "pao")
+SUFFIXES = (
+    ("oes", "ao", 1),
+    ("aes", "ao", 1),
+    ("ais", "al", 2),
+    ("eis", "el", 2),
+    ("ois", "ol", 2),
+    ("ns", "m", 2),
+    ("s", "", 3),
+)
+
+FUZZY_MIN_LENGTH = 4
+
+
+def normalize_text(text):
+    """Minúsculas, sem acentos e só com letras/números separados por espaço."""
+    text = unicodedata.normalize("NFKD", str(text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+def stem(token):
+    if len(token) <= 3 or token.isdigit():
+        return token
+    for suffix, replacement, min_root in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= min_root:
+            return token[:-len(suffix)] + replacement
+    return token
+
+
+def tokenize(text):
+    return [stem(token) for token in normalize_text(text).split()]
+
+
+def deletions(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class SearchIndex:
+    """Índice invertido com busca por prefixo e tolerância a um erro de digitação.
+
+    Os documentos são identificados por qualquer objeto hashable e podem ser
+    adicionados, atualizados e removidos individualmente.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.postings = {}     # termo -> {doc}
+        self.doc_terms = {}    # doc -> {termo}
+        self.variants = {}     # termo com uma letra a menos -> {termo}
+        self.sorted_terms = []
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def add(self, doc_id, text):
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+        terms = set(tokenize(text))
+        self.doc_terms[doc_id] = terms
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is None:
+                docs = self.postings[term] = set()
+                self.add_term(term)
+            docs.add(doc_id)
+
+    update = add
+
+    def remove(self, doc_id):
+        for term in self.doc_terms.pop(doc_id, ()):
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.discard(doc_id)
+            if not docs:
+                del self.postings[term]
+                self.remove_term(term)
+
+    def add_term(self, term):
+        self.dirty = True
+        if len(term) >= FUZZY_MIN_LENGTH:
+            for variant in deletions(term):
+                self.variants.setdefault(variant, set()).add(term)
+
+    def remove_term(self, term):
+        self.dirty = True
+        if len(term) >= FUZZY_MIN_LENGTH:
+            for variant in deletions(term):
+                terms = self.variants.get(variant)
+                if terms:
+                    terms.discard(term)
+                    if not terms:
+                        del self.variants[variant]
+
+    def prefix_terms(self, prefix):
+        if self.dirty:
+            self.sorted_terms = sorted(self.postings)
+            self.dirty = False
+        terms = []
+        i = bisect_left(self.sorted_terms, prefix)
+        while i < len(self.sorted_terms) and self.sorted_terms[i].startswith(prefix):
+            terms.append(self.sorted_terms[i])
+            i += 1
+        return terms
+
+    def fuzzy_terms(self, token):
+        """Termos a no máximo uma inserção, remoção ou troca de letra."""
+        if len(token) < FUZZY_MIN_LENGTH:
+            return set()
+        found = set(self.variants.get(token, ()))
+        for variant in deletions(token):
+            if variant in self.postings:
+                found.add(variant)
+            found.update(self.variants.get(variant, ()))
+        return found
+
+    def match_token(self, token):
+        docs = set()
+        terms = self.prefix_terms(token)
+        if not terms:
+            terms = self.fuzzy_terms(token)
+        for term in terms:
+            docs.update(self.postings[term])
+        return docs
+
+    def search(self, query):
+        """Documentos que casam com todas as palavras da busca.
+
+        Retorna None para busca vazia (nenhum filtro).
+        """
+        tokens = normalize_text(query).split()
+        if not tokens:
+            return None
+        result = None
+        # A última palavra pode estar incompleta (o usuário ainda digita):
+        # todas casam por prefixo, então não aplicamos o radical na busca
+        for token in sorted(set(tokens), key=len, reverse=True):
+            docs = self.match_token(token)
+            if not docs and stem(token) != token:
+                docs = self.match_token(stem(token))
+            result = docs if result is None else result & docs
+            if not result:
+                return set()
+        return result
+
+
+# Grafias com o mesmo som no português, aplicadas em ordem sobre o texto sem acentos
+PHONETIC_RULES = [(re.compile(pattern), replacement) for pattern, replacement in (
+    (r"ph", "f"),
+    (r"lh", "li"),
+    (r"nh", "ni"),
+    (r"[cs]h", "x"),
+    (r"qu(?=[ei])", "k"),
+    (r"gu(?=[ei])", "g"),
+    (r"sc(?=[ei])|xc(?=[ei])|c(?=[ei])", "s"),
+    (r"[cq]", "k"),
+    (r"g(?=[ei])", "j"),
+    (r"z", "s"),
+    (r"y", "i"),
+    (r"w", "v"),
+    (r"h", ""),
+    (r"l(?=[^aeiou]|$)", "u"),
+    (r"n(?=[^aeiou]|$)", "m"),
+    (r"e$", "i"),
+    (r"o$", "u"),
+    (r"(.)\1+", r"\1"),
+)]
+
+
+def phonetic_key(word):
+    """Chave fonética de uma palavra: "arros", "arroz" e "aroz" -> "aros"."""
+    word = str(word or "").lower().replace("ç", "s")
+    word = normalize_text(word).replace(" ", "")
+    if word.isdigit():
+        return word
+    for pattern, replacement in PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    return word
+
+
+def phonetic_keys(text):
+    return [phonetic_key(token) for token in normalize_text(str(text or "").lower().replace("ç", "s")).split()]
+
+
+class PhoneticIndex:
+    """Resolve um nome falado para um produto cadastrado pelo som das palavras.
+
+    Cada nome é guardado com a chave fonética de cada palavra e, como no
+    SearchIndex, as variantes com uma letra a menos, tudo calculado ao indexar.
+    match() soma, por produto, as palavras da fala encontradas nas listas
+    dessas chaves, sem comparar o texto com o catálogo inteiro.
+    """
+
+    def __init__(self, min_score=0.6):
+        self.min_score = min_score
+        self.clear()
+
+    def clear(self):
+        self.names = {}       # doc -> nome exibido
+        self.doc_keys = {}    # doc -> [chave fonética por palavra]
+        self.exact = {}       # nome normalizado -> {doc: None}, na ordem de cadastro
+        self.postings = {}    # chave fonética -> {doc}
+        self.variants = {}    # chave com uma letra a menos -> {doc}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, doc_id, name):
+        if doc_id in self.names:
+            self.remove(doc_id)
+        keys = phonetic_keys(name)
+        if not keys:
+            return
+        self.names[doc_id] = str(name).strip()
+        self.doc_keys[doc_id] = keys
+        self.exact.setdefault(normalize_text(name), {})[doc_id] = None
+        for key in keys:
+            self.postings.setdefault(key, set()).add(doc_id)
+            for variant in self.key_variants(key):
+                self.variants.setdefault(variant, set()).add(doc_id)
+
+    update = add
+
+    def remove(self, doc_id):
+        name = self.names.pop(doc_id, None)
+        keys = self.doc_keys.pop(doc_id, None)
+        if name is None:
+            return
+        normalized = normalize_text(name)
+        docs = self.exact.get(normalized)
+        if docs:
+            # Outro produto com o mesmo nome passa a responder pela busca exata
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.exact[normalized]
+        for key in keys:
+            self.discard(self.postings, key, doc_id)
+            for variant in self.key_variants(key):
+                self.discard(self.variants, variant, doc_id)
+
+    def discard(self, mapping, term, doc_id):
+        docs = mapping.get(term)
+        if docs:
+            docs.discard(doc_id)
+            if not docs:
+                del mapping[term]
+
+    def key_variants(self, key):
+        return deletions(key) if len(key) >= FUZZY_MIN_LENGTH else ()
+
+    def token_matches(self, key):
+        """{doc: peso} dos produtos com uma palavra de som igual (1) ou a uma letra (0.8)."""
+        found = {}
+        if len(key) >= FUZZY_MIN_LENGTH:
+            # Letra a mais na fala, a menos ou trocada
+            fuzzy = [self.variants.get(key, ())]
+            for variant in deletions(key):
+                fuzzy.append(self.postings.get(variant, ()))
+                fuzzy.append(self.variants.get(variant, ()))
+            for docs in fuzzy:
+                for doc in docs:
+                    found[doc] = 0.8
+        for doc in self.postings.get(key, ()):
+            found[doc] = 1.0
+        return found
+
+    def match(self, text):
+        """Doc do produto cujo nome soa como 'text', ou None.
+
+        Vale a fração das palavras faladas encontradas no nome (mínimo
+        min_score); no empate, o nome com menos palavras sobrando.
+        """
+        docs = self.exact.get(normalize_text(text))
+        if docs:
+            return next(iter(docs))
+        query = set(phonetic_keys(text))
+        if not query:
+            return None
+        scores = {}
+        for key in query:
+            for doc, weight in self.token_matches(key).items():
+                scores[doc] = scores.get(doc, 0) + weight
+        if not scores:
+            return None
+        best = max(scores, key=lambda doc: (scores[doc], -len(self.doc_keys[doc])))
+        return best if scores[best] / len(query) >= self.min_score else None
@@ -0,0 +1,170 @@
+import codecs
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JSONSerializer:
+    """JSON compacto; usa orjson quando instalado (mesmo formato, bem mais rápido)."""
+    name = "json"
+
+    def dumps(self, data):
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, raw):
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw.decode("utf-8-sig"))
+
+
+class PrettyJSONSerializer(JSONSerializer):
+    """Formato antigo: JSON indentado, legível no bloco de notas."""
+    name = "json-pretty"
+
+    def dumps(self, data):
+        return json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+
+
+class MsgpackSerializer:
+    """Binário compacto (msgpack)."""
+    name = "msgpack"
+
+    def dumps(self, data):
+        if msgpack is None:
+            raise ValueError("O formato msgpack requer o pacote 'msgpack'.")
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, raw):
+        if msgpack is None:
+            raise ValueError("O arquivo está em msgpack; instale o pacote 'msgpack'.")
+        return msgpack.unpackb(raw, raw=False)
+
+
+SERIALIZERS = {s.name: s for s in (JSONSerializer(), PrettyJSONSerializer(), MsgpackSerializer())}
+DEFAULT_FORMAT = "json"
+
+
+def get_serializer(name):
+    if name not in SERIALIZERS:
+        raise ValueError(f"Formato desconhecido: {name} (use {', '.join(SERIALIZERS)})")
+    return SERIALIZERS[name]
+
+
+def detect_format(head):
+    """Identifica o formato pelos primeiros bytes do arquivo."""
+    head = head.lstrip(codecs.BOM_UTF8).lstrip()
+    if not head or head[:1] in (b"[", b"{"):
+        return "json"
+    first = head[0]
+    # fixarray, array16, array32, fixmap, map16, map32
+    if 0x90 <= first <= 0x9f or 0x80 <= first <= 0x8f or first in (0xdc, 0xdd, 0xde, 0xdf):
+        return "msgpack"
+    raise ValueError("Formato de arquivo local não reconhecido.")
+
+
+def dumps(data, fmt=DEFAULT_FORMAT):
+    return get_serializer(fmt).dumps(data)
+
+
+def loads(raw):
+    """Decodifica bytes detectando o formato automaticamente."""
+    return get_serializer(detect_format(raw[:64])).loads(raw)
+
+
+def load_file(filename):
+    with open(filename, "rb") as f:
+        return loads(f.read())
+
+
+def file_format(filename):
+    with open(filename, "rb") as f:
+        return detect_format(f.read(64))
+
+
+def iter_json_array(filename, progress=None, chunk_size=65536):
+    """Lê um arquivo JSON no formato [ {...}, {...} ] registro a registro.
+
+    A memória usada não depende do tamanho do arquivo. 'progress', se
+    informado, recebe a fração (0.0 a 1.0) do arquivo já lida.
+    """
+    if not os.path.exists(filename):
+        return
+    size = os.path.getsize(filename) or 1
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    started = False
+    read = 0
+    with open(filename, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            read += len(chunk)
+            buf += utf8.decode(chunk, final=not chunk)
+            pos = 0
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if pos >= len(buf):
+                    break
+                if not started:
+                    if buf[pos] != "[":
+                        raise ValueError(f"{filename} não contém uma lista JSON.")
+                    started = True
+                    pos += 1
+                    continue
+                if buf[pos] == "]":
+                    return
+                try:
+                    obj, pos = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise ValueError(f"{filename} está truncado ou corrompido.")
+                    break
+                yield obj
+            buf = buf[pos:]
+            if progress:
+                progress(min(read / size, 1.0))
+            if not chunk:
+                if started:
+                    raise ValueError(f"{filename} está truncado ou corrompido.")
+                return
+
+
+def iter_msgpack_array(filename, progress=None):
+    if msgpack is None:
+        raise ValueError(f"{filename} está em msgpack; instale o pacote 'msgpack'.")
+    with open(filename, "rb") as f:
+        unpacker = msgpack.Unpacker(f, raw=False)
+        try:
+            count = unpacker.read_array_header()
+        except Exception:
+            raise ValueError(f"{filename} não contém uma lista msgpack.")
+        for index in range(count):
+            try:
+                yield unpacker.unpack()
+            except Exception:
+                raise ValueError(f"{filename} está truncado ou corrompido.")
+            if progress and index % 1000 == 999:
+                progress((index + 1) / count)
+        if progress:
+            progress(1.0)
+
+
+def iter_file(filename, progress=None):
+    """Percorre uma lista de registros, em qualquer formato, sem carregá-la inteira."""
+    if not os.path.exists(filename):
+        return iter(())
+    if file_format(filename) == "msgpack":
+        return iter_msgpack_array(filename, progress)
+    return iter_json_array(filename, progress)
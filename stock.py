@@ -0,0 +1,59 @@
+from analytics import to_units
+
+
+class StockAlertEngine:
+    """Alertas de estoque mínimo avaliados só para os produtos alterados.
+
+    update() registra o estoque e os limites (estoque_meta) de uma linha e a
+    marca como pendente; evaluate() confere apenas as pendentes e devolve as
+    que acabaram de entrar ou sair do estoque baixo. low_stock() lista as que
+    estão abaixo do mínimo sem percorrer o catálogo.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.levels = {}     # chave da linha -> (nome, estoque, mínimo, máximo)
+        self.low = {}        # chave da linha -> (nome, estoque, mínimo)
+        self.pending = set()
+
+    def update(self, key, name, estoque, meta=None):
+        meta = meta if isinstance(meta, dict) else {}
+        text = str(estoque or "").strip()
+        level = (
+            str(name or "").strip(),
+            to_units(text) if text else None,
+            int(meta.get("min") or 0),
+            int(meta.get("max") or 0),
+        )
+        if self.levels.get(key) != level:
+            self.levels[key] = level
+            self.pending.add(key)
+
+    def remove(self, key):
+        self.levels.pop(key, None)
+        self.pending.add(key)
+
+    def is_low(self, level):
+        name, estoque, minimum, _ = level
+        # Sem mínimo definido ou estoque não controlado (vazio): sem alerta
+        return minimum > 0 and estoque is not None and estoque <= minimum
+
+    def evaluate(self):
+        """(entraram, saíram): chaves que mudaram de situação desde a última avaliação."""
+        entered, left = [], []
+        for key in self.pending:
+            level = self.levels.get(key)
+            if level is not None and self.is_low(level):
+                if key not in self.low:
+                    entered.append(key)
+                self.low[key] = level[:3]
+            elif self.low.pop(key, None) is not None:
+                left.append(key)
+        self.pending.clear()
+        return entered, left
+
+    def low_stock(self):
+        """[(nome, estoque, mínimo)] ordenado pelo quanto falta para o mínimo."""
+        return sorted(self.low.values(), key=lambda item: item[1] - item[2])
@@ -0,0 +1,143 @@
+import glob
+import gzip
+import os
+import stat
+import tempfile
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Lida uma vez na importação: os.umask só consulta trocando, o que não é seguro com threads
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def atomic_write(filename, data, mode=None):
+    """Grava 'data' (bytes) num arquivo temporário e renomeia por cima do destino.
+
+    Uma queda no meio da gravação deixa o arquivo antigo intacto, nunca um
+    arquivo truncado. O mkstemp cria o temporário com 0600; antes de renomear
+    ele recebe 'mode', ou a permissão do destino atual, ou 0666 menos a umask
+    para um arquivo novo (a mesma de um open() comum).
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    if mode is None:
+        try:
+            mode = stat.S_IMODE(os.stat(filename).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~UMASK
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filename)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def compress(data):
+    """Comprime com zstd se disponível, senão gzip. Retorna (bytes, extensão)."""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), ".zst"
+    return gzip.compress(data, compresslevel=6), ".gz"
+
+
+def decompress(data, path):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ValueError("Backup .zst requer o pacote 'zstandard'.")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if path.endswith(".gz"):
+        return gzip.decompress(data)
+    return data
+
+
+class BackupManager:
+    """Backups comprimidos e rotativos dos arquivos locais.
+
+    Cada backup fica em <pasta>/<nome>.<AAAAMMDD-HHMMSS>.<ext>.zst|.gz e só os
+    'retention' mais recentes são mantidos. Backups automáticos respeitam um
+    intervalo mínimo para não comprimir a cada edição de célula.
+    """
+
+    def __init__(self, directory="backups", retention=10, interval=600):
+        self.directory = directory
+        self.retention = retention
+        self.interval = interval
+        self.last_backup = {}
+
+    def backup_prefix(self, filename):
+        name, ext = os.path.splitext(os.path.basename(filename))
+        return os.path.join(self.directory, name), ext
+
+    def list_backups(self, filename):
+        """Backups de 'filename', do mais recente para o mais antigo."""
+        prefix, ext = self.backup_prefix(filename)
+        paths = glob.glob(f"{glob.escape(prefix)}.*{ext}.*")
+        return sorted(paths, key=lambda p: (os.path.getmtime(p), p), reverse=True)
+
+    def backup(self, filename, force=False):
+        """Cria um backup do arquivo atual. Retorna o caminho ou None."""
+        if not os.path.exists(filename):
+            return None
+        now = time.time()
+        if not force and now - self.last_backup.get(filename, 0) < self.interval:
+            return None
+
+        with open(filename, "rb") as f:
+            data, comp_ext = compress(f.read())
+
+        os.makedirs(self.directory, exist_ok=True)
+        prefix, ext = self.backup_prefix(filename)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        path = f"{prefix}.{stamp}{ext}{comp_ext}"
+        counter = 1
+        while os.path.exists(path):
+            path = f"{prefix}.{stamp}-{counter}{ext}{comp_ext}"
+            counter += 1
+
+        atomic_write(path, data)
+        self.last_backup[filename] = now
+        self.prune(filename)
+        return path
+
+    def prune(self, filename):
+        for path in self.list_backups(filename)[self.retention:]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Erro ao remover backup antigo: {e}")
+
+    def read_backup(self, path):
+        with open(path, "rb") as f:
+            return decompress(f.read(), path)
+
+    def restore(self, filename, path=None, validate=None):
+        """Restaura 'filename' a partir de um backup (o mais recente válido por padrão).
+
+        'validate' recebe os bytes e deve levantar exceção se forem inválidos.
+        Retorna o caminho do backup usado ou None.
+        """
+        candidates = [path] if path else self.list_backups(filename)
+        for candidate in candidates:
+            try:
+                data = self.read_backup(candidate)
+                if validate:
+                    validate(data)
+            except Exception as e:
+                print(f"Backup inválido {candidate}: {e}")
+                continue
+            atomic_write(filename, data)
+            return candidate
+        return None
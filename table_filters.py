@@ -0,0 +1,73 @@
+import re
+
+from dates import stored_date
+from search import normalize_text
+
+# Tipo de cada coluna das grades, para ordenar pelo valor e não pelo texto
+TEXT, NUMBER, MONEY, DATE = range(4)
+PRODUCT_COLUMN_KINDS = [DATE, TEXT, TEXT, TEXT, TEXT, MONEY, NUMBER, NUMBER]
+SALES_COLUMN_KINDS = [DATE, TEXT, NUMBER, MONEY, MONEY]
+
+NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+
+def to_cents(text):
+    match = NUMBER_RE.search(text.replace(".", "").replace(",", ".") if "," in text else text)
+    if not match:
+        return None
+    return int(round(float(match.group(0)) * 100))
+
+
+def sort_key(kind, text):
+    """Chave tipada da célula: (0, valor) quando converte, (1, texto) senão, vazios por último."""
+    text = (text or "").strip()
+    if not text:
+        return (2, "")
+    if kind == DATE:
+        date = stored_date(text)
+        if date:
+            return (0, date.toordinal())
+    elif kind == MONEY:
+        cents = to_cents(text)
+        if cents is not None:
+            return (0, cents)
+    elif kind == NUMBER:
+        # Quantidade pode ser a frase "3 caixas de ..."; vale o primeiro número
+        match = NUMBER_RE.search(text)
+        if match:
+            return (0, float(match.group(0).replace(",", ".")))
+    return (1, normalize_text(text))
+
+
+class RowFilter:
+    """Filtro por período, categoria e produto. Campos vazios não filtram."""
+
+    def __init__(self):
+        self.date_from = None
+        self.date_to = None
+        self.category = ""
+        self.product = ""
+
+    def active(self):
+        return bool(self.date_from or self.date_to or self.category or self.product)
+
+    def set_category(self, category):
+        self.category = normalize_text(category)
+
+    def set_product(self, product):
+        self.product = normalize_text(product)
+
+    def matches(self, date_key, category="", product=""):
+        """date_key é a chave de sort_key(DATE, ...); category/product já normalizados."""
+        if self.date_from or self.date_to:
+            if date_key[0] != 0:
+                return False
+            if self.date_from and date_key[1] < self.date_from.toordinal():
+                return False
+            if self.date_to and date_key[1] > self.date_to.toordinal():
+                return False
+        if self.category and category != self.category:
+            return False
+        if self.product and self.product not in product:
+            return False
+        return True
@@ -0,0 +1,197 @@
+import itertools
+import queue
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Prioridades: menor número sai da fila primeiro
+HIGH, NORMAL, LOW = 0, 1, 2
+
+MAX_WORKERS = 4
+
+
+class Cancelled(Exception):
+    """Levantada por Task.check() quando a tarefa foi cancelada."""
+
+
+class Task:
+    def __init__(self, pool, fn, args, kwargs, priority, key, on_result, on_error, on_progress, with_task):
+        self.pool = pool
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.key = key
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.with_task = with_task
+        self.cancelled = False
+        self.started = False
+        self.done = False
+
+    def cancel(self):
+        """Descarta a tarefa se ainda não começou; se já roda, o resultado é ignorado
+        e a função pode parar antes chamando check()."""
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, value):
+        if self.on_progress and not self.cancelled:
+            self.pool.deliver(self.pool.finish, self, self.on_progress, value)
+
+    def run(self):
+        if self.with_task:
+            return self.fn(self, *self.args, **self.kwargs)
+        return self.fn(*self.args, **self.kwargs)
+
+
+class TaskPool:
+    """Pool limitado de threads com prioridade, cancelamento e coalescência por chave.
+
+    Tarefas com a mesma 'key' (ex.: "sync:produtos") nunca rodam em paralelo e
+    só a mais recente fica na fila: uma rajada de edições vira no máximo um
+    envio em andamento e um pendente. Os callbacks são entregues por 'deliver'
+    (na GUI, QtDispatcher.post os executa na thread principal).
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, deliver=None):
+        self.max_workers = max_workers
+        self.deliver = deliver or (lambda fn, *args: fn(*args))
+        self.queue = queue.PriorityQueue()
+        self.order = itertools.count()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.idle = 0
+        self.pending = {}   # chave -> tarefa na fila ou aguardando
+        self.running = {}   # chave -> tarefa em execução
+        self.waiting = {}   # chave -> tarefa que espera a anterior terminar
+
+    def submit(self, fn, *args, priority=NORMAL, key=None, on_result=None, on_error=None,
+               on_progress=None, with_task=False, **kwargs):
+        """Agenda fn(*args, **kwargs). Com with_task=True a função recebe a Task como
+        primeiro argumento (para check() e progress())."""
+        task = Task(self, fn, args, kwargs, priority, key, on_result, on_error, on_progress, with_task)
+        with self.lock:
+            if key is not None:
+                previous = self.pending.get(key)
+                if previous is not None:
+                    previous.cancel()
+                self.pending[key] = task
+                if key in self.running:
+                    self.waiting[key] = task
+                    return task
+            self.enqueue(task)
+        return task
+
+    def enqueue(self, task):
+        self.queue.put((task.priority, next(self.order), task))
+        # Cria outra thread só quando há mais tarefas na fila do que threads livres
+        if self.queue.qsize() > self.idle and len(self.threads) < self.max_workers:
+            thread = threading.Thread(target=self.worker, daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def worker(self):
+        while True:
+            with self.lock:
+                self.idle += 1
+            _, _, task = self.queue.get()
+            with self.lock:
+                self.idle -= 1
+                if task is None:
+                    return
+                if task.cancelled:
+                    continue
+                task.started = True
+                if task.key is not None:
+                    if self.pending.get(task.key) is task:
+                        del self.pending[task.key]
+                    self.running[task.key] = task
+            self.execute(task)
+            with self.lock:
+                if task.key is not None:
+                    self.running.pop(task.key, None)
+                    following = self.waiting.pop(task.key, None)
+                    if following is not None and not following.cancelled:
+                        self.enqueue(following)
+
+    def execute(self, task):
+        try:
+            result = task.run()
+        except Cancelled:
+            return
+        except Exception as e:
+            if task.on_error:
+                self.deliver(self.finish, task, task.on_error, str(e))
+            elif not task.cancelled:
+                print(f"Erro em tarefa de fundo: {e}")
+                traceback.print_exc()
+            return
+        finally:
+            task.done = True
+        if task.on_result:
+            self.deliver(self.finish, task, task.on_result, result)
+
+    def finish(self, task, callback, value):
+        # Conferido na entrega: a tarefa pode ter sido cancelada (janela fechada) no caminho
+        if not task.cancelled:
+            callback(value)
+
+    def shutdown(self):
+        """Cancela o que está na fila; as tarefas em execução terminam sozinhas."""
+        with self.lock:
+            for task in list(self.pending.values()) + list(self.waiting.values()):
+                task.cancel()
+            for _ in self.threads:
+                self.queue.put((float("inf"), next(self.order), None))
+
+
+class QtDispatcher(QObject):
+    """Entrega callbacks na thread onde foi criado (a da GUI) via sinal enfileirado."""
+
+    posted = pyqtSignal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.posted.connect(self.dispatch)
+
+    def post(self, fn, *args):
+        self.posted.emit(fn, args)
+
+    def dispatch(self, fn, args):
+        fn(*args)
+
+
+# Lanes com threads próprias: o que bloqueia por muito tempo (microfone aberto,
+# espera de uma fala) não ocupa os MAX_WORKERS do pool geral, e uma rajada de
+# saves e syncs não atrasa a voz
+DEFAULT_LANE = "geral"
+LANES = {
+    DEFAULT_LANE: MAX_WORKERS,
+    "voz": 2,        # VoiceWorker (espera a fala, até ~15 s) e reconhecimento
+    "captura": 1,    # thread do microfone (AudioCaptureService)
+}
+
+pools = {}
+pools_lock = threading.Lock()
+dispatcher = None
+
+
+def get_pool(lane=DEFAULT_LANE):
+    """Pool da lane, criado no primeiro uso; o primeiro pool deve nascer na thread da GUI."""
+    global dispatcher
+    with pools_lock:
+        if lane not in pools:
+            if dispatcher is None:
+                dispatcher = QtDispatcher()
+            pools[lane] = TaskPool(LANES[lane], deliver=dispatcher.post)
+        return pools[lane]
+
+
+def submit(fn, *args, lane=DEFAULT_LANE, **kwargs):
+    return get_pool(lane).submit(fn, *args, **kwargs)
@@ -0,0 +1,17 @@
+import pytest
+
+import cli
+
+
+@pytest.mark.parametrize("argv", [
+    ["export", "produtos", "out.csv", "-q"],
+    ["-q", "export", "produtos", "out.csv"],
+    ["import", "vendas", "planilha.csv", "--quiet"],
+    ["compact", "-q", "produtos"],
+])
+def test_quiet_antes_ou_depois_do_comando(argv):
+    assert cli.build_parser().parse_args(argv).quiet
+
+
+def test_sem_quiet():
+    assert not cli.build_parser().parse_args(["export", "produtos", "out.csv"]).quiet
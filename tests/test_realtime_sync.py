@@ -0,0 +1,131 @@
+import asyncio
+import sys
+import threading
+import types
+
+from database import DatabaseManager
+from realtime_sync import LocalRealtimeHub, RealtimeSubscriber, normalize_payload
+
+
+def subscribe(tables=("produtos", "vendas")):
+    hub = LocalRealtimeHub(tables)
+    events = []
+    db = DatabaseManager(connect=False)
+    success, _ = db.subscribe_changes(lambda *event: events.append(event), source=hub)
+    assert success
+    return db, hub, events
+
+
+def test_hub_entrega_insert_update_delete():
+    db, hub, events = subscribe()
+    hub.publish("produtos", "INSERT", new={"id": 1, "mercadorias": "Arroz"})
+    hub.publish("produtos", "UPDATE", new={"id": 1, "mercadorias": "Arroz 5kg"}, old={"id": 1})
+    hub.publish("vendas", "DELETE", old={"id": 7})
+    assert events == [
+        ("produtos", "INSERT", {"id": 1, "mercadorias": "Arroz"}, {}),
+        ("produtos", "UPDATE", {"id": 1, "mercadorias": "Arroz 5kg"}, {"id": 1}),
+        ("vendas", "DELETE", {}, {"id": 7}),
+    ]
+
+
+def test_hub_ignora_tabela_nao_assinada_e_para_no_unsubscribe():
+    db, hub, events = subscribe(tables=("produtos",))
+    hub.publish("vendas", "INSERT", new={"id": 2})
+    db.unsubscribe_changes()
+    hub.publish("produtos", "INSERT", new={"id": 3})
+    assert events == []
+
+
+def test_normalize_payload_formato_novo():
+    payload = {"eventType": "update", "new": {"id": 1}, "old": {"id": 1}}
+    assert normalize_payload(payload) == ("UPDATE", {"id": 1}, {"id": 1})
+
+
+class FakeChannel:
+    def __init__(self, client):
+        self.client = client
+
+    def on_postgres_changes(self, *args, **kwargs):
+        pass
+
+    async def subscribe(self):
+        self.client.subscribed += 1
+
+    async def unsubscribe(self):
+        self.client.unsubscribed += 1
+
+
+class FakeClient:
+    def __init__(self):
+        self.subscribed = 0
+        self.unsubscribed = 0
+        self.closed = False
+        self.realtime = self
+
+    async def set_auth(self, token):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    def channel(self, name):
+        return FakeChannel(self)
+
+
+def fake_supabase(monkeypatch, gate=None):
+    client = FakeClient()
+
+    async def acreate_client(url, key):
+        if gate is not None:
+            # Só segue quando o teste liberar: simula a conexão demorada
+            await asyncio.get_running_loop().run_in_executor(None, gate.wait)
+        return client
+
+    monkeypatch.setitem(sys.modules, "supabase", types.SimpleNamespace(acreate_client=acreate_client))
+    return client
+
+
+def test_subscriber_stop_antes_do_loop_nao_assina(monkeypatch):
+    client = fake_supabase(monkeypatch)
+    subscriber = RealtimeSubscriber("url", "key", None, "u1")
+    subscriber.loop = asyncio.new_event_loop()
+    subscriber.wakeup = asyncio.Event()
+    subscriber.thread = threading.Thread(target=subscriber._run, args=(lambda *a: None,), daemon=True)
+    # stop() antes de a thread começar: o loop não deve assinar nada
+    subscriber.stop(timeout=0)
+    subscriber.thread.start()
+    subscriber.thread.join(3)
+    assert not subscriber.thread.is_alive()
+    assert client.subscribed == 0
+    assert subscriber.loop.is_closed()
+
+
+def test_subscriber_stop_durante_a_conexao_fecha_cliente_e_loop(monkeypatch):
+    gate = threading.Event()
+    client = fake_supabase(monkeypatch, gate)
+    subscriber = RealtimeSubscriber("url", "key", "token", "u1")
+    subscriber.start(lambda *a: None)
+    stopper = threading.Thread(target=subscriber.stop)
+    stopper.start()
+    gate.set()
+    stopper.join(5)
+    subscriber.thread.join(3)
+    assert not subscriber.thread.is_alive()
+    assert client.subscribed == 0
+    assert client.closed
+    assert subscriber.loop.is_closed()
+
+
+def test_subscriber_stop_depois_de_assinar(monkeypatch):
+    client = fake_supabase(monkeypatch)
+    subscriber = RealtimeSubscriber("url", "key", "token", "u1")
+    subscriber.start(lambda *a: None)
+    for _ in range(300):
+        if client.subscribed == 2:
+            break
+        threading.Event().wait(0.01)
+    subscriber.stop()
+    assert not subscriber.thread.is_alive()
+    assert client.subscribed == client.unsubscribed == 2
+    assert client.closed
+    assert subscriber.loop.is_closed()
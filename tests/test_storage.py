@@ -0,0 +1,37 @@
+import os
+import stat
+
+import pytest
+
+from storage import UMASK, atomic_write
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="permissões POSIX")
+
+
+def mode_of(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_arquivo_novo_segue_a_umask(tmp_path):
+    path = tmp_path / "products.json"
+    atomic_write(str(path), b"[]")
+    assert path.read_bytes() == b"[]"
+    assert mode_of(path) == 0o666 & ~UMASK
+
+
+def test_mantem_a_permissao_do_destino(tmp_path):
+    path = tmp_path / "products.json"
+    path.write_bytes(b"old")
+    os.chmod(path, 0o640)
+    atomic_write(str(path), b"new")
+    assert path.read_bytes() == b"new"
+    assert mode_of(path) == 0o640
+
+
+def test_mode_explicito(tmp_path):
+    path = tmp_path / "session.json"
+    path.write_bytes(b"{}")
+    os.chmod(path, 0o644)
+    atomic_write(str(path), b"{}", mode=0o600)
+    assert mode_of(path) == 0o600
+    assert [p.name for p in tmp_path.iterdir()] == ["session.json"]
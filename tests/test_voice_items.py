@@ -0,0 +1,38 @@
+import pytest
+
+import voice_parser
+from voice_corpus import entries
+
+MULTI = entries(lambda entry: len(entry["items"]) > 1)
+
+
+@pytest.mark.parametrize("entry", MULTI, ids=[entry["text"] for entry in MULTI])
+def test_corpus_varios_itens(entry):
+    assert voice_parser.parse_items(entry["text"]) == entry["items"]
+
+
+@pytest.mark.parametrize("separator", ["próximo", "próximo item", "outro item", "e depois", ";"])
+def test_separadores(separator):
+    text = f"produto arroz quantidade 2 {separator} produto feijão quantidade 1"
+    assert voice_parser.parse_items(text) == [
+        {"Produto": "arroz", "Quantidade": "2"},
+        {"Produto": "feijão", "Quantidade": "1"},
+    ]
+
+
+def test_campo_repetido_comeca_outro_item():
+    assert voice_parser.parse_items("mercadoria sal preço 2 mercadoria açúcar preço 4") == [
+        {"Mercadorias": "sal", "Preço": "2"},
+        {"Mercadorias": "açúcar", "Preço": "4"},
+    ]
+
+
+def test_e_dentro_do_nome_nao_separa():
+    assert voice_parser.parse_items("produto pão e manteiga quantidade 2") == [
+        {"Produto": "pão e manteiga", "Quantidade": "2"},
+    ]
+
+
+def test_sem_campo_nenhum():
+    assert voice_parser.parse_items("olá") == []
+    assert voice_parser.parse_items("") == []
@@ -0,0 +1,64 @@
+import pytest
+
+import voice_normalize
+import voice_parser
+from voice_corpus import entries
+
+SINGLE = entries(lambda entry: len(entry["items"]) <= 1)
+NORMALIZED = entries(lambda entry: "normalized" in entry)
+
+
+@pytest.mark.parametrize("entry", SINGLE, ids=[entry["text"] for entry in SINGLE])
+def test_corpus_um_item(entry):
+    assert voice_parser.parse_items(entry["text"]) == entry["items"]
+    # Mesmo resultado sem passar pelo cache
+    assert voice_parser.parse_uncached(entry["text"].lower()) == entry["items"]
+
+
+@pytest.mark.parametrize("entry", NORMALIZED, ids=[entry["text"] for entry in NORMALIZED])
+def test_corpus_normalizado(entry):
+    items = voice_parser.parse_items(entry["text"])
+    assert [voice_normalize.normalize_item(item) for item in items] == entry["normalized"]
+
+
+def test_cache_devolve_dicionarios_novos():
+    first = voice_parser.parse_items("produto arroz quantidade 2")
+    first[0]["Produto"] = "alterado"
+    assert voice_parser.parse_items("Produto  arroz quantidade 2") == [{"Produto": "arroz", "Quantidade": "2"}]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("10", "10.00"),
+    ("R$ 12,5", "12.50"),
+    ("dez reais e cinquenta centavos", "10.50"),
+    ("três reais e vinte", "3.20"),
+    ("cinquenta e dois reais", "52.00"),
+    ("mil e quinhentos", "1500.00"),
+    # Ponto com três dígitos é milhar; com dois (ou começando em zero) é decimal
+    ("2.000 reais", "2000.00"),
+    ("1.234", "1234.00"),
+    ("r $ 1.234,56", "1234.56"),
+    ("1.50", "1.50"),
+    ("0.500", "0.50"),
+])
+def test_normalize_money(text, expected):
+    assert voice_normalize.normalize_money(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("duas", "2"),
+    ("doze", "12"),
+    ("vinte e três", "23"),
+    ("2,5", "2.5"),
+    ("1.500", "1500"),
+    ("1.50", "1.50"),
+])
+def test_normalize_quantity(text, expected):
+    assert voice_normalize.normalize_quantity(text) == expected
+
+
+def test_centavos_nao_juntam_com_a_quantidade():
+    items = voice_parser.parse_items("dez reais e cinquenta duas caixas")
+    assert [voice_normalize.normalize_item(item) for item in items] == [
+        {"Preço": "10.50", "Quantidade": "2", "Caixa": ""},
+    ]
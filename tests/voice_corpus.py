@@ -0,0 +1,12 @@
+import json
+import os
+
+# O mesmo corpus do benchmark (benchmarks/bench_voice_parser.py)
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "voice_corpus.json")
+
+with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+
+def entries(condition):
+    return [entry for entry in CORPUS if condition(entry)]
@@ -0,0 +1,118 @@
+"""Tempos de cada etapa da entrada por voz, agregados em histogramas.
+
+Cada etapa (abrir o microfone, calibrar, escutar, reconhecer, interpretar,
+buscar no catálogo, inserir na grade, salvar) grava a sua duração com
+span() ou record(); summary() resume contagem, média e percentis e
+export_csv() grava tudo num arquivo. Serve para separar o que é rede
+(reconhecimento online) do que é o próprio aplicativo.
+"""
+import csv
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Etapa -> rótulo, na ordem em que acontecem numa fala
+STAGES = {
+    "microfone": "Abrir microfone",
+    "calibracao": "Calibração do ruído",
+    "escuta": "Escuta (fala + pausa)",
+    "reconhecimento": "Reconhecimento",
+    "interpretacao": "Interpretação (parse)",
+    "catalogo": "Busca no catálogo",
+    "insercao": "Inserção na grade",
+    "salvar": "Salvar",
+}
+
+# Limites superiores das faixas do histograma, em ms (a última é "acima de")
+BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Amostras guardadas por etapa para os percentis
+SAMPLE_HISTORY = 1000
+
+
+def bucket_labels():
+    labels = [f"<= {limit} ms" for limit in BUCKETS]
+    labels.append(f"> {BUCKETS[-1]} ms")
+    return labels
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_HISTORY)
+
+    def add(self, ms):
+        index = 0
+        while index < len(BUCKETS) and ms > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.samples.append(ms)
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class VoiceMetrics:
+    """Histogramas por etapa; seguro para as threads de captura e do pool."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.histograms.setdefault(stage, Histogram()).add(seconds * 1000)
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def summary(self):
+        """[(etapa, rótulo, n, média, p50, p95, máx, contagens por faixa)], tempos em ms."""
+        with self.lock:
+            stages = [stage for stage in STAGES if stage in self.histograms]
+            stages += sorted(stage for stage in self.histograms if stage not in STAGES)
+            rows = []
+            for stage in stages:
+                hist = self.histograms[stage]
+                rows.append((
+                    stage, STAGES.get(stage, stage), hist.count, hist.total / hist.count,
+                    hist.percentile(0.5), hist.percentile(0.95), hist.max, list(hist.counts),
+                ))
+            return rows
+
+    def export_csv(self, path):
+        """Grava o resumo e o histograma de cada etapa; devolve quantas etapas."""
+        rows = self.summary()
+        # utf-8-sig e ';' como em exporter.py, para abrir direto no Excel
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(["etapa", "n", "media_ms", "p50_ms", "p95_ms", "max_ms"] + bucket_labels())
+            for stage, _, count, mean, p50, p95, peak, counts in rows:
+                writer.writerow([stage, count] + [f"{value:.1f}" for value in (mean, p50, p95, peak)] + counts)
+        return len(rows)
+
+
+metrics = VoiceMetrics()
+record = metrics.record
+span = metrics.span
+summary = metrics.summary
+export_csv = metrics.export_csv
+clear = metrics.clear
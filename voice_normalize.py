@@ -0,0 +1,226 @@
+"""Normalização dos valores ditados antes de chegarem à grade.
+
+Números por extenso viram dígitos ("duas caixas" -> "2 caixas"), valores em
+reais viram preço com centavos ("dez reais e cinquenta" -> "10.50") e datas
+faladas ("ontem", "dezenove de outubro") viram ISO. normalize_item() aplica
+a conversão certa a cada campo do parser (voice_parser); campos de texto
+(produto, categoria, descrição) ficam como foram falados.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from dates import parse_date, normalize_date
+
+NUMBER_WORDS = {
+    "zero": 0, "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4,
+    "cinco": 5, "seis": 6, "sete": 7, "oito": 8, "nove": 9, "dez": 10,
+    "onze": 11, "doze": 12, "treze": 13, "catorze": 14, "quatorze": 14,
+    "quinze": 15, "dezesseis": 16, "dezasseis": 16, "dezessete": 17,
+    "dezoito": 18, "dezenove": 19, "vinte": 20, "trinta": 30, "quarenta": 40,
+    "cinquenta": 50, "sessenta": 60, "setenta": 70, "oitenta": 80, "noventa": 90,
+    "cem": 100, "cento": 100, "duzentos": 200, "duzentas": 200,
+    "trezentos": 300, "trezentas": 300, "quatrocentos": 400, "quatrocentas": 400,
+    "quinhentos": 500, "quinhentas": 500, "seiscentos": 600, "seiscentas": 600,
+    "setecentos": 700, "setecentas": 700, "oitocentos": 800, "oitocentas": 800,
+    "novecentos": 900, "novecentas": 900,
+}
+THOUSAND = "mil"
+# Palavras que podem abrir um número por extenso
+NUMBER_STARTS = frozenset(NUMBER_WORDS) | {THOUSAND}
+# Fim da fala antes dos centavos ("10 reais e")
+CENTS_PREFIXES = (["reais", "e"], ["real", "e"])
+DECIMAL_POINT = "virgula"
+# "primeiro de outubro"
+ORDINALS = {"primeiro": 1}
+
+MONEY_FIELDS = ("Preço", "Valor Unit.", "Total")
+QUANTITY_FIELDS = ("Quantidade", "Estoque")
+
+TOKEN_RE = re.compile(r"\d+(?:[.,]\d+)?|\w+(?:-\w+)*|[^\w\s]+")
+# Depois dos números convertidos: "r$ 10,50", "10 reais e 50 centavos", "1 real", "50 centavos"
+CURRENCY_RE = re.compile(r"r\s*\$\s*(\d+)(?:[.,](\d{1,2}))?")
+REAIS_RE = re.compile(
+    r"(\d+)(?:[.,](\d{1,2}))?\s*(?:reais|real)"
+    r"(?:\s+e\s+(\d{1,2})(?!\s*(?:caixas?|unidades?)\b)(?:\s*centavos?)?|\s+(\d{1,2})\s*centavos?)?"
+)
+CENTAVOS_RE = re.compile(r"(\d{1,2})\s*centavos?")
+# "dez e cinquenta" num campo de preço: reais e centavos
+PAIR_RE = re.compile(r"^(\d+)\s+e\s+(\d{1,2})$")
+PLAIN_RE = re.compile(r"(\d+)(?:[.,](\d{1,2}))?")
+# Milhar com ponto, como no importer.py ("2.000 reais", "r$ 1.234,56"): ponto seguido de
+# exatamente três dígitos; a vírgula continua sendo o decimal
+THOUSANDS_RE = re.compile(r"(?<![\d.,])[1-9]\d{0,2}(?:\.\d{3})+(?![\d.])")
+
+
+# Palavras sem acento já vistas: spoken_numbers dobra cada palavra da fala
+@lru_cache(maxsize=1024)
+def fold(word):
+    word = unicodedata.normalize("NFKD", word)
+    return "".join(c for c in word if not unicodedata.combining(c))
+
+
+def magnitude(value):
+    # Próximas palavras que ainda compõem o número: "cento e" + <100, "vinte e" + <10
+    if value >= 100:
+        return 100
+    if value >= 20:
+        return 10
+    return 1
+
+
+def spoken_numbers(text):
+    """Troca números por extenso por dígitos: "cento e vinte e duas caixas" -> "122 caixas".
+
+    Números com ponto de milhar perdem o ponto ("2.000" -> "2000").
+    """
+    text = str(text or "").lower()
+    if "." in text:
+        text = THOUSANDS_RE.sub(lambda match: match.group(0).replace(".", ""), text)
+    tokens = TOKEN_RE.findall(text)
+    out = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if not token.isdigit() and fold(token) not in NUMBER_STARTS:
+            # A maioria das palavras: nem dígito nem número por extenso
+            out.append(token)
+            i += 1
+            continue
+        # Centavos ("dez reais e cinquenta duas caixas"): a unidade já é a quantidade
+        cents = out[-2:] in CENTS_PREFIXES
+        number, i = number_at(tokens, i, join_units=not cents)
+        # "oito vírgula cinquenta" -> 8,50
+        if i + 1 < len(tokens) and fold(tokens[i]) == DECIMAL_POINT:
+            fraction = number_at(tokens, i + 1)
+            if fraction is not None:
+                digits = tokens[i + 1] if tokens[i + 1].isdigit() else str(fraction[0])
+                out.append(f"{number},{digits}")
+                i = fraction[1]
+                continue
+        out.append(str(number))
+    return " ".join(out)
+
+
+def number_at(tokens, i, join_units=True):
+    """(valor, próximo índice) do número que começa em tokens[i], ou None.
+
+    Com join_units, a unidade logo depois da dezena entra no número mesmo
+    sem "e" ("cinquenta duas" = 52).
+    """
+    token = tokens[i]
+    if token.isdigit():
+        return int(token), i + 1
+    word = fold(token)
+    if word not in NUMBER_WORDS and word != THOUSAND:
+        return None
+    total = 0
+    current = 0
+    limit = None
+    while i < len(tokens):
+        word = fold(tokens[i])
+        if word == THOUSAND:
+            total += (current or 1) * 1000
+            current = 0
+            limit = 1000
+            i += 1
+            # "mil duzentos": depois de mil a centena pode vir sem "e"
+            joined = True
+        elif (word in NUMBER_WORDS and (limit is None or NUMBER_WORDS[word] < limit)
+              and (NUMBER_WORDS[word] or limit is None)):
+            value = NUMBER_WORDS[word]
+            current += value
+            limit = magnitude(value)
+            i += 1
+            joined = False
+        else:
+            break
+        # "e" só continua o número se a palavra seguinte ainda couber nele
+        # ("vinte e dois"); sem "e", só "mil" ("dois mil") e a unidade depois da
+        # dezena ("cinquenta duas" = 52: o reconhecedor costuma engolir o "e")
+        if (i + 1 < len(tokens) and tokens[i] == "e"
+                and NUMBER_WORDS.get(fold(tokens[i + 1]), limit) < limit):
+            i += 1
+        elif (join_units and limit == 10 and i < len(tokens)
+              and 0 < NUMBER_WORDS.get(fold(tokens[i]), 10) < 10):
+            continue
+        elif not joined and not (i < len(tokens) and fold(tokens[i]) == THOUSAND):
+            break
+    return total + current, i
+
+
+def normalize_money(text):
+    """Preço ditado como "10.50"; o texto original se não houver valor."""
+    spoken = spoken_numbers(text)
+    for pattern in (CURRENCY_RE, REAIS_RE):
+        match = pattern.search(spoken)
+        if match:
+            cents = (match.group(3) or match.group(4)) if pattern is REAIS_RE else None
+            return format_money(match.group(1), match.group(2), cents)
+    match = CENTAVOS_RE.search(spoken)
+    if match:
+        return format_money("0", cents=match.group(1))
+    match = PAIR_RE.match(spoken)
+    if match:
+        return format_money(match.group(1), cents=match.group(2))
+    match = PLAIN_RE.search(spoken)
+    if match:
+        return format_money(match.group(1), match.group(2))
+    return str(text or "").strip()
+
+
+def format_money(reais, fraction=None, cents=None):
+    # fraction são as casas decimais ("10,5" = 50 centavos); cents, centavos falados ("e 5 centavos")
+    if fraction:
+        cents = fraction.ljust(2, "0")
+    return f"{int(reais)}.{int(cents or 0):02d}"
+
+
+def normalize_quantity(text):
+    spoken = spoken_numbers(text)
+    match = PLAIN_RE.search(spoken)
+    if not match:
+        return str(text or "").strip()
+    return match.group(0).replace(",", ".")
+
+
+def normalize_code(text):
+    """Código ditado dígito a dígito ("sete oito nove um") -> "7891"."""
+    spoken = spoken_numbers_by_digit(text)
+    return spoken if spoken else str(text or "").strip()
+
+
+def spoken_numbers_by_digit(text):
+    digits = []
+    for token in TOKEN_RE.findall(str(text or "").lower()):
+        if token.isdigit():
+            digits.append(token)
+        elif fold(token) in NUMBER_WORDS and NUMBER_WORDS[fold(token)] < 10:
+            digits.append(str(NUMBER_WORDS[fold(token)]))
+        elif token not in ("-", ".", "e"):
+            return ""
+    return "".join(digits)
+
+
+def normalize_spoken_date(text, today=None):
+    if parse_date(text, today):
+        return normalize_date(text, today)
+    words = [str(ORDINALS.get(fold(token), token)) for token in str(text or "").lower().split()]
+    return normalize_date(spoken_numbers(" ".join(words)), today)
+
+
+def normalize_item(item, today=None):
+    """Cópia de um item do parser com os campos numéricos e a data já tipados."""
+    result = dict(item)
+    for field, value in item.items():
+        if not value:
+            continue
+        if field in MONEY_FIELDS:
+            result[field] = normalize_money(value)
+        elif field in QUANTITY_FIELDS:
+            result[field] = normalize_quantity(value)
+        elif field == "Código":
+            result[field] = normalize_code(value)
+        elif field == "Data":
+            result[field] = normalize_spoken_date(value, today)
+    return result
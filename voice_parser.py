@@ -0,0 +1,230 @@
+"""Extração dos campos ditados ("produto arroz quantidade 2 valor 10").
+
+Todas as palavras-chave viram uma única regex com limites de palavra,
+compilada na importação; uma passada com finditer encontra todas as
+ocorrências em ordem, e o valor de cada campo é o trecho até a próxima.
+Um campo repetido (ou um separador como "próximo") começa outro item.
+"""
+import re
+from functools import lru_cache
+
+import voice_normalize
+
+# Palavra-chave falada -> campo do formulário
+KEYWORDS = {
+    "data": "Data",
+    "mercadoria": "Mercadorias",
+    "mercadorias": "Mercadorias",
+    "produto": "Produto",
+    "produtos": "Produto",
+    "categoria": "Categoria",
+    "descrição": "Descrição",
+    "descricao": "Descrição",
+    "código": "Código",
+    "codigo": "Código",
+    "preço": "Preço",
+    "preco": "Preço",
+    "valor": "Preço",
+    "valor unitário": "Valor Unit.",
+    "valor unitario": "Valor Unit.",
+    "unitário": "Valor Unit.",
+    "unitario": "Valor Unit.",
+    "total": "Total",
+    "estoque": "Estoque",
+    "quantidade": "Quantidade",
+    "quantas": "Quantidade",
+    "caixa": "Caixa",
+    "caixas": "Caixa",
+    "unidade": "Unidade",
+    "unidades": "Unidade",
+}
+
+# Frases já interpretadas (repetições e "Falar Novamente" com o mesmo texto)
+PARSE_CACHE_SIZE = 256
+
+# Campos que só marcam o tipo da quantidade; podem aparecer dentro de nomes
+TYPE_FIELDS = ("Caixa", "Unidade")
+
+# Falas que encerram o item atual sem serem campo
+SEPARATORS = ("próximo item", "proximo item", "outro item", "próximo", "proximo", "e depois")
+
+
+def alternation(words):
+    # Mais longas primeiro: "valor unitário" vence "valor" na mesma posição
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+def initials(words):
+    return re.escape("".join(sorted({word[0] for word in words})))
+
+
+# A classe de iniciais na frente descarta de uma vez as posições que não abrem
+# palavra-chave, separador nem pontuação, sem tentar cada alternativa
+SEPARATOR_PATTERN = rf"(?P<sep>{alternation(SEPARATORS)})"
+KEY_PATTERN = rf"(?P<key>{alternation(KEYWORDS)})"
+PUNCT_PATTERN = r"(?P<punct>;|,(?=\s|$))"
+TOKEN_RE = re.compile(
+    rf"(?=[{initials(list(SEPARATORS) + list(KEYWORDS))};,])"
+    rf"(?:\b(?:{SEPARATOR_PATTERN}|{KEY_PATTERN})\b|{PUNCT_PATTERN})"
+)
+# Caminho rápido (fala de um item só): procura o separador e, sem ele, só as palavras-chave
+SPLIT_RE = re.compile(rf"(?=[{initials(SEPARATORS)};,])(?:\b{SEPARATOR_PATTERN}\b|{PUNCT_PATTERN})")
+KEY_RE = re.compile(rf"(?=[{initials(KEYWORDS)}])\b{KEY_PATTERN}\b")
+# Preposições e pontuação que sobram no início do valor ("preço de 10", "data: hoje")
+LEADING_RE = re.compile(r"^(?:(?:de|da|do|é|a|e)(?:\s+|$)|:\s*)+")
+LEADING_INITIALS = "daeé:"
+TRAILING_NUMBER_RE = re.compile(r"(\d+(?:[.,]\d+)?)$")
+# Fala sem palavras-chave: "arroz 10 reais 2 caixas"
+FREE_QUANTITY_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(caixas?|unidades?)?\b")
+# Campos de texto que podem continuar depois de uma vírgula ("descrição pacote, safra nova")
+TEXT_FIELDS = ("Mercadorias", "Produto", "Categoria", "Descrição")
+
+
+def clean_value(value):
+    value = value.strip()
+    # A regex só roda quando o valor pode começar com preposição ou ":"
+    if value[:1] in LEADING_INITIALS:
+        value = LEADING_RE.sub("", value).strip()
+    return value
+
+
+def parse_items(text):
+    """Lista de itens ({campo: valor}) ditados em 'text', na ordem da fala.
+
+    O resultado fica em cache pelo texto normalizado; cada chamada recebe
+    dicionários novos, que podem ser alterados à vontade.
+    """
+    key = " ".join(str(text or "").lower().split())
+    return [dict(item) for item in parse_cached(key)]
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_cached(text):
+    return tuple(tuple(item.items()) for item in parse_uncached(text))
+
+
+def parse_uncached(text):
+    """parse_items sem cache.
+
+    Uma passada da regex acha palavras-chave e separadores ("próximo",
+    "e depois", ";", ", "). Sem separador a fala é um item só e vai direto
+    aos campos; com eles, cada trecho é lido pelos campos ou, sem eles, no
+    formato livre "arroz 10 reais 2 caixas". Um trecho sem campo nem número
+    continua o último campo de texto.
+    """
+    text = str(text or "").lower()
+    if SPLIT_RE.search(text) is None:
+        # Caminho rápido: um item só, sem separador nem pontuação (a maioria das falas)
+        keys = list(KEY_RE.finditer(text))
+        if any(KEYWORDS[match[0]] not in TYPE_FIELDS for match in keys):
+            return parse_fields(text, len(text), keys)
+        segment = text.strip()
+        return parse_free(segment) if segment else []
+    items = []
+    start = 0
+    keys = []
+    after_comma = False
+    for match in TOKEN_RE.finditer(text):
+        if match.lastgroup == "key":
+            keys.append(match)
+            continue
+        parse_segment(text, start, match.start(), keys, items, after_comma)
+        start = match.end()
+        keys = []
+        after_comma = match.group(0) == ","
+    parse_segment(text, start, len(text), keys, items, after_comma)
+    return items
+
+
+def parse_segment(text, start, end, keys, items, after_comma):
+    segment = text[start:end].strip()
+    if not segment:
+        return
+    fields = [match for match in keys if KEYWORDS[match[0]] not in TYPE_FIELDS]
+    if fields:
+        lead = clean_value(text[start:keys[0].start()])
+        parsed = parse_fields(text, end, keys)
+    else:
+        lead = ""
+        parsed = parse_free(segment)
+    previous = items[-1] if items else None
+    last = list(previous)[-1] if previous else None
+    if not parsed:
+        # "descrição pacote azul, safra nova": continua o último campo de texto
+        if last in TEXT_FIELDS:
+            previous[last] = f"{previous[last]}, {segment}".lstrip(", ")
+        return
+    # Depois de uma vírgula, campos que o item anterior ainda não tem o completam
+    if after_comma and previous and not set(parsed[0]) & set(previous):
+        if lead and last in TEXT_FIELDS:
+            previous[last] = f"{previous[last]}, {lead}".lstrip(", ")
+        previous.update(parsed.pop(0))
+    items.extend(parsed)
+
+
+def parse_fields(text, end, keys):
+    """Itens de um trecho com palavras-chave; um campo repetido começa outro item."""
+    items = []
+    item = {}
+    field = None
+    value_start = 0
+    for match in keys:
+        next_field = KEYWORDS[match[0]]
+        if field is not None:
+            value = clean_value(text[value_start:match.start()])
+            # "mercadoria caixas de papelão": palavra de tipo logo após um campo vazio é valor
+            if not value and next_field in TYPE_FIELDS:
+                continue
+            item[field] = value
+            # "produto arroz duas caixas": o número antes do tipo é a quantidade
+            if next_field in TYPE_FIELDS and "Quantidade" not in item:
+                split_quantity(item, field)
+        if next_field in item:
+            items.append(item)
+            item = {}
+        field = next_field
+        item[field] = ""
+        value_start = match.end()
+    if field is not None:
+        item[field] = clean_value(text[value_start:end])
+    if item:
+        items.append(item)
+    return items
+
+
+def split_quantity(item, field):
+    spoken = voice_normalize.spoken_numbers(item[field])
+    match = TRAILING_NUMBER_RE.search(spoken)
+    if match:
+        item[field] = clean_value(spoken[:match.start()])
+        item["Quantidade"] = match.group(1)
+
+
+def parse_free(text):
+    """Item de um trecho sem palavras-chave: preço em reais, quantidade e o nome."""
+    spoken = voice_normalize.spoken_numbers(text)
+    item = {}
+    for pattern in (voice_normalize.CURRENCY_RE, voice_normalize.REAIS_RE):
+        match = pattern.search(spoken)
+        if match:
+            item["Preço"] = match.group(0)
+            spoken = spoken[:match.start()] + " " + spoken[match.end():]
+            break
+    match = FREE_QUANTITY_RE.search(spoken)
+    if match:
+        item["Quantidade"] = match.group(1)
+        if match.group(2):
+            item["Caixa" if match.group(2).startswith("caixa") else "Unidade"] = ""
+        spoken = spoken[:match.start()] + " " + spoken[match.end():]
+    if not item:
+        return []
+    name = clean_value(" ".join(spoken.split()))
+    if name:
+        item = {"Produto": name, **item}
+    return [item]
+
+
+def parse(text):
+    """Campos do primeiro item (o formulário de voz mostra um item por vez)."""
+    items = parse_items(text)
+    return items[0] if items else {}
@@ -0,0 +1,94 @@
+import speech_recognition as sr
+
+import recognizers
+import tasks
+from audio_capture import get_capture_service
+
+# Quanto o aviso "Calibrando" espera pela primeira calibração
+CALIBRATION_WAIT = 5
+
+
+class ContinuousVoiceSession:
+    """Escuta contínua sobre o serviço de captura: várias falas em sequência.
+
+    O AudioCaptureService mantém o microfone aberto e calibrado e segmenta as
+    falas pelo detector de energia do speech_recognition (pause_threshold);
+    cada trecho vai à lane "voz" do pool de tarefas para reconhecimento
+    enquanto a captura continua. Os textos chegam em on_text(texto, backend,
+    segundos) na thread da GUI e na ordem em que foram falados, mesmo que o
+    reconhecimento termine fora de ordem.
+    """
+
+    def __init__(self, backend, on_text, on_error=None, on_state=None):
+        self.backend = backend
+        self.on_text = on_text
+        self.on_error = on_error or (lambda msg: print(f"Erro no modo contínuo: {msg}"))
+        self.on_state = on_state or (lambda state: None)
+        self.running = False
+        self.sequence = 0      # número da próxima fala capturada
+        self.next_seq = 0      # próxima fala a entregar
+        self.ready = {}        # número -> (texto, backend, segundos) ou None (não entendida)
+        self.pending = []      # tarefas de reconhecimento em andamento
+
+    def start(self):
+        # O dispatcher do pool precisa nascer na thread da GUI
+        self.deliver = tasks.get_pool().deliver
+        self.service = get_capture_service()
+        self.running = True
+        self.on_state("calibrando" if not self.service.calibrated else "ouvindo")
+        self.service.add_listener(self.on_audio, self.on_capture_error)
+        if not self.service.calibrated:
+            tasks.submit(self.wait_calibration, priority=tasks.LOW, lane="voz",
+                         on_result=lambda _: self.running and self.on_state("ouvindo"))
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.service.remove_listener(self.on_audio)
+        for task in self.pending:
+            task.cancel()
+        self.pending = []
+        self.on_state("parado")
+
+    def wait_calibration(self):
+        self.service.calibrated_event.wait(CALIBRATION_WAIT)
+
+    # Chamados na thread de captura
+    def on_audio(self, audio):
+        self.deliver(self.recognize, audio)
+
+    def on_capture_error(self, error):
+        self.deliver(self.capture_failed, f"Erro no microfone: {error}")
+
+    def capture_failed(self, msg):
+        self.on_error(msg)
+        self.stop()
+
+    def recognize(self, audio):
+        seq = self.sequence
+        self.sequence += 1
+        task = tasks.submit(
+            self.transcribe, audio, priority=tasks.HIGH, lane="voz",
+            on_result=lambda result: self.finished(seq, result),
+            on_error=lambda msg: self.finished(seq, None, msg),
+        )
+        self.pending.append(task)
+
+    def transcribe(self, audio):
+        try:
+            return recognizers.recognize(audio, self.backend)
+        except sr.UnknownValueError:
+            return None
+
+    def finished(self, seq, result, error=None):
+        self.pending = [task for task in self.pending if not task.done]
+        if error:
+            self.on_error(error)
+        self.ready[seq] = result
+        # Entrega em ordem: uma fala lenta segura as seguintes até ser reconhecida
+        while self.next_seq in self.ready:
+            result = self.ready.pop(self.next_seq)
+            self.next_seq += 1
+            if result is not None and self.running:
+                self.on_text(*result)